@@ -1,27 +1,88 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session, has_request_context, g, current_app
+from flask.cli import with_appcontext
+import click
 import psycopg
 import os
 import time
 import csv
 import io
-import requests
-import pandas as pd
-from datetime import datetime
-from databricks import sdk
+import threading
+import asyncio
+import functools
+import inspect
+import logging
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
 from psycopg import sql
 from psycopg_pool import ConnectionPool
 from werkzeug.utils import secure_filename
 from config import config
+from app_logging import configure_logging, get_logger, new_request_id, request_id
+from async_db import AsyncDatabase
+from metrics import registry, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from query_log import TimedCursor, TimedAsyncCursor, query_name, slow_query_log
+from forecast_cache import ForecastCache
+from serving_client import ModelServingClient, CircuitBreaker, CircuitOpenError
+from singleflight import SingleFlight
 
-# Database connection setup
-workspace_client = sdk.WorkspaceClient()
+# Database connection setup; the workspace client and pool are created on first use
+workspace_client = None
 postgres_password = None
 last_password_refresh = 0
 connection_pool = None
+# Process that created connection_pool; a forked worker must not reuse its parent's pool
+connection_pool_pid = None
+connection_pool_lock = threading.Lock()
+# Token (by refresh time) each pool's connection string was built with
+connection_pool_token = None
+# Optional pool on a Lakebase readable secondary for read-only helpers (POSTGRES_READ_HOST)
+read_pool = None
+read_pool_pid = None
+read_pool_token = None
+# Requests with these methods don't write, so their reads may go to the read replica
+READ_ONLY_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+# Async pool for the /api/v2 handlers, opened on its own event loop thread on first use
+async_database = AsyncDatabase(lambda: get_conninfo(), max_size=config.get_async_pool_max_size(),
+                               connect_kwargs={'cursor_factory': TimedAsyncCursor})
 
+# Metrics served at /metrics; each worker process keeps its own
+REQUEST_LATENCY = registry.histogram('inventory_http_request_duration_seconds',
+                                     'Request latency by route template, method and status', ['route', 'method', 'status'])
+QUERY_LATENCY = registry.histogram('inventory_db_query_duration_seconds',
+                                   'Data-access helper latency by logical query name, including the wait for a connection', ['query'])
+TOKEN_REFRESHES = registry.counter('inventory_oauth_token_refreshes_total', 'Lakebase OAuth token refreshes', ['result'])
+FORECAST_CALLS = registry.counter('inventory_forecast_model_calls_total', 'Demand forecast model invocations', ['mode', 'result'])
+FORECAST_ROWS = registry.counter('inventory_forecast_model_rows_total', 'Rows scored by the demand forecast model', ['mode'])
+FORECAST_FALLBACKS = registry.counter('inventory_forecast_fallbacks_total',
+                                      'Stock suggestions that fell back to minimum stock logic', ['reason'])
+CSV_ROWS_INGESTED = registry.counter('inventory_csv_rows_ingested_total', 'Inventory rows inserted from CSV uploads')
+CSV_INGEST_LATENCY = registry.histogram('inventory_csv_ingest_duration_seconds', 'Time to insert one CSV upload')
+CSV_INGEST_RATE = registry.gauge('inventory_csv_ingest_rows_per_second', 'Insert throughput of the most recent CSV upload')
 
-# Print configuration summary on startup
-config.print_config_summary()
+def timed_query(func):
+    """Record each call of a data-access helper in QUERY_LATENCY under the helper's name, which
+    also names its statements in the statement metrics and slow-query log."""
+    name = func.__name__
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            with query_name(name), QUERY_LATENCY.time(query=name):
+                return await func(*args, **kwargs)
+        return async_wrapper
+    
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with query_name(name), QUERY_LATENCY.time(query=name):
+            return func(*args, **kwargs)
+    return wrapper
+
+slow_query_log.configure(**config.get_slow_query_settings())
+
+# Leveled logging through a background queue; the listener thread starts with the first record
+logging_settings = config.get_logging_settings()
+configure_logging(logging_settings['level'], logging_settings['format'])
+logger = get_logger('app')
 
 # CSV upload configuration
 ALLOWED_EXTENSIONS = {'csv'}
@@ -31,48 +92,228 @@ def allowed_file(filename):
     """Check if uploaded file is allowed."""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def get_workspace_client():
+    """Get the Databricks workspace client, creating it on first use."""
+    global workspace_client
+    if workspace_client is None:
+        # The SDK is slow to import, so it is only loaded when first needed
+        from databricks import sdk
+        workspace_client = sdk.WorkspaceClient()
+    return workspace_client
+
 def refresh_oauth_token():
     """Refresh OAuth token if expired."""
     global postgres_password, last_password_refresh
     if postgres_password is None or time.time() - last_password_refresh > 900:
-        print("Refreshing PostgreSQL OAuth token")
+        logger.info("Refreshing PostgreSQL OAuth token")
         try:
-            postgres_password = workspace_client.config.oauth_token().access_token
+            postgres_password = get_workspace_client().config.oauth_token().access_token
             last_password_refresh = time.time()
+            TOKEN_REFRESHES.inc(result='success')
         except Exception as e:
-            print(f"❌ Failed to refresh OAuth token: {str(e)}")
+            logger.error("Failed to refresh OAuth token: %s", e)
+            TOKEN_REFRESHES.inc(result='error')
             return False
     return True
 
+def get_conninfo(host=None):
+    """Build the Lakebase connection string, refreshing the OAuth token used as password.
+    host defaults to PGHOST, the primary."""
+    refresh_oauth_token()
+    return (
+        f"dbname={os.getenv('PGDATABASE')} "
+        f"user={os.getenv('PGUSER')} "
+        f"password={postgres_password} "
+        f"host={host or os.getenv('PGHOST')} "
+        f"port={os.getenv('PGPORT')} "
+        f"sslmode={os.getenv('PGSSLMODE', 'require')} "
+        f"application_name={os.getenv('PGAPPNAME')}"
+    )
+
 def get_connection_pool():
-    """Get or create the connection pool."""
-    global connection_pool
-    if connection_pool is None:
-        refresh_oauth_token()
-        conn_string = (
-            f"dbname={os.getenv('PGDATABASE')} "
-            f"user={os.getenv('PGUSER')} "
-            f"password={postgres_password} "
-            f"host={os.getenv('PGHOST')} "
-            f"port={os.getenv('PGPORT')} "
-            f"sslmode={os.getenv('PGSSLMODE', 'require')} "
-            f"application_name={os.getenv('PGAPPNAME')}"
-        )
-        connection_pool = ConnectionPool(conn_string, min_size=2, max_size=10)
+    """Get or create this process's connection pool.
+
+    The pool is sized and tuned per worker process (config.get_pool_settings()). A pool
+    inherited through fork is dropped without closing it, since its sockets belong to the parent.
+    """
+    global connection_pool, connection_pool_pid, connection_pool_token
+    if connection_pool is None or connection_pool_pid != os.getpid():
+        with connection_pool_lock:
+            if connection_pool is not None and connection_pool_pid != os.getpid():
+                connection_pool = None
+            if connection_pool is None:
+                connection_pool = ConnectionPool(get_conninfo(), kwargs={'cursor_factory': TimedCursor},
+                                                 **config.get_pool_settings())
+                connection_pool_pid = os.getpid()
+                connection_pool_token = last_password_refresh
     return connection_pool
 
+def get_read_pool():
+    """Get or create this process's read-replica pool; None when no replica is configured.
+
+    The replica is a separate Lakebase node with its own connections, so it is sized like
+    the primary pool and reads served there take no capacity from writes.
+    """
+    global read_pool, read_pool_pid, read_pool_token
+    read_host = config.get_read_replica_host()
+    if not read_host:
+        return None
+    if read_pool is None or read_pool_pid != os.getpid():
+        with connection_pool_lock:
+            if read_pool is not None and read_pool_pid != os.getpid():
+                read_pool = None
+            if read_pool is None:
+                read_pool = ConnectionPool(get_conninfo(read_host), kwargs={'cursor_factory': TimedCursor},
+                                           **config.get_pool_settings())
+                read_pool_pid = os.getpid()
+                read_pool_token = last_password_refresh
+    return read_pool
+
+def prewarm_connection_pools():
+    """Open each pool's minimum connections and health-check them, so the first requests
+    don't pay connection setup. Returns whether every configured pool is ready."""
+    ready = True
+    timeout = config.get_pool_settings()['timeout']
+    for name, get_pool in (('Primary', get_connection_pool), ('Read replica', get_read_pool)):
+        try:
+            pool = get_pool()
+            if pool is None:
+                continue
+            pool.wait(timeout=timeout)
+            # Replace any idle connection that is already broken, then prove a round trip works
+            pool.check()
+            with pool.connection(timeout=timeout) as conn:
+                conn.execute("SELECT 1")
+            logger.info("%s pool warm: %s connections open", name, pool.get_stats().get('pool_size', 0))
+        except Exception as e:
+            logger.warning("%s pool not warmed up: %s", name, e)
+            ready = False
+    return ready
+
+def summarize_pool_stats(pool):
+    """Starvation-oriented summary of a pool's get_stats(), or None when the pool isn't open."""
+    stats = pool.get_stats() if pool is not None else {}
+    if not stats:
+        return None
+    queued = stats.get('requests_queued', 0)
+    return {
+        'size': stats.get('pool_size', 0),
+        'min_size': stats.get('pool_min'),
+        'max_size': stats.get('pool_max'),
+        'in_use': stats.get('pool_size', 0) - stats.get('pool_available', 0),
+        'available': stats.get('pool_available', 0),
+        'waiting': stats.get('requests_waiting', 0),
+        'requests': stats.get('requests_num', 0),
+        'queued': queued,
+        'wait_ms_total': stats.get('requests_wait_ms', 0),
+        'wait_ms_avg': round(stats.get('requests_wait_ms', 0) / queued, 1) if queued else 0.0,
+        'timeouts': stats.get('requests_errors', 0),
+        'connection_errors': stats.get('connections_errors', 0),
+        'connections_lost': stats.get('connections_lost', 0),
+        'raw': stats
+    }
+
+def open_pool_stats():
+    """(pool label, get_stats()) for every pool open in this process."""
+    pools = []
+    if connection_pool is not None and connection_pool_pid == os.getpid():
+        pools.append(('primary', connection_pool.get_stats()))
+    if read_pool is not None and read_pool_pid == os.getpid():
+        pools.append(('read_replica', read_pool.get_stats()))
+    async_stats = async_database.get_stats()
+    if async_stats:
+        pools.append(('async', async_stats))
+    return pools
+
+def pool_stat_samples(stat, scale=1):
+    """Scrape-time samples of one get_stats() field for every open pool."""
+    return lambda: [({'pool': name}, stats.get(stat, 0) * scale) for name, stats in open_pool_stats()]
+
+registry.gauge('inventory_db_pool_size', 'Open connections per pool', ['pool'], callback=pool_stat_samples('pool_size'))
+registry.gauge('inventory_db_pool_max_size', 'Maximum connections per pool', ['pool'], callback=pool_stat_samples('pool_max'))
+registry.gauge('inventory_db_pool_connections_in_use', 'Connections lent out per pool', ['pool'],
+               callback=lambda: [({'pool': name}, stats.get('pool_size', 0) - stats.get('pool_available', 0))
+                                 for name, stats in open_pool_stats()])
+registry.gauge('inventory_db_pool_requests_waiting', 'Clients waiting for a connection', ['pool'],
+               callback=pool_stat_samples('requests_waiting'))
+registry.counter('inventory_db_pool_waits_total', 'Connection requests that had to wait', ['pool'],
+                 callback=pool_stat_samples('requests_queued'))
+registry.counter('inventory_db_pool_wait_seconds_total', 'Time spent waiting for a connection', ['pool'],
+                 callback=pool_stat_samples('requests_wait_ms', 0.001))
+registry.counter('inventory_db_pool_timeouts_total', 'Connection requests that timed out', ['pool'],
+                 callback=pool_stat_samples('requests_errors'))
+registry.counter('inventory_db_pool_connection_errors_total', 'Failed connection attempts', ['pool'],
+                 callback=pool_stat_samples('connections_errors'))
+registry.gauge('inventory_db_connection_budget', 'Lakebase connections the whole app may hold (from LAKEBASE_CAPACITY)',
+               callback=lambda: [({}, config.get_connection_budget())])
+
+def is_pool_token_stale(pool_token):
+    """Whether a pool's connection string holds an expired token, or one another pool has since replaced."""
+    return postgres_password is None or time.time() - last_password_refresh > 900 or pool_token != last_password_refresh
+
+def close_connection_pool(timeout=None):
+    """Close this process's connection pool, letting in-use connections finish first.
+
+    Used on worker shutdown and before forking workers. Returns whether a pool was closed.
+    """
+    global connection_pool, read_pool
+    with connection_pool_lock:
+        pool, connection_pool = connection_pool, None
+        replica_pool, read_pool = read_pool, None
+    if replica_pool is not None and read_pool_pid == os.getpid():
+        replica_pool.close(timeout=config.get_server_graceful_timeout() if timeout is None else timeout)
+    if pool is None or connection_pool_pid != os.getpid():
+        return False
+    timeout = config.get_server_graceful_timeout() if timeout is None else timeout
+    logger.info("Draining connection pool (%s connections)", pool.get_stats().get('pool_size', 0))
+    pool.close(timeout=timeout)
+    return True
+
+def retire_stale_pools(replica=False):
+    """Drop the primary (or read-replica) pool if its token is stale, so the next
+    get_connection_pool()/get_read_pool() call opens a fresh one.
+
+    Swapped out under connection_pool_lock like the pool getters do, so only one thread closes
+    it; a pool inherited through fork is dropped without closing, since its sockets belong to
+    the parent. The close itself runs outside the lock.
+    """
+    global connection_pool, read_pool
+    with connection_pool_lock:
+        if replica:
+            if read_pool is None or not is_pool_token_stale(read_pool_token):
+                return
+            pool, owned, read_pool = read_pool, read_pool_pid == os.getpid(), None
+        else:
+            if connection_pool is None or not is_pool_token_stale(connection_pool_token):
+                return
+            pool, owned, connection_pool = connection_pool, connection_pool_pid == os.getpid(), None
+    if owned:
+        pool.close()
+
 def get_connection():
     """Get a connection from the pool."""
-    global connection_pool
-    
-    # Recreate pool if token expired
-    if postgres_password is None or time.time() - last_password_refresh > 900:
-        if connection_pool:
-            connection_pool.close()
-            connection_pool = None
-    
+    # Recreate pool if token expired (or was refreshed for another pool)
+    retire_stale_pools()
     return get_connection_pool().connection()
 
+def reads_need_primary():
+    """Whether reads in this request must go to the primary: during a write request, and for
+    a session that wrote within the read-your-writes window (the replica may still lag)."""
+    if not has_request_context():
+        return False
+    if request.method not in READ_ONLY_METHODS:
+        return True
+    return session.get('read_primary_until', 0) > time.time()
+
+def get_read_connection():
+    """Get a connection for a read-only helper: from the read replica when one is configured,
+    otherwise (or when this session must read its own writes) from the primary."""
+    if not config.get_read_replica_host() or reads_need_primary():
+        return get_connection()
+    
+    retire_stale_pools(replica=True)
+    return get_read_pool().connection()
+
 def get_schema_name():
     return os.getenv("POSTGRES_SCHEMA", "inventory_app")
 
@@ -88,14 +329,14 @@ def get_supplier_table_name():
 def get_demand_table_name():
     return os.getenv("POSTGRES_DEMAND_TABLE", "inventory_demand_forecast")
 
-def generate_oms_order_confirmation(sku_code, item_name, quantity, unit_price, warehouse_name, supplier_name):
-    """Generate realistic OMS order confirmation details."""
+def generate_order_identifiers(order_date=None):
+    """Generate an OMS order ID, tracking number and estimated arrival for a new order."""
     import random
-    from datetime import timedelta
     
-    # Generate realistic order ID (format: ORD-YYYYMMDD-XXXXX)
-    order_date = datetime.now()
-    order_id = f"ORD-{order_date.strftime('%Y%m%d')}-{random.randint(10000, 99999)}"
+    # Order ID (format: ORD-YYYYMMDD-XXXXXXXXXXXX); the random part is 48 bits from a UUID, so
+    # ids stay unique across every batch of the day without checking the orders table
+    order_date = order_date or datetime.now()
+    order_id = f"ORD-{order_date.strftime('%Y%m%d')}-{uuid.uuid4().hex[:12].upper()}"
     
     # Generate tracking number
     tracking_number = f"TRK-{random.randint(1000000000, 9999999999)}"
@@ -104,16 +345,32 @@ def generate_oms_order_confirmation(sku_code, item_name, quantity, unit_price, w
     eta_days = random.randint(3, 7)
     eta_date = order_date + timedelta(days=eta_days)
     
+    return {
+        'order_id': order_id,
+        'tracking_number': tracking_number,
+        'order_date': order_date,
+        'eta_date': eta_date,
+        'eta_days': eta_days
+    }
+
+def get_shipping_method(total_value):
+    """Pick the shipping method for an order based on its value."""
+    return 'Standard Ground' if total_value < 1000 else 'Priority Shipping'
+
+def generate_oms_order_confirmation(sku_code, item_name, quantity, unit_price, warehouse_name, supplier_name):
+    """Generate realistic OMS order confirmation details."""
+    identifiers = generate_order_identifiers()
+    
     # Calculate total value
     total_value = quantity * unit_price
     
     # Generate confirmation details
     confirmation = {
-        'order_id': order_id,
-        'tracking_number': tracking_number,
-        'order_date': order_date.strftime('%B %d, %Y at %I:%M %p'),
-        'eta_date': eta_date.strftime('%B %d, %Y'),
-        'eta_days': eta_days,
+        'order_id': identifiers['order_id'],
+        'tracking_number': identifiers['tracking_number'],
+        'order_date': identifiers['order_date'].strftime('%B %d, %Y at %I:%M %p'),
+        'eta_date': identifiers['eta_date'].strftime('%B %d, %Y'),
+        'eta_days': identifiers['eta_days'],
         'sku_code': sku_code,
         'item_name': item_name,
         'quantity': quantity,
@@ -123,7 +380,7 @@ def generate_oms_order_confirmation(sku_code, item_name, quantity, unit_price, w
         'supplier': supplier_name or 'Direct Order',
         'status': 'CONFIRMED',
         'payment_method': 'Net 30 Terms',
-        'shipping_method': 'Standard Ground' if total_value < 1000 else 'Priority Shipping'
+        'shipping_method': get_shipping_method(total_value)
     }
     
     return confirmation
@@ -131,6 +388,39 @@ def generate_oms_order_confirmation(sku_code, item_name, quantity, unit_price, w
 def get_sku_table_name():
     return os.getenv("POSTGRES_SKU_TABLE", "inventory_sku")
 
+def get_movement_table_name():
+    return os.getenv("POSTGRES_MOVEMENT_TABLE", "inventory_stock_movement")
+
+def get_snapshot_table_name():
+    return os.getenv("POSTGRES_SNAPSHOT_TABLE", "inventory_stock_snapshot")
+
+def get_reservation_table_name():
+    return os.getenv("POSTGRES_RESERVATION_TABLE", "inventory_reservation")
+
+def get_allocation_bucket_table_name():
+    return os.getenv("POSTGRES_ALLOCATION_BUCKET_TABLE", "inventory_allocation_bucket")
+
+def get_available_to_promise_view_name():
+    return os.getenv("POSTGRES_ATP_VIEW", "inventory_available_to_promise")
+
+def get_purchase_order_table_name():
+    return os.getenv("POSTGRES_PURCHASE_ORDER_TABLE", "inventory_purchase_order")
+
+def get_purchase_order_line_table_name():
+    return os.getenv("POSTGRES_PURCHASE_ORDER_LINE_TABLE", "inventory_purchase_order_line")
+
+def get_reservation_stripes():
+    return int(os.getenv("RESERVATION_STRIPES", "8"))
+
+def get_reservation_ttl_seconds():
+    return int(os.getenv("RESERVATION_TTL_SECONDS", "900"))
+
+# Width of inventory_items.location (varchar(100)); compaction leaves pairs whose merged locations don't fit
+INVENTORY_LOCATION_MAX_LENGTH = 100
+
+# Movement types recorded in the stock ledger (enforced by a CHECK on the movement table)
+STOCK_MOVEMENT_TYPES = ('RECEIPT', 'PICK', 'TRANSFER_IN', 'TRANSFER_OUT', 'ADJUSTMENT')
+
 def execute_sql_script(script_path):
     """Execute a SQL script file with comprehensive error handling."""
     script_full_path = None
@@ -138,116 +428,82 @@ def execute_sql_script(script_path):
     
     try:
         script_full_path = os.path.join(os.path.dirname(__file__), 'data', script_path)
-        print(f"🔍 Looking for SQL script: {script_full_path}")
+        logger.debug("Looking for SQL script: %s", script_full_path)
         
         if not os.path.exists(script_full_path):
-            print(f"❌ SQL script not found: {script_full_path}")
+            logger.error("SQL script not found: %s", script_full_path)
             return False
         
-        print(f"✅ Found SQL script: {script_path}")
-        
         # Read and process the SQL file
         with open(script_full_path, 'r', encoding='utf-8') as f:
             sql_content = f.read()
-            print(f"📖 Read {len(sql_content)} characters from {script_path}")
             
             # Remove comment lines but keep the SQL structure
             lines = sql_content.split('\n')
             cleaned_lines = []
-            for i, line in enumerate(lines, 1):
+            comment_lines = 0
+            for line in lines:
                 line = line.strip()
                 # Skip comment lines and empty lines
                 if line and not line.startswith('--'):
                     cleaned_lines.append(line)
                 elif line.startswith('--'):
-                    print(f"📝 Skipping comment on line {i}: {line[:50]}...")
+                    comment_lines += 1
             
             # Join lines back together
             sql_text = '\n'.join(cleaned_lines)
-            print(f"🧹 Cleaned SQL: {len(sql_text)} characters after removing comments")
+            logger.debug("Read %s characters from %s, %s after removing %s comment lines",
+                         len(sql_content), script_path, len(sql_text), comment_lines)
             
             if not sql_text.strip():
-                print(f"⚠️  No SQL content found in {script_path} after cleaning")
+                logger.warning("No SQL content found in %s after cleaning", script_path)
                 return False
         
-        # Execute the SQL with detailed error handling
-        print(f"🔄 Executing SQL script: {script_path}")
-        
         # Debug mode: show SQL content if enabled
         debug_sql = os.getenv("DEBUG_SQL", "false").lower() in ("true", "1", "yes")
         if debug_sql:
-            print(f"🔍 DEBUG - SQL content preview:")
-            print(f"📝 {sql_text[:500]}...")
-            if len(sql_text) > 500:
-                print(f"📝 ... (truncated, total length: {len(sql_text)} characters)")
+            logger.info("SQL content preview of %s (%s characters): %s", script_path, len(sql_text), sql_text[:500])
         
         with get_connection() as conn:
             with conn.cursor() as cur:
                 try:
-                    # Execute the SQL
-                    print(f"🚀 Starting SQL execution...")
+                    logger.debug("Executing SQL script: %s", script_path)
                     cur.execute(sql_text)
-                    
-                    # Get execution result info
-                    if hasattr(cur, 'rowcount'):
-                        rows_affected = cur.rowcount
-                        print(f"📊 Rows affected: {rows_affected}")
+                    rows_affected = cur.rowcount
                     
                     # Commit the transaction
                     conn.commit()
-                    print(f"✅ Transaction committed successfully")
-                    
-                    print(f"✅ SQL script {script_path} executed successfully")
+                    logger.debug("SQL script %s executed successfully, %s rows affected", script_path, rows_affected)
                     return True
                     
                 except Exception as sql_error:
-                    print(f"❌ SQL execution error in {script_path}:")
-                    print(f"   Error type: {type(sql_error).__name__}")
-                    print(f"   Error message: {str(sql_error)}")
-                    
-                    # Try to get more detailed error info
-                    if hasattr(sql_error, 'pgcode'):
-                        print(f"   PostgreSQL error code: {sql_error.pgcode}")
-                    if hasattr(sql_error, 'pgerror'):
-                        print(f"   PostgreSQL error details: {sql_error.pgerror}")
+                    logger.error("SQL execution error in %s: %s: %s", script_path, type(sql_error).__name__, sql_error,
+                                 extra={'pgcode': getattr(sql_error, 'pgcode', None),
+                                        'sql_preview': sql_text[:300]})
                     
                     # Rollback the transaction
                     try:
                         conn.rollback()
-                        print(f"🔄 Transaction rolled back")
                     except Exception as rollback_error:
-                        print(f"⚠️  Error during rollback: {rollback_error}")
-                    
-                    # Show problematic SQL section
-                    print(f"📝 Problematic SQL section:")
-                    print(f"📝 {sql_text[:300]}...")
-                    if len(sql_text) > 300:
-                        print(f"📝 ... (showing first 300 characters)")
+                        logger.warning("Error during rollback: %s", rollback_error)
                     
                     return False
                     
     except FileNotFoundError as e:
-        print(f"❌ File not found error: {e}")
-        print(f"   Expected path: {script_full_path}")
+        logger.error("File not found error: %s (expected path: %s)", e, script_full_path)
         return False
         
     except PermissionError as e:
-        print(f"❌ Permission error reading {script_path}: {e}")
+        logger.error("Permission error reading %s: %s", script_path, e)
         return False
         
     except UnicodeDecodeError as e:
-        print(f"❌ Encoding error reading {script_path}: {e}")
-        print(f"   File might not be UTF-8 encoded")
+        logger.error("Encoding error reading %s, file might not be UTF-8 encoded: %s", script_path, e)
         return False
         
     except Exception as e:
-        print(f"❌ Unexpected error executing {script_path}: {e}")
-        print(f"   Error type: {type(e).__name__}")
-        print(f"   Script path: {script_full_path}")
-        if sql_text:
-            print(f"   SQL content length: {len(sql_text)} characters")
-        import traceback
-        traceback.print_exc()
+        logger.error("Unexpected error executing %s: %s", script_path, e, exc_info=True,
+                     extra={'script_path': script_full_path, 'sql_length': len(sql_text)})
         return False
 
 def load_sample_data():
@@ -453,6 +709,7 @@ def check_tables_need_data():
         print(f"❌ Error checking table data: {e}")
         return True, ["unknown"]  # Assume need data if we can't check
 
+@timed_query
 def reset_all_data():
     """Reset all data in inventory tables and reset identity sequences."""
     try:
@@ -465,7 +722,29 @@ def reset_all_data():
         demand_table_name = get_demand_table_name()
         
         print("🔄 Starting complete data reset...")
-        
+
+        # Step 0: Clear purchase orders, reservations and the stock ledger (they reference SKUs). These
+        # tables are created after the first reset on a fresh deployment, so skip them if they don't exist yet.
+        for table in (get_purchase_order_table_name(), get_purchase_order_line_table_name(),
+                      get_reservation_table_name(), get_allocation_bucket_table_name(),
+                      get_snapshot_table_name(), get_movement_table_name()):
+            try:
+                with get_connection() as conn:
+                    with conn.cursor() as cur:
+                        cur.execute("SELECT to_regclass(%s)", (f"{schema_name}.{table}",))
+                        if cur.fetchone()[0] is None:
+                            continue
+                        print(f"🗑️  Clearing data from {table}...")
+                        cur.execute(sql.SQL("TRUNCATE {}.{} RESTART IDENTITY CASCADE").format(
+                            sql.Identifier(schema_name),
+                            sql.Identifier(table)
+                        ))
+                        conn.commit()
+                        print(f"✅ Cleared {table}")
+            except Exception as e:
+                print(f"❌ Could not clear {table}: {e}")
+                return False
+
         # Step 1: Clear all data in correct order (respecting foreign key constraints)
         # Delete child tables first, then parent tables
         tables_to_clear = [
@@ -534,6 +813,7 @@ def reset_all_data():
         print("📊 Loading sample data after reset...")
         if load_sample_data():
             print("✅ Sample data loaded successfully")
+            backfill_stock_movements()
             return True
         else:
             print("⚠️  Some sample data failed to load")
@@ -728,7 +1008,248 @@ def init_database():
                 
                 cur.execute(create_table_sql)
                 print(f"✅ Table '{schema_name}.{table_name}' ready")
-                
+
+                # Index the (sku, warehouse) grouping used by the inventory views and compaction
+                cur.execute(sql.SQL("""
+                    CREATE INDEX IF NOT EXISTS {} ON {}.{} (sku_id, warehouse_id)
+                """).format(
+                    sql.Identifier(f"{table_name}_sku_warehouse_idx"),
+                    sql.Identifier(schema_name),
+                    sql.Identifier(table_name)
+                ))
+
+                # Create stock movement ledger (append-only audit of every stock change)
+                movement_table_name = get_movement_table_name()
+                snapshot_table_name = get_snapshot_table_name()
+                print(f"🔧 Creating table '{schema_name}.{movement_table_name}' if it doesn't exist...")
+                cur.execute(sql.SQL("""
+                    CREATE TABLE IF NOT EXISTS {}.{} (
+                        movement_id bigserial NOT NULL,
+                        sku_id int4 NOT NULL,
+                        warehouse_id int4 NULL,
+                        movement_type varchar(20) NOT NULL,
+                        quantity int4 NOT NULL,
+                        reference varchar(100) NULL,
+                        date_created timestamp DEFAULT CURRENT_TIMESTAMP,
+                        PRIMARY KEY (movement_id),
+                        CHECK (movement_type IN ({})),
+                        FOREIGN KEY (sku_id) REFERENCES {}.{}(sku_id) ON DELETE RESTRICT
+                    );
+                """).format(
+                    sql.Identifier(schema_name),
+                    sql.Identifier(movement_table_name),
+                    sql.SQL(', ').join(map(sql.Literal, STOCK_MOVEMENT_TYPES)),
+                    sql.Identifier(schema_name),
+                    sql.Identifier(sku_table_name)
+                ))
+                cur.execute(sql.SQL("""
+                    CREATE INDEX IF NOT EXISTS {} ON {}.{} (sku_id, warehouse_id, movement_id)
+                """).format(
+                    sql.Identifier(f"{movement_table_name}_pair_idx"),
+                    sql.Identifier(schema_name),
+                    sql.Identifier(movement_table_name)
+                ))
+                print(f"✅ Table '{schema_name}.{movement_table_name}' ready")
+
+                # Create per-(sku, warehouse) snapshots that the ledger is compacted into
+                print(f"🔧 Creating table '{schema_name}.{snapshot_table_name}' if it doesn't exist...")
+                cur.execute(sql.SQL("""
+                    CREATE TABLE IF NOT EXISTS {}.{} (
+                        snapshot_id serial4 NOT NULL,
+                        sku_id int4 NOT NULL,
+                        warehouse_id int4 NULL,
+                        quantity int8 NOT NULL DEFAULT 0,
+                        last_movement_id int8 NOT NULL DEFAULT 0,
+                        last_updated timestamp DEFAULT CURRENT_TIMESTAMP,
+                        PRIMARY KEY (snapshot_id),
+                        UNIQUE NULLS NOT DISTINCT (sku_id, warehouse_id),
+                        FOREIGN KEY (sku_id) REFERENCES {}.{}(sku_id) ON DELETE RESTRICT
+                    );
+                """).format(
+                    sql.Identifier(schema_name),
+                    sql.Identifier(snapshot_table_name),
+                    sql.Identifier(schema_name),
+                    sql.Identifier(sku_table_name)
+                ))
+                print(f"✅ Table '{schema_name}.{snapshot_table_name}' ready")
+
+                # Create stock reservations and the allocation buckets they are claimed from
+                reservation_table_name = get_reservation_table_name()
+                bucket_table_name = get_allocation_bucket_table_name()
+                print(f"🔧 Creating table '{schema_name}.{bucket_table_name}' if it doesn't exist...")
+                cur.execute(sql.SQL("""
+                    CREATE TABLE IF NOT EXISTS {}.{} (
+                        bucket_id serial4 NOT NULL,
+                        sku_id int4 NOT NULL,
+                        warehouse_id int4 NOT NULL,
+                        available int4 NOT NULL,
+                        built_at_movement_id int8 NOT NULL DEFAULT 0,
+                        last_updated timestamp DEFAULT CURRENT_TIMESTAMP,
+                        PRIMARY KEY (bucket_id),
+                        FOREIGN KEY (sku_id) REFERENCES {}.{}(sku_id) ON DELETE CASCADE
+                    );
+                """).format(
+                    sql.Identifier(schema_name),
+                    sql.Identifier(bucket_table_name),
+                    sql.Identifier(schema_name),
+                    sql.Identifier(sku_table_name)
+                ))
+                cur.execute(sql.SQL("""
+                    CREATE INDEX IF NOT EXISTS {} ON {}.{} (sku_id, warehouse_id)
+                """).format(
+                    sql.Identifier(f"{bucket_table_name}_pair_idx"),
+                    sql.Identifier(schema_name),
+                    sql.Identifier(bucket_table_name)
+                ))
+                print(f"✅ Table '{schema_name}.{bucket_table_name}' ready")
+
+                print(f"🔧 Creating table '{schema_name}.{reservation_table_name}' if it doesn't exist...")
+                cur.execute(sql.SQL("""
+                    CREATE TABLE IF NOT EXISTS {}.{} (
+                        reservation_id bigserial NOT NULL,
+                        sku_id int4 NOT NULL,
+                        warehouse_id int4 NOT NULL,
+                        bucket_id int4 NULL,
+                        quantity int4 NOT NULL CHECK (quantity > 0),
+                        order_reference varchar(100) NULL,
+                        status varchar(20) NOT NULL DEFAULT 'HELD',
+                        expires_at timestamp NOT NULL,
+                        date_created timestamp DEFAULT CURRENT_TIMESTAMP,
+                        last_updated timestamp DEFAULT CURRENT_TIMESTAMP,
+                        PRIMARY KEY (reservation_id),
+                        CHECK (status IN ('HELD', 'FULFILLED', 'RELEASED', 'EXPIRED')),
+                        FOREIGN KEY (sku_id) REFERENCES {}.{}(sku_id) ON DELETE RESTRICT
+                    );
+                """).format(
+                    sql.Identifier(schema_name),
+                    sql.Identifier(reservation_table_name),
+                    sql.Identifier(schema_name),
+                    sql.Identifier(sku_table_name)
+                ))
+                cur.execute(sql.SQL("""
+                    CREATE INDEX IF NOT EXISTS {} ON {}.{} (sku_id, warehouse_id) WHERE status = 'HELD'
+                """).format(
+                    sql.Identifier(f"{reservation_table_name}_held_pair_idx"),
+                    sql.Identifier(schema_name),
+                    sql.Identifier(reservation_table_name)
+                ))
+                cur.execute(sql.SQL("""
+                    CREATE INDEX IF NOT EXISTS {} ON {}.{} (expires_at) WHERE status = 'HELD'
+                """).format(
+                    sql.Identifier(f"{reservation_table_name}_held_expiry_idx"),
+                    sql.Identifier(schema_name),
+                    sql.Identifier(reservation_table_name)
+                ))
+                print(f"✅ Table '{schema_name}.{reservation_table_name}' ready")
+
+                # Available-to-promise: ledger on-hand stock net of unexpired held reservations
+                atp_view_name = get_available_to_promise_view_name()
+                cur.execute(sql.SQL("""
+                    CREATE OR REPLACE VIEW {}.{} AS
+                    WITH pairs AS (
+                        SELECT DISTINCT sku_id, warehouse_id
+                        FROM {}.{}
+                        WHERE warehouse_id IS NOT NULL
+                    ),
+                    {}
+                    SELECT sku_id, warehouse_id, on_hand, reserved, available_to_promise
+                    FROM pair_available
+                """).format(
+                    sql.Identifier(schema_name), sql.Identifier(atp_view_name),
+                    sql.Identifier(schema_name), sql.Identifier(table_name),
+                    available_to_promise_cte('pairs')
+                ))
+                print(f"✅ View '{schema_name}.{atp_view_name}' ready")
+
+                # Create purchase orders generated by replenishment runs
+                purchase_order_table_name = get_purchase_order_table_name()
+                purchase_order_line_table_name = get_purchase_order_line_table_name()
+                print(f"🔧 Creating table '{schema_name}.{purchase_order_table_name}' if it doesn't exist...")
+                cur.execute(sql.SQL("""
+                    CREATE TABLE IF NOT EXISTS {}.{} (
+                        po_id bigserial NOT NULL,
+                        order_id varchar(30) NOT NULL,
+                        batch_id varchar(40) NOT NULL,
+                        supplier_id int4 NULL,
+                        supplier_name varchar(100) NULL,
+                        tracking_number varchar(30) NOT NULL,
+                        status varchar(20) NOT NULL DEFAULT 'CONFIRMED',
+                        payment_method varchar(50) NULL,
+                        shipping_method varchar(50) NULL,
+                        order_date timestamp NOT NULL,
+                        eta_date date NOT NULL,
+                        line_count int4 NOT NULL,
+                        total_value float8 NOT NULL,
+                        PRIMARY KEY (po_id),
+                        UNIQUE (order_id)
+                    );
+                """).format(
+                    sql.Identifier(schema_name),
+                    sql.Identifier(purchase_order_table_name)
+                ))
+                cur.execute(sql.SQL("""
+                    CREATE INDEX IF NOT EXISTS {} ON {}.{} (batch_id)
+                """).format(
+                    sql.Identifier(f"{purchase_order_table_name}_batch_idx"),
+                    sql.Identifier(schema_name),
+                    sql.Identifier(purchase_order_table_name)
+                ))
+                print(f"✅ Table '{schema_name}.{purchase_order_table_name}' ready")
+
+                print(f"🔧 Creating table '{schema_name}.{purchase_order_line_table_name}' if it doesn't exist...")
+                cur.execute(sql.SQL("""
+                    CREATE TABLE IF NOT EXISTS {}.{} (
+                        line_id bigserial NOT NULL,
+                        order_id varchar(30) NOT NULL,
+                        sku_id int4 NOT NULL,
+                        sku_code varchar(100) NULL,
+                        item_name varchar(100) NULL,
+                        warehouse_id int4 NOT NULL,
+                        warehouse_name varchar(100) NULL,
+                        on_hand int4 NOT NULL,
+                        minimum_stock int4 NOT NULL,
+                        quantity int4 NOT NULL CHECK (quantity > 0),
+                        unit_price float8 NOT NULL,
+                        line_value float8 NOT NULL,
+                        PRIMARY KEY (line_id),
+                        FOREIGN KEY (order_id) REFERENCES {}.{}(order_id) ON DELETE CASCADE
+                    );
+                """).format(
+                    sql.Identifier(schema_name),
+                    sql.Identifier(purchase_order_line_table_name),
+                    sql.Identifier(schema_name),
+                    sql.Identifier(purchase_order_table_name)
+                ))
+                cur.execute(sql.SQL("""
+                    CREATE INDEX IF NOT EXISTS {} ON {}.{} (order_id)
+                """).format(
+                    sql.Identifier(f"{purchase_order_line_table_name}_order_idx"),
+                    sql.Identifier(schema_name),
+                    sql.Identifier(purchase_order_line_table_name)
+                ))
+                print(f"✅ Table '{schema_name}.{purchase_order_line_table_name}' ready")
+
+                # Create precomputed demand forecasts (kept across data resets)
+                print(f"🔧 Creating table '{schema_name}.{demand_table_name}' if it doesn't exist...")
+                cur.execute(sql.SQL("""
+                    CREATE TABLE IF NOT EXISTS {}.{} (
+                        forecast_id bigserial NOT NULL,
+                        warehouse_id int4 NOT NULL,
+                        category_id int4 NOT NULL,
+                        sku_id int4 NOT NULL,
+                        forecast_month int2 NOT NULL CHECK (forecast_month BETWEEN 1 AND 12),
+                        predicted_demand float8 NOT NULL,
+                        batch_id varchar(40) NOT NULL,
+                        date_generated timestamp DEFAULT CURRENT_TIMESTAMP,
+                        PRIMARY KEY (forecast_id),
+                        UNIQUE (warehouse_id, category_id, sku_id, forecast_month)
+                    );
+                """).format(
+                    sql.Identifier(schema_name),
+                    sql.Identifier(demand_table_name)
+                ))
+                print(f"✅ Table '{schema_name}.{demand_table_name}' ready")
+
                 # # Insert default categories if they don't exist
                 # print("🔧 Inserting default categories...")
                 # default_categories = [
@@ -790,7 +1311,10 @@ def init_database():
                             print("✅ Sample data loaded successfully")
                         else:
                             print("⚠️  Some sample data failed to load")
-                
+
+                # Seed the ledger with opening balances for pre-existing inventory
+                backfill_stock_movements()
+
                 return True
                 
     except Exception as e:
@@ -798,26 +1322,40 @@ def init_database():
         return False
 
 # Category management functions
+def categories_query():
+    """Query for all categories (shared by the sync and async helpers)."""
+    return sql.SQL("""
+        SELECT category_id, category_name, description, date_created, last_updated 
+        FROM {}.{} ORDER BY category_name ASC
+    """).format(sql.Identifier(get_schema_name()), sql.Identifier(get_category_table_name()))
+
+def category_insert_query():
+    """Insert statement for a category; parameters are category_row_params()."""
+    return sql.SQL("""
+        INSERT INTO {}.{} (category_name, description, date_created, last_updated) 
+        VALUES (%s, %s, %s, %s)
+    """).format(sql.Identifier(get_schema_name()), sql.Identifier(get_category_table_name()))
+
+def category_row_params(category_name, description=None):
+    return (category_name, description, datetime.now(), datetime.now())
+
+@timed_query
 def get_categories():
     """Get all categories."""
     try:
-        with get_connection() as conn:
+        with get_read_connection() as conn:
             with conn.cursor() as cur:
-                schema = get_schema_name()
-                category_table = get_category_table_name()
-                cur.execute(sql.SQL("""
-                    SELECT category_id, category_name, description, date_created, last_updated 
-                    FROM {}.{} ORDER BY category_name ASC
-                """).format(sql.Identifier(schema), sql.Identifier(category_table)))
+                cur.execute(categories_query())
                 return cur.fetchall()
     except Exception as e:
-        print(f"Get categories error: {e}")
+        logger.error("Get categories error: %s", e)
         return []
 
+@timed_query
 def get_category(category_id):
     """Get a specific category by ID."""
     try:
-        with get_connection() as conn:
+        with get_read_connection() as conn:
             with conn.cursor() as cur:
                 schema = get_schema_name()
                 category_table = get_category_table_name()
@@ -827,27 +1365,23 @@ def get_category(category_id):
                 """).format(sql.Identifier(schema), sql.Identifier(category_table)), (category_id,))
                 return cur.fetchone()
     except Exception as e:
-        print(f"Get category error: {e}")
+        logger.error("Get category error: %s", e)
         return None
 
+@timed_query
 def add_category(category_name, description=None):
     """Add a new category."""
     try:
         with get_connection() as conn:
             with conn.cursor() as cur:
-                schema = get_schema_name()
-                category_table = get_category_table_name()
-                cur.execute(sql.SQL("""
-                    INSERT INTO {}.{} (category_name, description, date_created, last_updated) 
-                    VALUES (%s, %s, %s, %s)
-                """).format(sql.Identifier(schema), sql.Identifier(category_table)), 
-                (category_name, description, datetime.now(), datetime.now()))
+                cur.execute(category_insert_query(), category_row_params(category_name, description))
                 conn.commit()
                 return True
     except Exception as e:
-        print(f"Add category error: {e}")
+        logger.error("Add category error: %s", e)
         return False
 
+@timed_query
 def update_category(category_id, category_name, description=None):
     """Update an existing category."""
     try:
@@ -864,9 +1398,10 @@ def update_category(category_id, category_name, description=None):
                 conn.commit()
                 return True
     except Exception as e:
-        print(f"Update category error: {e}")
+        logger.error("Update category error: %s", e)
         return False
 
+@timed_query
 def delete_category(category_id):
     """Delete a category if no items are using it."""
     try:
@@ -886,7 +1421,7 @@ def delete_category(category_id):
                 item_count = cur.fetchone()[0]
                 
                 if item_count > 0:
-                    print(f"Cannot delete category {category_id}: {item_count} items are using this category")
+                    logger.info("Cannot delete category %s: %s items are using this category", category_id, item_count)
                     return False, f"Cannot delete category. {item_count} items are currently using this category. Please reassign or delete those items first."
                 
                 # If no items are using this category, proceed with deletion
@@ -895,31 +1430,48 @@ def delete_category(category_id):
                 return True, "Category deleted successfully!"
                 
     except Exception as e:
-        print(f"Delete category error: {e}")
+        logger.error("Delete category error: %s", e)
         return False, f"Error deleting category: {str(e)}"
 
 # Warehouse management functions
+def warehouses_query():
+    """Query for all warehouses (shared by the sync and async helpers)."""
+    return sql.SQL("""
+        SELECT warehouse_id, warehouse_name, address, city, state, country, county, zipcode, 
+               latitude, longitude, contact_person, phone, email, date_created, last_updated 
+        FROM {}.{} ORDER BY warehouse_name ASC
+    """).format(sql.Identifier(get_schema_name()), sql.Identifier(get_warehouse_table_name()))
+
+def warehouse_insert_query():
+    """Insert statement for a warehouse; parameters are warehouse_row_params()."""
+    return sql.SQL("""
+        INSERT INTO {}.{} (warehouse_name, address, city, state, country, county, zipcode, 
+                         latitude, longitude, contact_person, phone, email, date_created, last_updated) 
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """).format(sql.Identifier(get_schema_name()), sql.Identifier(get_warehouse_table_name()))
+
+def warehouse_row_params(warehouse_name, address=None, city=None, state=None, country=None, county=None, 
+                         zipcode=None, latitude=None, longitude=None, contact_person=None, phone=None, email=None):
+    return (warehouse_name, address, city, state, country, county, zipcode, 
+            latitude, longitude, contact_person, phone, email, datetime.now(), datetime.now())
+
+@timed_query
 def get_warehouses():
     """Get all warehouses."""
     try:
-        with get_connection() as conn:
+        with get_read_connection() as conn:
             with conn.cursor() as cur:
-                schema = get_schema_name()
-                warehouse_table = get_warehouse_table_name()
-                cur.execute(sql.SQL("""
-                    SELECT warehouse_id, warehouse_name, address, city, state, country, county, zipcode, 
-                           latitude, longitude, contact_person, phone, email, date_created, last_updated 
-                    FROM {}.{} ORDER BY warehouse_name ASC
-                """).format(sql.Identifier(schema), sql.Identifier(warehouse_table)))
+                cur.execute(warehouses_query())
                 return cur.fetchall()
     except Exception as e:
-        print(f"Get warehouses error: {e}")
+        logger.error("Get warehouses error: %s", e)
         return []
 
+@timed_query
 def get_warehouse(warehouse_id):
     """Get a specific warehouse by ID."""
     try:
-        with get_connection() as conn:
+        with get_read_connection() as conn:
             with conn.cursor() as cur:
                 schema = get_schema_name()
                 warehouse_table = get_warehouse_table_name()
@@ -930,30 +1482,26 @@ def get_warehouse(warehouse_id):
                 """).format(sql.Identifier(schema), sql.Identifier(warehouse_table)), (warehouse_id,))
                 return cur.fetchone()
     except Exception as e:
-        print(f"Get warehouse error: {e}")
+        logger.error("Get warehouse error: %s", e)
         return None
 
+@timed_query
 def add_warehouse(warehouse_name, address=None, city=None, state=None, country=None, county=None, 
                  zipcode=None, latitude=None, longitude=None, contact_person=None, phone=None, email=None):
     """Add a new warehouse."""
     try:
         with get_connection() as conn:
             with conn.cursor() as cur:
-                schema = get_schema_name()
-                warehouse_table = get_warehouse_table_name()
-                cur.execute(sql.SQL("""
-                    INSERT INTO {}.{} (warehouse_name, address, city, state, country, county, zipcode, 
-                                     latitude, longitude, contact_person, phone, email, date_created, last_updated) 
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """).format(sql.Identifier(schema), sql.Identifier(warehouse_table)), 
-                (warehouse_name, address, city, state, country, county, zipcode, 
-                 latitude, longitude, contact_person, phone, email, datetime.now(), datetime.now()))
+                cur.execute(warehouse_insert_query(), warehouse_row_params(
+                    warehouse_name, address, city, state, country, county, zipcode,
+                    latitude, longitude, contact_person, phone, email))
                 conn.commit()
                 return True
     except Exception as e:
-        print(f"Add warehouse error: {e}")
+        logger.error("Add warehouse error: %s", e)
         return False
 
+@timed_query
 def update_warehouse(warehouse_id, warehouse_name, address=None, city=None, state=None, country=None, county=None, 
                     zipcode=None, latitude=None, longitude=None, contact_person=None, phone=None, email=None):
     """Update an existing warehouse."""
@@ -974,9 +1522,10 @@ def update_warehouse(warehouse_id, warehouse_name, address=None, city=None, stat
                 conn.commit()
                 return True
     except Exception as e:
-        print(f"Update warehouse error: {e}")
+        logger.error("Update warehouse error: %s", e)
         return False
 
+@timed_query
 def delete_warehouse(warehouse_id):
     """Delete a warehouse."""
     try:
@@ -988,31 +1537,49 @@ def delete_warehouse(warehouse_id):
                 conn.commit()
                 return True
     except Exception as e:
-        print(f"Delete warehouse error: {e}")
+        logger.error("Delete warehouse error: %s", e)
         return False
 
 # Supplier management functions
+def suppliers_query():
+    """Query for all suppliers (shared by the sync and async helpers)."""
+    return sql.SQL("""
+        SELECT supplier_id, supplier_name, contact_person, email, phone, address, city, state, country, 
+               county, zipcode, latitude, longitude, website, tax_id, payment_terms, date_created, last_updated 
+        FROM {}.{} ORDER BY supplier_name ASC
+    """).format(sql.Identifier(get_schema_name()), sql.Identifier(get_supplier_table_name()))
+
+def supplier_insert_query():
+    """Insert statement for a supplier; parameters are supplier_row_params()."""
+    return sql.SQL("""
+        INSERT INTO {}.{} (supplier_name, contact_person, email, phone, address, city, state, country, 
+                         county, zipcode, latitude, longitude, website, tax_id, payment_terms, date_created, last_updated) 
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """).format(sql.Identifier(get_schema_name()), sql.Identifier(get_supplier_table_name()))
+
+def supplier_row_params(supplier_name, contact_person=None, email=None, phone=None, address=None, city=None, state=None, 
+                        country=None, county=None, zipcode=None, latitude=None, longitude=None, website=None, 
+                        tax_id=None, payment_terms=None):
+    return (supplier_name, contact_person, email, phone, address, city, state, country, county, zipcode, 
+            latitude, longitude, website, tax_id, payment_terms, datetime.now(), datetime.now())
+
+@timed_query
 def get_suppliers():
     """Get all suppliers."""
     try:
-        with get_connection() as conn:
+        with get_read_connection() as conn:
             with conn.cursor() as cur:
-                schema = get_schema_name()
-                supplier_table = get_supplier_table_name()
-                cur.execute(sql.SQL("""
-                    SELECT supplier_id, supplier_name, contact_person, email, phone, address, city, state, country, 
-                           county, zipcode, latitude, longitude, website, tax_id, payment_terms, date_created, last_updated 
-                    FROM {}.{} ORDER BY supplier_name ASC
-                """).format(sql.Identifier(schema), sql.Identifier(supplier_table)))
+                cur.execute(suppliers_query())
                 return cur.fetchall()
     except Exception as e:
-        print(f"Get suppliers error: {e}")
+        logger.error("Get suppliers error: %s", e)
         return []
 
+@timed_query
 def get_supplier(supplier_id):
     """Get a specific supplier by ID."""
     try:
-        with get_connection() as conn:
+        with get_read_connection() as conn:
             with conn.cursor() as cur:
                 schema = get_schema_name()
                 supplier_table = get_supplier_table_name()
@@ -1023,9 +1590,10 @@ def get_supplier(supplier_id):
                 """).format(sql.Identifier(schema), sql.Identifier(supplier_table)), (supplier_id,))
                 return cur.fetchone()
     except Exception as e:
-        print(f"Get supplier error: {e}")
+        logger.error("Get supplier error: %s", e)
         return None
 
+@timed_query
 def add_supplier(supplier_name, contact_person=None, email=None, phone=None, address=None, city=None, state=None, 
                 country=None, county=None, zipcode=None, latitude=None, longitude=None, website=None, 
                 tax_id=None, payment_terms=None):
@@ -1033,21 +1601,16 @@ def add_supplier(supplier_name, contact_person=None, email=None, phone=None, add
     try:
         with get_connection() as conn:
             with conn.cursor() as cur:
-                schema = get_schema_name()
-                supplier_table = get_supplier_table_name()
-                cur.execute(sql.SQL("""
-                    INSERT INTO {}.{} (supplier_name, contact_person, email, phone, address, city, state, country, 
-                                     county, zipcode, latitude, longitude, website, tax_id, payment_terms, date_created, last_updated) 
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """).format(sql.Identifier(schema), sql.Identifier(supplier_table)), 
-                (supplier_name, contact_person, email, phone, address, city, state, country, county, zipcode, 
-                 latitude, longitude, website, tax_id, payment_terms, datetime.now(), datetime.now()))
+                cur.execute(supplier_insert_query(), supplier_row_params(
+                    supplier_name, contact_person, email, phone, address, city, state, country, county, zipcode,
+                    latitude, longitude, website, tax_id, payment_terms))
                 conn.commit()
                 return True
     except Exception as e:
-        print(f"Add supplier error: {e}")
+        logger.error("Add supplier error: %s", e)
         return False
 
+@timed_query
 def update_supplier(supplier_id, supplier_name, contact_person=None, email=None, phone=None, address=None, city=None, 
                    state=None, country=None, county=None, zipcode=None, latitude=None, longitude=None, website=None, 
                    tax_id=None, payment_terms=None):
@@ -1069,9 +1632,10 @@ def update_supplier(supplier_id, supplier_name, contact_person=None, email=None,
                 conn.commit()
                 return True
     except Exception as e:
-        print(f"Update supplier error: {e}")
+        logger.error("Update supplier error: %s", e)
         return False
 
+@timed_query
 def delete_supplier(supplier_id):
     """Delete a supplier."""
     try:
@@ -1083,36 +1647,59 @@ def delete_supplier(supplier_id):
                 conn.commit()
                 return True
     except Exception as e:
-        print(f"Delete supplier error: {e}")
+        logger.error("Delete supplier error: %s", e)
         return False
 
 # SKU management functions
+def skus_query():
+    """Query for all SKUs with their category (shared by the sync and async helpers)."""
+    schema = get_schema_name()
+    return sql.SQL("""
+        SELECT s.sku_id, s.sku_code, s.item_name, s.category_id, c.category_name, s.description, s.unit_price
+        FROM {}.{} s
+        LEFT JOIN {}.{} c ON s.category_id = c.category_id
+        ORDER BY s.sku_code ASC
+    """).format(
+        sql.Identifier(schema), sql.Identifier(get_sku_table_name()),
+        sql.Identifier(schema), sql.Identifier(get_category_table_name())
+    )
+
+def skus_by_category_query():
+    """Query for the SKUs of one category; the parameter is the category_id."""
+    return sql.SQL("""
+        SELECT sku_id, sku_code, item_name, description, unit_price
+        FROM {}.{}
+        WHERE category_id = %s
+        ORDER BY sku_code ASC
+    """).format(sql.Identifier(get_schema_name()), sql.Identifier(get_sku_table_name()))
+
+def sku_insert_query():
+    """Insert statement for a SKU; parameters are sku_row_params()."""
+    return sql.SQL("""
+        INSERT INTO {}.{} (sku_code, item_name, category_id, unit_price, description, date_created, last_updated)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+    """).format(sql.Identifier(get_schema_name()), sql.Identifier(get_sku_table_name()))
+
+def sku_row_params(sku_code, item_name, category_id, unit_price, description=None):
+    return (sku_code, item_name, category_id, unit_price, description, datetime.now(), datetime.now())
+
+@timed_query
 def get_skus():
     """Get all SKUs with category information."""
     try:
-        with get_connection() as conn:
+        with get_read_connection() as conn:
             with conn.cursor() as cur:
-                schema = get_schema_name()
-                sku_table = get_sku_table_name()
-                category_table = get_category_table_name()
-                cur.execute(sql.SQL("""
-                    SELECT s.sku_id, s.sku_code, s.item_name, s.category_id, c.category_name, s.description, s.unit_price
-                    FROM {}.{} s
-                    LEFT JOIN {}.{} c ON s.category_id = c.category_id
-                    ORDER BY s.sku_code ASC
-                """).format(
-                    sql.Identifier(schema), sql.Identifier(sku_table),
-                    sql.Identifier(schema), sql.Identifier(category_table)
-                ))
+                cur.execute(skus_query())
                 return cur.fetchall()
     except Exception as e:
-        print(f"Get SKUs error: {e}")
+        logger.error("Get SKUs error: %s", e)
         return []
 
+@timed_query
 def get_sku_details(sku_id):
     """Get SKU details by ID."""
     try:
-        with get_connection() as conn:
+        with get_read_connection() as conn:
             with conn.cursor() as cur:
                 schema = get_schema_name()
                 sku_table = get_sku_table_name()
@@ -1128,13 +1715,14 @@ def get_sku_details(sku_id):
                 ), (sku_id,))
                 return cur.fetchone()
     except Exception as e:
-        print(f"Get SKU details error: {e}")
+        logger.error("Get SKU details error: %s", e)
         return None
 
+@timed_query
 def get_warehouse_details(warehouse_id):
     """Get warehouse details by ID."""
     try:
-        with get_connection() as conn:
+        with get_read_connection() as conn:
             with conn.cursor() as cur:
                 schema = get_schema_name()
                 warehouse_table = get_warehouse_table_name()
@@ -1145,13 +1733,14 @@ def get_warehouse_details(warehouse_id):
                 """).format(sql.Identifier(schema), sql.Identifier(warehouse_table)), (warehouse_id,))
                 return cur.fetchone()
     except Exception as e:
-        print(f"Get warehouse details error: {e}")
+        logger.error("Get warehouse details error: %s", e)
         return None
 
+@timed_query
 def get_supplier_details(supplier_id):
     """Get supplier details by ID."""
     try:
-        with get_connection() as conn:
+        with get_read_connection() as conn:
             with conn.cursor() as cur:
                 schema = get_schema_name()
                 supplier_table = get_supplier_table_name()
@@ -1162,31 +1751,49 @@ def get_supplier_details(supplier_id):
                 """).format(sql.Identifier(schema), sql.Identifier(supplier_table)), (supplier_id,))
                 return cur.fetchone()
     except Exception as e:
-        print(f"Get supplier details error: {e}")
+        logger.error("Get supplier details error: %s", e)
         return None
 
-def get_skus_by_category(category_id):
-    """Get all SKUs for a specific category."""
+@timed_query
+def get_order_details(sku_id, warehouse_id=None, supplier_id=None):
+    """Get the SKU code, item name, warehouse name and supplier name for an order in one lookup."""
     try:
-        with get_connection() as conn:
+        with get_read_connection() as conn:
             with conn.cursor() as cur:
                 schema = get_schema_name()
-                sku_table = get_sku_table_name()
                 cur.execute(sql.SQL("""
-                    SELECT sku_id, sku_code, item_name, description, unit_price
-                    FROM {}.{}
-                    WHERE category_id = %s
-                    ORDER BY sku_code ASC
-                """).format(sql.Identifier(schema), sql.Identifier(sku_table)), (category_id,))
+                    SELECT s.sku_code, s.item_name,
+                           (SELECT warehouse_name FROM {}.{} WHERE warehouse_id = %s),
+                           (SELECT supplier_name FROM {}.{} WHERE supplier_id = %s)
+                    FROM {}.{} s
+                    WHERE s.sku_id = %s
+                """).format(
+                    sql.Identifier(schema), sql.Identifier(get_warehouse_table_name()),
+                    sql.Identifier(schema), sql.Identifier(get_supplier_table_name()),
+                    sql.Identifier(schema), sql.Identifier(get_sku_table_name())
+                ), (warehouse_id, supplier_id, sku_id))
+                return cur.fetchone()
+    except Exception as e:
+        logger.error("Get order details error: %s", e)
+        return None
+
+@timed_query
+def get_skus_by_category(category_id):
+    """Get all SKUs for a specific category."""
+    try:
+        with get_read_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(skus_by_category_query(), (category_id,))
                 return cur.fetchall()
     except Exception as e:
-        print(f"Get SKUs by category error: {e}")
+        logger.error("Get SKUs by category error: %s", e)
         return []
 
+@timed_query
 def get_sku(sku_id):
     """Get a specific SKU by ID."""
     try:
-        with get_connection() as conn:
+        with get_read_connection() as conn:
             with conn.cursor() as cur:
                 schema = get_schema_name()
                 sku_table = get_sku_table_name()
@@ -1202,27 +1809,23 @@ def get_sku(sku_id):
                 ), (sku_id,))
                 return cur.fetchone()
     except Exception as e:
-        print(f"Get SKU error: {e}")
+        logger.error("Get SKU error: %s", e)
         return None
 
+@timed_query
 def add_sku(sku_code, item_name, category_id, unit_price, description=None):
     """Add a new SKU."""
     try:
         with get_connection() as conn:
             with conn.cursor() as cur:
-                schema = get_schema_name()
-                sku_table = get_sku_table_name()
-                cur.execute(sql.SQL("""
-                    INSERT INTO {}.{} (sku_code, item_name, category_id, unit_price, description, date_created, last_updated)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
-                """).format(sql.Identifier(schema), sql.Identifier(sku_table)),
-                (sku_code, item_name, category_id, unit_price, description, datetime.now(), datetime.now()))
+                cur.execute(sku_insert_query(), sku_row_params(sku_code, item_name, category_id, unit_price, description))
                 conn.commit()
                 return True
     except Exception as e:
-        print(f"Add SKU error: {e}")
+        logger.error("Add SKU error: %s", e)
         return False
 
+@timed_query
 def update_sku(sku_id, sku_code, item_name, category_id, unit_price, description=None):
     """Update an existing SKU."""
     try:
@@ -1239,9 +1842,10 @@ def update_sku(sku_id, sku_code, item_name, category_id, unit_price, description
                 conn.commit()
                 return True
     except Exception as e:
-        print(f"Update SKU error: {e}")
+        logger.error("Update SKU error: %s", e)
         return False
 
+@timed_query
 def delete_sku(sku_id):
     """Delete a SKU."""
     try:
@@ -1254,30 +1858,49 @@ def delete_sku(sku_id):
                 conn.commit()
                 return True
     except Exception as e:
-        print(f"Delete SKU error: {e}")
+        logger.error("Delete SKU error: %s", e)
         return False
 
+def inventory_item_insert_query():
+    """Insert statement for an inventory item and its RECEIPT movement; parameters are
+    inventory_item_row_params()."""
+    schema = get_schema_name()
+    # Insert the item and its RECEIPT movement in a single statement
+    return sql.SQL("""
+        WITH new_item AS (
+            INSERT INTO {}.{} 
+            (sku_id, warehouse_id, supplier_id, quantity, unit_price, location, minimum_stock, date_added, last_updated) 
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            RETURNING id, sku_id, warehouse_id, quantity
+        )
+        INSERT INTO {}.{} (sku_id, warehouse_id, movement_type, quantity, reference)
+        SELECT sku_id, warehouse_id, 'RECEIPT', quantity, 'item:' || id FROM new_item
+    """).format(
+        sql.Identifier(schema), sql.Identifier(os.getenv("POSTGRES_TABLE", "inventory_items")),
+        sql.Identifier(schema), sql.Identifier(get_movement_table_name())
+    )
+
+def inventory_item_row_params(sku_id, quantity, unit_price, warehouse_id=None, supplier_id=None, location=None, minimum_stock=None):
+    return (sku_id, warehouse_id, supplier_id, quantity, unit_price, location, minimum_stock, datetime.now(), datetime.now())
+
+@timed_query
 def add_inventory_item(sku_id, quantity, unit_price, warehouse_id=None, supplier_id=None, location=None, minimum_stock=None):
     """Add a new inventory item."""
     try:
         with get_connection() as conn:
             with conn.cursor() as cur:
-                schema = get_schema_name()
-                table_name = os.getenv("POSTGRES_TABLE", "inventory_items")
-                cur.execute(sql.SQL("""
-                    INSERT INTO {}.{} 
-                    (sku_id, warehouse_id, supplier_id, quantity, unit_price, location, minimum_stock, date_added, last_updated) 
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """).format(sql.Identifier(schema), sql.Identifier(table_name)), 
-                (sku_id, warehouse_id, supplier_id, quantity, unit_price, location, minimum_stock, datetime.now(), datetime.now()))
+                cur.execute(inventory_item_insert_query(), inventory_item_row_params(
+                    sku_id, quantity, unit_price, warehouse_id, supplier_id, location, minimum_stock))
                 conn.commit()
                 return True
     except Exception as e:
-        print(f"Add inventory item error: {e}")
+        logger.error("Add inventory item error: %s", e)
         return False
 
+@timed_query
 def add_inventory_items_bulk(items_data):
     """Add multiple inventory items in bulk."""
+    started = time.perf_counter()
     try:
         with get_connection() as conn:
             with conn.cursor() as cur:
@@ -1293,10 +1916,22 @@ def add_inventory_items_bulk(items_data):
                 
                 # Execute bulk insert
                 cur.executemany(insert_query, items_data)
+                inserted_count = cur.rowcount
+                
+                # Record a RECEIPT movement per row in the same transaction
+                movement_query = sql.SQL("""
+                    INSERT INTO {}.{} (sku_id, warehouse_id, movement_type, quantity, reference)
+                    VALUES (%s, %s, 'RECEIPT', %s, 'csv_upload')
+                """).format(sql.Identifier(schema), sql.Identifier(get_movement_table_name()))
+                cur.executemany(movement_query, [(item[0], item[1], item[3]) for item in items_data])
                 conn.commit()
-                return True, cur.rowcount
+                elapsed = time.perf_counter() - started
+                CSV_ROWS_INGESTED.inc(inserted_count)
+                CSV_INGEST_LATENCY.observe(elapsed)
+                CSV_INGEST_RATE.set(inserted_count / elapsed if elapsed > 0 else 0.0)
+                return True, inserted_count
     except Exception as e:
-        print(f"Bulk add inventory items error: {e}")
+        logger.error("Bulk add inventory items error: %s", e)
         return False, 0
 
 def validate_csv_row(row, row_num):
@@ -1450,57 +2085,149 @@ def process_csv_file(file_content):
             'errors': []
         }
 
+def pair_stock_cte(pairs):
+    """``pair_stock`` CTE: current quantity for each (SKU, warehouse) listed in the ``pairs`` CTE.
+
+    Each pair reads its snapshot, then sums only the movements after the snapshot's
+    last_movement_id with a range scan on the (sku_id, warehouse_id, movement_id) index, so
+    the cost follows the uncompacted tail instead of the size of the ledger.
+    """
+    schema = get_schema_name()
+    return sql.SQL("""
+        pair_stock AS (
+            SELECT p.sku_id, p.warehouse_id,
+                   (COALESCE(s.quantity, 0) + COALESCE(tail.quantity, 0))::int8 AS quantity
+            FROM {pairs} p
+            LEFT JOIN {snapshot} s ON s.sku_id = p.sku_id AND s.warehouse_id IS NOT DISTINCT FROM p.warehouse_id
+            CROSS JOIN LATERAL (
+                SELECT SUM(t.quantity) AS quantity
+                FROM (
+                    SELECT m.quantity FROM {movements} m
+                    WHERE m.sku_id = p.sku_id AND m.warehouse_id = p.warehouse_id
+                      AND m.movement_id > COALESCE(s.last_movement_id, 0)
+                    UNION ALL
+                    SELECT m.quantity FROM {movements} m
+                    WHERE p.warehouse_id IS NULL AND m.sku_id = p.sku_id AND m.warehouse_id IS NULL
+                      AND m.movement_id > COALESCE(s.last_movement_id, 0)
+                ) t
+            ) tail
+        )
+    """).format(
+        pairs=sql.Identifier(pairs),
+        snapshot=sql.SQL("{}.{}").format(sql.Identifier(schema), sql.Identifier(get_snapshot_table_name())),
+        movements=sql.SQL("{}.{}").format(sql.Identifier(schema), sql.Identifier(get_movement_table_name()))
+    )
+
+def available_to_promise_cte(pairs):
+    """``pair_stock`` and ``pair_available`` CTEs for each (SKU, warehouse) listed in the ``pairs`` CTE.
+
+    ``pair_available`` has the ledger's on-hand quantity, the unexpired held reservations
+    against it and what is left to promise. The available-to-promise view, reservation
+    rebuilds and transfers all read stock through it.
+    """
+    schema = get_schema_name()
+    return sql.SQL("""
+        {pair_stock},
+        pair_available AS (
+            SELECT s.sku_id, s.warehouse_id, s.quantity AS on_hand,
+                   COALESCE(r.reserved, 0) AS reserved,
+                   s.quantity - COALESCE(r.reserved, 0) AS available_to_promise
+            FROM pair_stock s
+            LEFT JOIN LATERAL (
+                SELECT SUM(h.quantity)::int8 AS reserved
+                FROM {reservations} h
+                WHERE h.sku_id = s.sku_id AND h.warehouse_id = s.warehouse_id
+                  AND h.status = 'HELD' AND h.expires_at > CURRENT_TIMESTAMP
+            ) r ON true
+        )
+    """).format(
+        pair_stock=pair_stock_cte(pairs),
+        reservations=sql.SQL("{}.{}").format(sql.Identifier(schema), sql.Identifier(get_reservation_table_name()))
+    )
+
+def grouped_inventory_query(condition=sql.SQL(""), order_by=sql.SQL("sk.item_name ASC")):
+    """Inventory grouped by SKU and warehouse, with quantities read from the stock ledger.
+
+    Only the item attributes (price, locations, minimum stock, dates) are aggregated over
+    inventory_items; quantity comes from pair_stock, so it is not summed from every row.
+    """
+    schema = get_schema_name()
+    return sql.SQL("""
+        WITH pair_items AS (
+            SELECT sku_id, warehouse_id,
+                   MIN(id) AS id,
+                   AVG(unit_price) AS unit_price,
+                   STRING_AGG(DISTINCT location, ', ') AS location,
+                   MAX(minimum_stock) AS minimum_stock,
+                   MIN(date_added) AS date_added,
+                   MAX(last_updated) AS last_updated
+            FROM {items}
+            GROUP BY sku_id, warehouse_id
+        ),
+        {pair_stock}
+        SELECT 
+            i.id,
+            sk.item_name, 
+            sk.description, 
+            c.category_name, 
+            w.warehouse_name,
+            NULL as supplier_name,
+            COALESCE(s.quantity, 0) as quantity,
+            i.unit_price,
+            i.location,
+            i.minimum_stock,
+            i.date_added,
+            i.last_updated,
+            sk.category_id,
+            i.warehouse_id,
+            NULL as supplier_id,
+            sk.sku_code,
+            i.sku_id
+        FROM pair_items i
+        INNER JOIN {skus} sk ON i.sku_id = sk.sku_id
+        LEFT JOIN {categories} c ON sk.category_id = c.category_id
+        LEFT JOIN {warehouses} w ON i.warehouse_id = w.warehouse_id
+        LEFT JOIN pair_stock s ON s.sku_id = i.sku_id AND s.warehouse_id IS NOT DISTINCT FROM i.warehouse_id
+        {condition}
+        ORDER BY {order_by}
+    """).format(
+        pair_stock=pair_stock_cte('pair_items'),
+        items=sql.SQL("{}.{}").format(sql.Identifier(schema), sql.Identifier(os.getenv("POSTGRES_TABLE", "inventory_items"))),
+        skus=sql.SQL("{}.{}").format(sql.Identifier(schema), sql.Identifier(get_sku_table_name())),
+        categories=sql.SQL("{}.{}").format(sql.Identifier(schema), sql.Identifier(get_category_table_name())),
+        warehouses=sql.SQL("{}.{}").format(sql.Identifier(schema), sql.Identifier(get_warehouse_table_name())),
+        condition=condition,
+        order_by=order_by
+    )
+
+def inventory_items_query():
+    """Query for inventory grouped by SKU and warehouse (shared by the sync and async helpers)."""
+    return grouped_inventory_query()
+
+def low_stock_items_query():
+    """Query for (SKU, warehouse) pairs at or below their minimum stock, most short first."""
+    return grouped_inventory_query(
+        sql.SQL("WHERE i.minimum_stock IS NOT NULL AND COALESCE(s.quantity, 0) <= i.minimum_stock"),
+        sql.SQL("(COALESCE(s.quantity, 0) - i.minimum_stock) ASC")
+    )
+
+@timed_query
 def get_inventory_items():
     """Get all inventory items grouped by SKU and warehouse, aggregating quantities."""
     try:
-        with get_connection() as conn:
+        with get_read_connection() as conn:
             with conn.cursor() as cur:
-                schema = get_schema_name()
-                table_name = os.getenv("POSTGRES_TABLE", "inventory_items")
-                sku_table = get_sku_table_name()
-                category_table = get_category_table_name()
-                warehouse_table = get_warehouse_table_name()
-                cur.execute(sql.SQL("""
-                    SELECT 
-                        MIN(i.id) as id,
-                        sk.item_name, 
-                        sk.description, 
-                        c.category_name, 
-                        w.warehouse_name,
-                        NULL as supplier_name,
-                        SUM(i.quantity) as quantity,
-                        AVG(i.unit_price) as unit_price,
-                        STRING_AGG(DISTINCT i.location, ', ') as location,
-                        MAX(i.minimum_stock) as minimum_stock,
-                        MIN(i.date_added) as date_added,
-                        MAX(i.last_updated) as last_updated,
-                        sk.category_id,
-                        i.warehouse_id,
-                        NULL as supplier_id,
-                        sk.sku_code,
-                        i.sku_id
-                    FROM {}.{} i
-                    INNER JOIN {}.{} sk ON i.sku_id = sk.sku_id
-                    LEFT JOIN {}.{} c ON sk.category_id = c.category_id
-                    LEFT JOIN {}.{} w ON i.warehouse_id = w.warehouse_id
-                    GROUP BY i.sku_id, sk.item_name, sk.description, c.category_name, 
-                             w.warehouse_name, i.warehouse_id, sk.category_id, sk.sku_code
-                    ORDER BY sk.item_name ASC
-                """).format(
-                    sql.Identifier(schema), sql.Identifier(table_name),
-                    sql.Identifier(schema), sql.Identifier(sku_table),
-                    sql.Identifier(schema), sql.Identifier(category_table),
-                    sql.Identifier(schema), sql.Identifier(warehouse_table)
-                ))
+                cur.execute(inventory_items_query())
                 return cur.fetchall()
     except Exception as e:
-        print(f"Get inventory items error: {e}")
+        logger.error("Get inventory items error: %s", e)
         return []
 
+@timed_query
 def get_inventory_item(item_id):
     """Get a specific inventory item by ID with SKU, category, warehouse, and supplier information."""
     try:
-        with get_connection() as conn:
+        with get_read_connection() as conn:
             with conn.cursor() as cur:
                 schema = get_schema_name()
                 table_name = os.getenv("POSTGRES_TABLE", "inventory_items")
@@ -1528,9 +2255,10 @@ def get_inventory_item(item_id):
                 ), (item_id,))
                 return cur.fetchone()
     except Exception as e:
-        print(f"Get inventory item error: {e}")
+        logger.error("Get inventory item error: %s", e)
         return None
 
+@timed_query
 def update_inventory_item(item_id, sku_id, quantity, unit_price, warehouse_id=None, supplier_id=None, location=None, minimum_stock=None):
     """Update an existing inventory item."""
     try:
@@ -1538,225 +2266,1694 @@ def update_inventory_item(item_id, sku_id, quantity, unit_price, warehouse_id=No
             with conn.cursor() as cur:
                 schema = get_schema_name()
                 table_name = os.getenv("POSTGRES_TABLE", "inventory_items")
+                movement_table = get_movement_table_name()
+                # Lock the row first so the ledger delta is taken from the version this update replaces
+                cur.execute(sql.SQL("SELECT sku_id, warehouse_id, quantity FROM {}.{} WHERE id = %s FOR UPDATE").format(
+                    sql.Identifier(schema), sql.Identifier(table_name)
+                ), (item_id,))
+                old_item = cur.fetchone()
+                if old_item is None:
+                    conn.rollback()
+                    return True
+                # Update the item and record the net quantity change per (sku, warehouse) as ADJUSTMENT movements
                 cur.execute(sql.SQL("""
-                    UPDATE {}.{} 
-                    SET sku_id = %s, warehouse_id = %s, supplier_id = %s, 
-                        quantity = %s, unit_price = %s, location = %s, minimum_stock = %s, last_updated = %s
-                    WHERE id = %s
-                """).format(sql.Identifier(schema), sql.Identifier(table_name)), 
-                (sku_id, warehouse_id, supplier_id, quantity, unit_price, location, minimum_stock, datetime.now(), item_id))
+                    WITH new_item AS (
+                        UPDATE {}.{}
+                        SET sku_id = %(sku_id)s, warehouse_id = %(warehouse_id)s, supplier_id = %(supplier_id)s,
+                            quantity = %(quantity)s, unit_price = %(unit_price)s, location = %(location)s,
+                            minimum_stock = %(minimum_stock)s, last_updated = %(last_updated)s
+                        WHERE id = %(item_id)s
+                        RETURNING sku_id, warehouse_id, quantity
+                    ),
+                    changes AS (
+                        SELECT %(old_sku_id)s::int4 AS sku_id, %(old_warehouse_id)s::int4 AS warehouse_id,
+                               -%(old_quantity)s::int4 AS quantity
+                        UNION ALL
+                        SELECT sku_id, warehouse_id, quantity FROM new_item
+                    )
+                    INSERT INTO {}.{} (sku_id, warehouse_id, movement_type, quantity, reference)
+                    SELECT sku_id, warehouse_id, 'ADJUSTMENT', SUM(quantity), 'item:' || %(item_id)s
+                    FROM changes
+                    GROUP BY sku_id, warehouse_id
+                    HAVING SUM(quantity) <> 0
+                """).format(
+                    sql.Identifier(schema), sql.Identifier(table_name),
+                    sql.Identifier(schema), sql.Identifier(movement_table)
+                ), {
+                    'item_id': item_id, 'sku_id': sku_id, 'warehouse_id': warehouse_id, 'supplier_id': supplier_id,
+                    'quantity': quantity, 'unit_price': unit_price, 'location': location,
+                    'minimum_stock': minimum_stock, 'last_updated': datetime.now(),
+                    'old_sku_id': old_item[0], 'old_warehouse_id': old_item[1], 'old_quantity': old_item[2]
+                })
+                conn.commit()
+                return True
+    except Exception as e:
+        logger.error("Update inventory item error: %s", e)
+        return False
+
+@timed_query
+def delete_inventory_item(item_id):
+    """Delete an inventory item."""
+    try:
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                schema = get_schema_name()
+                table_name = os.getenv("POSTGRES_TABLE", "inventory_items")
+                movement_table = get_movement_table_name()
+                # Lock the row before deleting it, as update_inventory_item does, so concurrent edits queue
+                cur.execute(sql.SQL("SELECT 1 FROM {}.{} WHERE id = %s FOR UPDATE").format(
+                    sql.Identifier(schema), sql.Identifier(table_name)
+                ), (item_id,))
+                # Delete the item and write off the quantity of the row actually deleted
+                cur.execute(sql.SQL("""
+                    WITH deleted AS (
+                        DELETE FROM {}.{} WHERE id = %s
+                        RETURNING id, sku_id, warehouse_id, quantity
+                    )
+                    INSERT INTO {}.{} (sku_id, warehouse_id, movement_type, quantity, reference)
+                    SELECT sku_id, warehouse_id, 'ADJUSTMENT', -quantity, 'item:' || id
+                    FROM deleted
+                    WHERE quantity <> 0
+                """).format(
+                    sql.Identifier(schema), sql.Identifier(table_name),
+                    sql.Identifier(schema), sql.Identifier(movement_table)
+                ), (item_id,))
+                conn.commit()
+                return True
+    except Exception as e:
+        logger.error("Delete inventory item error: %s", e)
+        return False
+
+@timed_query
+def get_low_stock_items():
+    """Get items with quantity at or below minimum stock level, grouped by SKU and warehouse."""
+    try:
+        with get_read_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(low_stock_items_query())
+                return cur.fetchall()
+    except Exception as e:
+        logger.error("Get low stock items error: %s", e)
+        return []
+
+# Async data access for the /api/v2 handlers; these coroutines run on async_database's loop
+async def fetch_all_async(query, params=None):
+    """Run a query on the async pool and return all rows."""
+    async with async_database.connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(query, params)
+            return await cur.fetchall()
+
+async def execute_async(query, params=None):
+    """Run a write on the async pool and commit it."""
+    async with async_database.connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(query, params)
+        await conn.commit()
+
+@timed_query
+async def get_inventory_items_async():
+    """Async get_inventory_items()."""
+    try:
+        return await fetch_all_async(inventory_items_query())
+    except Exception as e:
+        logger.error("Get inventory items error: %s", e)
+        return []
+
+@timed_query
+async def get_skus_async():
+    """Async get_skus()."""
+    try:
+        return await fetch_all_async(skus_query())
+    except Exception as e:
+        logger.error("Get SKUs error: %s", e)
+        return []
+
+@timed_query
+async def get_skus_by_category_async(category_id):
+    """Async get_skus_by_category()."""
+    try:
+        return await fetch_all_async(skus_by_category_query(), (category_id,))
+    except Exception as e:
+        logger.error("Get SKUs by category error: %s", e)
+        return []
+
+@timed_query
+async def get_categories_async():
+    """Async get_categories()."""
+    try:
+        return await fetch_all_async(categories_query())
+    except Exception as e:
+        logger.error("Get categories error: %s", e)
+        return []
+
+@timed_query
+async def get_warehouses_async():
+    """Async get_warehouses()."""
+    try:
+        return await fetch_all_async(warehouses_query())
+    except Exception as e:
+        logger.error("Get warehouses error: %s", e)
+        return []
+
+@timed_query
+async def get_suppliers_async():
+    """Async get_suppliers()."""
+    try:
+        return await fetch_all_async(suppliers_query())
+    except Exception as e:
+        logger.error("Get suppliers error: %s", e)
+        return []
+
+@timed_query
+async def add_inventory_item_async(sku_id, quantity, unit_price, warehouse_id=None, supplier_id=None, location=None, minimum_stock=None):
+    """Async add_inventory_item()."""
+    try:
+        await execute_async(inventory_item_insert_query(), inventory_item_row_params(
+            sku_id, quantity, unit_price, warehouse_id, supplier_id, location, minimum_stock))
+        return True
+    except Exception as e:
+        logger.error("Add inventory item error: %s", e)
+        return False
+
+@timed_query
+async def add_sku_async(sku_code, item_name, category_id, unit_price, description=None):
+    """Async add_sku()."""
+    try:
+        await execute_async(sku_insert_query(), sku_row_params(sku_code, item_name, category_id, unit_price, description))
+        return True
+    except Exception as e:
+        logger.error("Add SKU error: %s", e)
+        return False
+
+@timed_query
+async def add_category_async(category_name, description=None):
+    """Async add_category()."""
+    try:
+        await execute_async(category_insert_query(), category_row_params(category_name, description))
+        return True
+    except Exception as e:
+        logger.error("Add category error: %s", e)
+        return False
+
+@timed_query
+async def add_warehouse_async(warehouse_name, **fields):
+    """Async add_warehouse(); fields are add_warehouse()'s optional keyword arguments."""
+    try:
+        await execute_async(warehouse_insert_query(), warehouse_row_params(warehouse_name, **fields))
+        return True
+    except Exception as e:
+        logger.error("Add warehouse error: %s", e)
+        return False
+
+@timed_query
+async def add_supplier_async(supplier_name, **fields):
+    """Async add_supplier(); fields are add_supplier()'s optional keyword arguments."""
+    try:
+        await execute_async(supplier_insert_query(), supplier_row_params(supplier_name, **fields))
+        return True
+    except Exception as e:
+        logger.error("Add supplier error: %s", e)
+        return False
+
+# Stock movement ledger functions
+@timed_query
+def backfill_stock_movements():
+    """Seed an empty ledger with opening-balance receipts for existing inventory items."""
+    try:
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                schema = get_schema_name()
+                table_name = os.getenv("POSTGRES_TABLE", "inventory_items")
+                movement_table = get_movement_table_name()
+                cur.execute(sql.SQL("""
+                    INSERT INTO {}.{} (sku_id, warehouse_id, movement_type, quantity, reference, date_created)
+                    SELECT sku_id, warehouse_id, 'RECEIPT', quantity, 'opening_balance', COALESCE(date_added, CURRENT_TIMESTAMP)
+                    FROM {}.{}
+                    WHERE quantity <> 0
+                      AND NOT EXISTS (SELECT 1 FROM {}.{})
+                """).format(
+                    sql.Identifier(schema), sql.Identifier(movement_table),
+                    sql.Identifier(schema), sql.Identifier(table_name),
+                    sql.Identifier(schema), sql.Identifier(movement_table)
+                ))
+                backfilled = cur.rowcount
                 conn.commit()
+                if backfilled:
+                    logger.info("Seeded stock ledger with %s opening-balance movements", backfilled)
                 return True
     except Exception as e:
-        print(f"Update inventory item error: {e}")
+        logger.error("Backfill stock movements error: %s", e)
         return False
 
-def delete_inventory_item(item_id):
-    """Delete an inventory item."""
+@timed_query
+def get_current_stock(sku_id, warehouse_id=None):
+    """Get current stock for a SKU (at one warehouse, or across all) as snapshot plus newer movements."""
+    try:
+        with get_read_connection() as conn:
+            with conn.cursor() as cur:
+                if warehouse_id:
+                    pairs = sql.SQL("SELECT %(sku_id)s::int4 AS sku_id, %(warehouse_id)s::int4 AS warehouse_id")
+                else:
+                    # Every pair has movements (snapshots are built from them), so the SKU's
+                    # warehouses come from an index-only scan of its ledger entries
+                    pairs = sql.SQL("SELECT DISTINCT sku_id, warehouse_id FROM {}.{} WHERE sku_id = %(sku_id)s").format(
+                        sql.Identifier(get_schema_name()), sql.Identifier(get_movement_table_name())
+                    )
+                cur.execute(sql.SQL("""
+                    WITH pairs AS ({}),
+                    {}
+                    SELECT COALESCE(SUM(quantity), 0) FROM pair_stock
+                """).format(pairs, pair_stock_cte('pairs')), {'sku_id': sku_id, 'warehouse_id': warehouse_id})
+                result = cur.fetchone()
+                return int(result[0]) if result else 0
+    except Exception as e:
+        logger.error("Get current stock error: %s", e)
+        return None
+
+@timed_query
+def compact_stock_ledger(settle_seconds=300):
+    """Roll settled ledger movements into per-(sku, warehouse) snapshots.
+
+    Only movements older than ``settle_seconds`` are folded in, so a write transaction that
+    is still in flight can never end up below a snapshot's high-water mark. The ledger itself
+    is never modified; snapshots only advance their ``last_movement_id`` high-water mark.
+    """
+    try:
+        start_time = time.time()
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                schema = get_schema_name()
+                movement_table = get_movement_table_name()
+                snapshot_table = get_snapshot_table_name()
+                cur.execute(sql.SQL("""
+                    WITH hwm AS (
+                        SELECT COALESCE(MAX(movement_id), 0) AS movement_id
+                        FROM {}.{}
+                        WHERE date_created < CURRENT_TIMESTAMP - make_interval(secs => %s)
+                    ),
+                    tail AS (
+                        SELECT m.sku_id, m.warehouse_id, SUM(m.quantity) AS quantity
+                        FROM {}.{} m
+                        LEFT JOIN {}.{} s
+                          ON s.sku_id = m.sku_id AND s.warehouse_id IS NOT DISTINCT FROM m.warehouse_id
+                        WHERE m.movement_id > COALESCE(s.last_movement_id, 0)
+                          AND m.movement_id <= (SELECT movement_id FROM hwm)
+                        GROUP BY m.sku_id, m.warehouse_id
+                    )
+                    INSERT INTO {}.{} AS snap (sku_id, warehouse_id, quantity, last_movement_id, last_updated)
+                    SELECT sku_id, warehouse_id, quantity, (SELECT movement_id FROM hwm), CURRENT_TIMESTAMP
+                    FROM tail
+                    ON CONFLICT (sku_id, warehouse_id) DO UPDATE
+                    SET quantity = snap.quantity + EXCLUDED.quantity,
+                        last_movement_id = EXCLUDED.last_movement_id,
+                        last_updated = EXCLUDED.last_updated
+                    RETURNING last_movement_id
+                """).format(
+                    sql.Identifier(schema), sql.Identifier(movement_table),
+                    sql.Identifier(schema), sql.Identifier(movement_table),
+                    sql.Identifier(schema), sql.Identifier(snapshot_table),
+                    sql.Identifier(schema), sql.Identifier(snapshot_table)
+                ), (settle_seconds,))
+                rows = cur.fetchall()
+                conn.commit()
+                return True, {
+                    'pairs_compacted': len(rows),
+                    'high_water_mark': rows[0][0] if rows else None,
+                    'duration_ms': round((time.time() - start_time) * 1000, 2)
+                }
+    except Exception as e:
+        logger.error("Compact stock ledger error: %s", e)
+        return False, {'error': str(e)}
+
+# Inventory item compaction
+def _time_call_ms(func):
+    """Run func once and return its wall-clock duration in milliseconds."""
+    start_time = time.perf_counter()
+    func()
+    return round((time.perf_counter() - start_time) * 1000, 2)
+
+@timed_query
+def count_inventory_item_rows():
+    """Count raw inventory_items rows (not grouped by SKU and warehouse)."""
+    try:
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                schema = get_schema_name()
+                table_name = os.getenv("POSTGRES_TABLE", "inventory_items")
+                cur.execute(sql.SQL("SELECT COUNT(*) FROM {}.{}").format(
+                    sql.Identifier(schema), sql.Identifier(table_name)))
+                return cur.fetchone()[0]
+    except Exception as e:
+        logger.error("Count inventory item rows error: %s", e)
+        return None
+
+def duplicate_pair_locations_query():
+    """Query for each (sku, warehouse) pair with more than one inventory_items row: its row
+    count and the distinct locations of its rows merged into one comma-separated list."""
+    schema = get_schema_name()
+    table_name = os.getenv("POSTGRES_TABLE", "inventory_items")
+    return sql.SQL("""
+        SELECT i.sku_id, i.warehouse_id, COUNT(DISTINCT i.id) AS row_count,
+               STRING_AGG(DISTINCT NULLIF(TRIM(part), ''), ', ') AS location
+        FROM {items} i
+        LEFT JOIN LATERAL unnest(string_to_array(i.location, ',')) AS part ON true
+        GROUP BY i.sku_id, i.warehouse_id
+        HAVING COUNT(DISTINCT i.id) > 1
+    """).format(items=sql.SQL("{}.{}").format(sql.Identifier(schema), sql.Identifier(table_name)))
+
+@timed_query
+def compact_inventory_items_batch(batch_size=200, lock_timeout_ms=2000):
+    """Merge duplicate inventory_items rows for up to batch_size (sku, warehouse) pairs.
+
+    Each pair collapses into its oldest row, keeping the total quantity, a quantity-weighted
+    unit_price, the distinct locations, the highest minimum_stock and the most recent supplier.
+    Pairs whose merged locations would not fit the location column are left as they are
+    (see get_oversized_location_pairs) rather than truncated. Rows locked by concurrent writers
+    are skipped rather than waited on, so the batch never blocks edits; they are picked up by a
+    later batch. Totals per pair are unchanged, so no ledger movements are recorded.
+    """
+    try:
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                schema = get_schema_name()
+                table_name = os.getenv("POSTGRES_TABLE", "inventory_items")
+                cur.execute("SELECT set_config('lock_timeout', %s, true)", (f"{int(lock_timeout_ms)}ms",))
+                cur.execute(sql.SQL("""
+                    WITH pairs AS (
+                        SELECT sku_id, warehouse_id
+                        FROM ({duplicates}) d
+                        WHERE COALESCE(LENGTH(location), 0) <= %(location_width)s
+                        LIMIT %(batch_size)s
+                    ),
+                    locked AS (
+                        SELECT i.id, i.sku_id, i.warehouse_id, i.supplier_id, i.quantity, i.unit_price,
+                               i.location, i.minimum_stock, i.date_added, i.last_updated
+                        FROM {items} i
+                        JOIN pairs p ON i.sku_id = p.sku_id AND i.warehouse_id IS NOT DISTINCT FROM p.warehouse_id
+                        ORDER BY i.id
+                        FOR UPDATE OF i SKIP LOCKED
+                    ),
+                    merged AS (
+                        SELECT MIN(l.id) AS keep_id,
+                               l.sku_id,
+                               l.warehouse_id,
+                               SUM(l.quantity) AS quantity,
+                               CASE WHEN SUM(l.quantity) > 0
+                                    THEN SUM(l.quantity * l.unit_price) / SUM(l.quantity)
+                                    ELSE AVG(l.unit_price) END AS unit_price,
+                               (ARRAY_AGG(l.supplier_id ORDER BY l.last_updated DESC NULLS LAST, l.id DESC)
+                                    FILTER (WHERE l.supplier_id IS NOT NULL))[1] AS supplier_id,
+                               MAX(l.minimum_stock) AS minimum_stock,
+                               MIN(l.date_added) AS date_added,
+                               MAX(l.last_updated) AS last_updated
+                        FROM locked l
+                        GROUP BY l.sku_id, l.warehouse_id
+                        HAVING COUNT(*) > 1
+                    ),
+                    locations AS (
+                        SELECT l.sku_id, l.warehouse_id, STRING_AGG(DISTINCT TRIM(part), ', ') AS location
+                        FROM locked l
+                        CROSS JOIN LATERAL unnest(string_to_array(l.location, ',')) AS part
+                        WHERE TRIM(part) <> ''
+                        GROUP BY l.sku_id, l.warehouse_id
+                    ),
+                    fitting AS (
+                        -- Rows edited since the pairs were chosen may have grown their locations
+                        SELECT m.*, loc.location
+                        FROM merged m
+                        LEFT JOIN locations loc
+                          ON loc.sku_id = m.sku_id AND loc.warehouse_id IS NOT DISTINCT FROM m.warehouse_id
+                        WHERE COALESCE(LENGTH(loc.location), 0) <= %(location_width)s
+                    ),
+                    kept AS (
+                        UPDATE {items} t
+                        SET quantity = f.quantity,
+                            unit_price = f.unit_price,
+                            supplier_id = f.supplier_id,
+                            location = f.location,
+                            minimum_stock = f.minimum_stock,
+                            date_added = f.date_added,
+                            last_updated = f.last_updated
+                        FROM fitting f
+                        WHERE t.id = f.keep_id
+                        RETURNING t.id
+                    ),
+                    removed AS (
+                        DELETE FROM {items} t
+                        USING locked l
+                        JOIN fitting f ON l.sku_id = f.sku_id AND l.warehouse_id IS NOT DISTINCT FROM f.warehouse_id
+                        WHERE t.id = l.id AND l.id <> f.keep_id
+                        RETURNING t.id
+                    )
+                    SELECT (SELECT COUNT(*) FROM pairs), (SELECT COUNT(*) FROM kept), (SELECT COUNT(*) FROM removed)
+                """).format(
+                    items=sql.SQL("{}.{}").format(sql.Identifier(schema), sql.Identifier(table_name)),
+                    duplicates=duplicate_pair_locations_query()
+                ), {'batch_size': batch_size, 'location_width': INVENTORY_LOCATION_MAX_LENGTH})
+                pairs_found, pairs_merged, rows_removed = cur.fetchone()
+                conn.commit()
+                return True, pairs_found, pairs_merged, rows_removed
+    except Exception as e:
+        logger.error("Compact inventory items batch error: %s", e)
+        return False, 0, 0, 0
+
+@timed_query
+def get_oversized_location_pairs():
+    """Get the duplicated (sku, warehouse) pairs that compaction leaves alone because their
+    merged locations are longer than the location column."""
+    try:
+        with get_read_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql.SQL("""
+                    SELECT sku_id, warehouse_id, row_count, LENGTH(location) AS location_length
+                    FROM ({}) d
+                    WHERE LENGTH(location) > %s
+                    ORDER BY sku_id, warehouse_id
+                """).format(duplicate_pair_locations_query()), (INVENTORY_LOCATION_MAX_LENGTH,))
+                columns = [desc.name for desc in cur.description]
+                return [dict(zip(columns, row)) for row in cur.fetchall()]
+    except Exception as e:
+        logger.error("Get oversized location pairs error: %s", e)
+        return []
+
+def compact_inventory_items(batch_size=200, max_batches=None, lock_timeout_ms=2000):
+    """Merge duplicate inventory_items rows per (sku, warehouse) in small committed batches.
+
+    Reports the rows reclaimed, the pairs left unmerged because their locations would not fit
+    the location column, and how long get_inventory_items and get_low_stock_items took before
+    and after compaction.
+    """
+    rows_before = count_inventory_item_rows()
+    timings_before = {
+        'get_inventory_items': _time_call_ms(get_inventory_items),
+        'get_low_stock_items': _time_call_ms(get_low_stock_items)
+    }
+
+    batches = 0
+    pairs_merged = 0
+    rows_reclaimed = 0
+    while max_batches is None or batches < max_batches:
+        success, pairs_found, batch_pairs, batch_rows = compact_inventory_items_batch(batch_size, lock_timeout_ms)
+        if not success:
+            return False, {'error': 'Compaction batch failed', 'batches': batches, 'rows_reclaimed': rows_reclaimed}
+        batches += 1
+        pairs_merged += batch_pairs
+        rows_reclaimed += batch_rows
+        # Stop once nothing is left to merge, or when every remaining pair is locked by writers
+        if pairs_found < batch_size or batch_pairs == 0:
+            break
+
+    rows_after = count_inventory_item_rows()
+    pairs_skipped = get_oversized_location_pairs()
+    timings_after = {
+        'get_inventory_items': _time_call_ms(get_inventory_items),
+        'get_low_stock_items': _time_call_ms(get_low_stock_items)
+    }
+    logger.info("Compacted %s SKU/warehouse pairs in %s batches, reclaimed %s rows", pairs_merged, batches, rows_reclaimed)
+
+    return True, {
+        'batches': batches,
+        'pairs_merged': pairs_merged,
+        'rows_reclaimed': rows_reclaimed,
+        'pairs_skipped': pairs_skipped,
+        'rows_before': rows_before,
+        'rows_after': rows_after,
+        'query_timings_ms': {
+            name: {'before': timings_before[name], 'after': timings_after[name]}
+            for name in timings_before
+        }
+    }
+
+# Stock transfer functions
+def validate_transfer_lines(lines):
+    """Normalize transfer lines to (sku_id, from_warehouse_id, to_warehouse_id, quantity) tuples."""
+    normalized = []
+    errors = []
+    for line_num, line in enumerate(lines, 1):
+        try:
+            if isinstance(line, dict):
+                values = (line['sku_id'], line['from_warehouse_id'], line['to_warehouse_id'], line['quantity'])
+            else:
+                values = tuple(line)
+            sku_id, from_warehouse_id, to_warehouse_id, quantity = (int(value) for value in values)
+        except (KeyError, TypeError, ValueError):
+            errors.append(f"Line {line_num}: expected sku_id, from_warehouse_id, to_warehouse_id and quantity as integers")
+            continue
+        if quantity <= 0:
+            errors.append(f"Line {line_num}: quantity must be greater than 0")
+        elif from_warehouse_id == to_warehouse_id:
+            errors.append(f"Line {line_num}: from_warehouse_id and to_warehouse_id must differ")
+        else:
+            normalized.append((sku_id, from_warehouse_id, to_warehouse_id, quantity))
+    return normalized, errors
+
+@timed_query
+def transfer_stock(lines, reference=None):
+    """Move stock between warehouses for many (sku, from, to, quantity) lines atomically.
+
+    All lines are applied by one set-based statement: affected inventory rows are locked in
+    (sku_id, warehouse_id, id) order so concurrent transfers cannot deadlock, the net change
+    per (sku, warehouse) is checked against available-to-promise (ledger on-hand stock less
+    unexpired held reservations) in the same statement, and nothing is written if any source
+    would be overdrawn. Decrements drain a pair's rows oldest first;
+    increments go to the pair's oldest row, or a new row when the destination has none.
+    TRANSFER_OUT/TRANSFER_IN movements are appended to the ledger. The statement and its
+    commit are pipelined, so even thousands of lines cost a single round trip.
+    """
+    lines, errors = validate_transfer_lines(lines)
+    if errors:
+        return False, {'error': 'Invalid transfer lines', 'errors': errors}
+    if not lines:
+        return False, {'error': 'No transfer lines provided', 'errors': []}
+
+    reference = reference or f"TRF-{datetime.now().strftime('%Y%m%d%H%M%S')}-{os.urandom(2).hex()}"
+    try:
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                schema = get_schema_name()
+                table_name = os.getenv("POSTGRES_TABLE", "inventory_items")
+                sku_table = get_sku_table_name()
+                movement_table = get_movement_table_name()
+                params = {
+                    'sku_ids': [line[0] for line in lines],
+                    'from_ids': [line[1] for line in lines],
+                    'to_ids': [line[2] for line in lines],
+                    'quantities': [line[3] for line in lines],
+                    'reference': reference,
+                    'now': datetime.now()
+                }
+                items = sql.SQL("{}.{}").format(sql.Identifier(schema), sql.Identifier(table_name))
+                with conn.pipeline():
+                    # Lock the pairs' rows first: the transfer statement then starts after every
+                    # earlier writer of these pairs has committed, so its ledger reads are current
+                    conn.execute(sql.SQL("""
+                        SELECT i.id
+                        FROM {items} i
+                        JOIN (
+                            SELECT * FROM unnest(%(sku_ids)s::int4[], %(from_ids)s::int4[])
+                            UNION
+                            SELECT * FROM unnest(%(sku_ids)s::int4[], %(to_ids)s::int4[])
+                        ) p (sku_id, warehouse_id) ON i.sku_id = p.sku_id AND i.warehouse_id = p.warehouse_id
+                        ORDER BY i.sku_id, i.warehouse_id, i.id
+                        FOR UPDATE OF i
+                    """).format(items=items), params)
+                    cur.execute(sql.SQL("""
+                        WITH lines AS (
+                            SELECT *
+                            FROM unnest(%(sku_ids)s::int4[], %(from_ids)s::int4[], %(to_ids)s::int4[], %(quantities)s::int4[])
+                                AS l(sku_id, from_warehouse_id, to_warehouse_id, quantity)
+                        ),
+                        deltas AS (
+                            SELECT sku_id, warehouse_id, SUM(delta) AS delta
+                            FROM (
+                                SELECT sku_id, from_warehouse_id AS warehouse_id, -quantity AS delta FROM lines
+                                UNION ALL
+                                SELECT sku_id, to_warehouse_id, quantity FROM lines
+                            ) d
+                            GROUP BY sku_id, warehouse_id
+                        ),
+                        {available},
+                        locked AS (
+                            SELECT i.id, i.sku_id, i.warehouse_id, i.quantity, i.unit_price
+                            FROM {items} i
+                            JOIN deltas d ON i.sku_id = d.sku_id AND i.warehouse_id = d.warehouse_id
+                            ORDER BY i.sku_id, i.warehouse_id, i.id
+                            FOR UPDATE OF i
+                        ),
+                        balances AS (
+                            SELECT d.sku_id, d.warehouse_id, d.delta, a.on_hand, a.reserved, a.available_to_promise
+                            FROM deltas d
+                            JOIN pair_available a ON a.sku_id = d.sku_id AND a.warehouse_id = d.warehouse_id
+                        ),
+                        overdrawn AS (
+                            SELECT sku_id, warehouse_id, on_hand, reserved, -delta AS requested
+                            FROM balances
+                            WHERE delta < 0 AND available_to_promise + delta < 0
+                        ),
+                        takes AS (
+                            SELECT l.id,
+                                   LEAST(l.quantity, GREATEST(0, -b.delta - COALESCE(SUM(l.quantity) OVER (
+                                       PARTITION BY l.sku_id, l.warehouse_id ORDER BY l.id
+                                       ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING), 0))) AS take
+                            FROM locked l
+                            JOIN balances b ON b.sku_id = l.sku_id AND b.warehouse_id = l.warehouse_id
+                            WHERE b.delta < 0
+                        ),
+                        decremented AS (
+                            UPDATE {items} t
+                            SET quantity = t.quantity - k.take, last_updated = %(now)s
+                            FROM takes k
+                            WHERE t.id = k.id AND k.take > 0
+                              AND NOT EXISTS (SELECT 1 FROM overdrawn)
+                            RETURNING t.id
+                        ),
+                        increment_targets AS (
+                            SELECT DISTINCT ON (l.sku_id, l.warehouse_id) l.id, b.delta
+                            FROM locked l
+                            JOIN balances b ON b.sku_id = l.sku_id AND b.warehouse_id = l.warehouse_id
+                            WHERE b.delta > 0
+                            ORDER BY l.sku_id, l.warehouse_id, l.id
+                        ),
+                        incremented AS (
+                            UPDATE {items} t
+                            SET quantity = t.quantity + g.delta, last_updated = %(now)s
+                            FROM increment_targets g
+                            WHERE t.id = g.id
+                              AND NOT EXISTS (SELECT 1 FROM overdrawn)
+                            RETURNING t.id
+                        ),
+                        created AS (
+                            INSERT INTO {items} (sku_id, warehouse_id, quantity, unit_price, date_added, last_updated)
+                            SELECT b.sku_id, b.warehouse_id, b.delta,
+                                   COALESCE(src.unit_price, sk.unit_price, 0), %(now)s, %(now)s
+                            FROM balances b
+                            JOIN {skus} sk ON sk.sku_id = b.sku_id
+                            LEFT JOIN LATERAL (
+                                SELECT SUM(l.quantity * l.unit_price) / NULLIF(SUM(l.quantity), 0) AS unit_price
+                                FROM locked l
+                                WHERE l.sku_id = b.sku_id
+                            ) src ON true
+                            WHERE b.delta > 0
+                              AND NOT EXISTS (SELECT 1 FROM locked l WHERE l.sku_id = b.sku_id AND l.warehouse_id = b.warehouse_id)
+                              AND NOT EXISTS (SELECT 1 FROM overdrawn)
+                            RETURNING id
+                        ),
+                        movements AS (
+                            INSERT INTO {movements} (sku_id, warehouse_id, movement_type, quantity, reference)
+                            SELECT sku_id, warehouse_id, movement_type, quantity, %(reference)s
+                            FROM (
+                                SELECT sku_id, from_warehouse_id AS warehouse_id, 'TRANSFER_OUT' AS movement_type, -quantity AS quantity FROM lines
+                                UNION ALL
+                                SELECT sku_id, to_warehouse_id, 'TRANSFER_IN', quantity FROM lines
+                            ) m
+                            WHERE NOT EXISTS (SELECT 1 FROM overdrawn)
+                            RETURNING movement_id
+                        )
+                        SELECT (SELECT COALESCE(json_agg(overdrawn), '[]'::json) FROM overdrawn),
+                               (SELECT COUNT(*) FROM decremented) + (SELECT COUNT(*) FROM incremented),
+                               (SELECT COUNT(*) FROM created),
+                               (SELECT COUNT(*) FROM movements)
+                    """).format(
+                        items=items,
+                        available=available_to_promise_cte('deltas'),
+                        skus=sql.SQL("{}.{}").format(sql.Identifier(schema), sql.Identifier(sku_table)),
+                        movements=sql.SQL("{}.{}").format(sql.Identifier(schema), sql.Identifier(movement_table))
+                    ), params)
+                    # An overdrawn transfer wrote nothing, so committing it unconditionally is safe
+                    conn.commit()
+                overdrawn, rows_updated, rows_created, movements_recorded = cur.fetchone()
+                if overdrawn:
+                    return False, {'error': 'Insufficient stock for transfer', 'overdrawn': overdrawn}
+                return True, {
+                    'reference': reference,
+                    'lines': len(lines),
+                    'rows_updated': rows_updated,
+                    'rows_created': rows_created,
+                    'movements_recorded': movements_recorded
+                }
+    except Exception as e:
+        logger.error("Transfer stock error: %s", e)
+        return False, {'error': str(e)}
+
+# Stock reservation functions
+def _reservation_tables():
+    schema = get_schema_name()
+    return {
+        name: sql.SQL("{}.{}").format(sql.Identifier(schema), sql.Identifier(table))
+        for name, table in (
+            ('items', os.getenv("POSTGRES_TABLE", "inventory_items")),
+            ('movements', get_movement_table_name()),
+            ('buckets', get_allocation_bucket_table_name()),
+            ('reservations', get_reservation_table_name())
+        )
+    }
+
+def _reserve_from_bucket(cur, tables, sku_id, warehouse_id, quantity, order_reference, expires_at):
+    """Claim quantity from the first unlocked allocation bucket that can cover it.
+
+    Buckets locked by other workers are skipped rather than waited on. A bucket is only
+    trusted while no stock has left the pair (other than reservation picks) since it was
+    built; otherwise the caller falls back to rebuilding. Returns the reservation id or None.
+    """
+    cur.execute(sql.SQL("""
+        WITH bucket AS (
+            SELECT b.bucket_id
+            FROM {buckets} b
+            WHERE b.sku_id = %(sku_id)s AND b.warehouse_id = %(warehouse_id)s
+              AND b.available >= %(quantity)s
+              AND NOT EXISTS (
+                  SELECT 1 FROM {movements} m
+                  WHERE m.sku_id = b.sku_id AND m.warehouse_id = b.warehouse_id
+                    AND m.movement_id > b.built_at_movement_id
+                    AND m.quantity < 0
+                    AND NOT (m.movement_type = 'PICK' AND m.reference LIKE 'reservation:%%')
+              )
+            ORDER BY b.bucket_id
+            LIMIT 1
+            FOR UPDATE SKIP LOCKED
+        ),
+        claimed AS (
+            UPDATE {buckets} t
+            SET available = t.available - %(quantity)s, last_updated = CURRENT_TIMESTAMP
+            FROM bucket
+            WHERE t.bucket_id = bucket.bucket_id
+            RETURNING t.bucket_id
+        )
+        INSERT INTO {reservations} (sku_id, warehouse_id, bucket_id, quantity, order_reference, expires_at)
+        SELECT %(sku_id)s, %(warehouse_id)s, bucket_id, %(quantity)s, %(order_reference)s, %(expires_at)s
+        FROM claimed
+        RETURNING reservation_id
+    """).format(**tables), {
+        'sku_id': sku_id, 'warehouse_id': warehouse_id, 'quantity': quantity,
+        'order_reference': order_reference, 'expires_at': expires_at
+    })
+    row = cur.fetchone()
+    return row[0] if row else None
+
+def _rebuild_and_reserve(cur, tables, sku_id, warehouse_id, quantity, order_reference, expires_at):
+    """Recompute available-to-promise for a pair, reserve from it and re-stripe the remainder.
+
+    Must run with the pair's advisory lock held. Overdue held reservations are expired here,
+    since the recount already treats their quantity as available; a sweeper refunding them
+    later would count it twice. Returns (reservation_id or None, available).
+    """
+    cur.execute(sql.SQL("""
+        SELECT bucket_id FROM {buckets}
+        WHERE sku_id = %s AND warehouse_id = %s
+        ORDER BY bucket_id
+        FOR UPDATE
+    """).format(**tables), (sku_id, warehouse_id))
+    # Rows a sweeper has already claimed are skipped: their refund finds no bucket once these are rebuilt
+    cur.execute(sql.SQL("""
+        UPDATE {reservations} r
+        SET status = 'EXPIRED', last_updated = CURRENT_TIMESTAMP
+        FROM (
+            SELECT reservation_id FROM {reservations}
+            WHERE sku_id = %s AND warehouse_id = %s
+              AND status = 'HELD' AND expires_at <= CURRENT_TIMESTAMP
+            FOR UPDATE SKIP LOCKED
+        ) due
+        WHERE r.reservation_id = due.reservation_id
+    """).format(**tables), (sku_id, warehouse_id))
+    # Read the ledger position before stock levels so later outflows invalidate the new buckets
+    cur.execute(sql.SQL("SELECT COALESCE(MAX(movement_id), 0) FROM {movements}").format(**tables))
+    built_at = cur.fetchone()[0]
+    cur.execute(sql.SQL("""
+        WITH pairs AS (SELECT %(sku_id)s::int4 AS sku_id, %(warehouse_id)s::int4 AS warehouse_id),
+        {}
+        SELECT available_to_promise FROM pair_available
+    """).format(available_to_promise_cte('pairs')), {'sku_id': sku_id, 'warehouse_id': warehouse_id})
+    available = max(0, int(cur.fetchone()[0]))
+
+    reserved = available >= quantity
+    if reserved:
+        available -= quantity
+
+    cur.execute(sql.SQL("DELETE FROM {buckets} WHERE sku_id = %s AND warehouse_id = %s").format(**tables),
+                (sku_id, warehouse_id))
+    # A new reservation needs a bucket to be refunded to, even when nothing is left to stripe
+    stripes = max(min(max(1, get_reservation_stripes()), available), 1 if reserved else 0)
+    bucket_ids = []
+    if stripes > 0:
+        cur.execute(sql.SQL("""
+            INSERT INTO {buckets} (sku_id, warehouse_id, available, built_at_movement_id)
+            SELECT %(sku_id)s, %(warehouse_id)s,
+                   %(available)s / %(stripes)s + CASE WHEN g <= %(available)s %% %(stripes)s THEN 1 ELSE 0 END,
+                   %(built_at)s
+            FROM generate_series(1, %(stripes)s) g
+            RETURNING bucket_id
+        """).format(**tables), {
+            'sku_id': sku_id, 'warehouse_id': warehouse_id, 'available': available,
+            'stripes': stripes, 'built_at': built_at
+        })
+        bucket_ids = [row[0] for row in cur.fetchall()]
+
+    reservation_id = None
+    if reserved:
+        cur.execute(sql.SQL("""
+            INSERT INTO {reservations} (sku_id, warehouse_id, bucket_id, quantity, order_reference, expires_at)
+            VALUES (%s, %s, %s, %s, %s, %s)
+            RETURNING reservation_id
+        """).format(**tables), (sku_id, warehouse_id, min(bucket_ids), quantity, order_reference, expires_at))
+        reservation_id = cur.fetchone()[0]
+    return reservation_id, available
+
+@timed_query
+def reserve_stock(sku_id, warehouse_id, quantity, order_reference=None, ttl_seconds=None):
+    """Reserve quantity of a SKU at a warehouse for an order until the reservation expires.
+
+    Available-to-promise for each (sku, warehouse) is striped across several allocation
+    buckets. Workers claim from buckets with FOR UPDATE SKIP LOCKED, so concurrent
+    reservations on a hot SKU land on different buckets instead of queueing on one row.
+    Only when no bucket can cover the request (or stock has left the pair since the buckets
+    were built) does a worker take the pair's advisory lock and rebuild the buckets.
+    """
+    try:
+        sku_id, warehouse_id, quantity = int(sku_id), int(warehouse_id), int(quantity)
+    except (TypeError, ValueError):
+        message = 'sku_id, warehouse_id and quantity must be integers'
+        return False, {'error': 'Invalid reservation', 'errors': [message]}
+    errors = []
+    if quantity <= 0:
+        errors.append('quantity must be greater than 0')
+    if ttl_seconds is None:
+        ttl_seconds = get_reservation_ttl_seconds()
+    try:
+        ttl_seconds = int(ttl_seconds)
+        if ttl_seconds <= 0:
+            errors.append('ttl_seconds must be greater than 0')
+    except (TypeError, ValueError):
+        errors.append('ttl_seconds must be an integer')
+    if errors:
+        return False, {'error': 'Invalid reservation', 'errors': errors}
+
+    expires_at = datetime.now() + timedelta(seconds=ttl_seconds)
+    tables = _reservation_tables()
+    args = (sku_id, warehouse_id, quantity, order_reference, expires_at)
+    try:
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                reservation_id = _reserve_from_bucket(cur, tables, *args)
+                conn.commit()
+                available = None
+                if reservation_id is None:
+                    cur.execute("SELECT pg_try_advisory_xact_lock(%s, %s)", (sku_id, warehouse_id))
+                    if not cur.fetchone()[0]:
+                        # Another worker is rebuilding this pair; its buckets are usually ready by now
+                        conn.rollback()
+                        reservation_id = _reserve_from_bucket(cur, tables, *args)
+                        conn.commit()
+                        if reservation_id is None:
+                            cur.execute("SELECT pg_advisory_xact_lock(%s, %s)", (sku_id, warehouse_id))
+                    if reservation_id is None:
+                        reservation_id, available = _rebuild_and_reserve(cur, tables, *args)
+                        conn.commit()
+                if reservation_id is None:
+                    return False, {'error': 'Insufficient available-to-promise stock', 'available': available}
+                return True, {
+                    'reservation_id': reservation_id,
+                    'sku_id': sku_id,
+                    'warehouse_id': warehouse_id,
+                    'quantity': quantity,
+                    'order_reference': order_reference,
+                    'expires_at': expires_at.isoformat()
+                }
+    except Exception as e:
+        logger.error("Reserve stock error: %s", e)
+        return False, {'error': str(e)}
+
+@timed_query
+def release_reservation(reservation_id):
+    """Release a held, unexpired reservation and return its quantity to the bucket it was claimed from.
+
+    If the pair's buckets were rebuilt since (dropping that bucket), the quantity goes to the
+    pair's first current bucket instead; those buckets were built with it still held. Overdue
+    reservations are left to expire_reservations (or the next rebuild) and are not released.
+    """
+    try:
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql.SQL("""
+                    WITH released AS (
+                        UPDATE {reservations}
+                        SET status = 'RELEASED', last_updated = CURRENT_TIMESTAMP
+                        WHERE reservation_id = %s AND status = 'HELD' AND expires_at > CURRENT_TIMESTAMP
+                        RETURNING sku_id, warehouse_id, bucket_id, quantity
+                    ),
+                    target AS (
+                        SELECT COALESCE(
+                                   (SELECT b.bucket_id FROM {buckets} b WHERE b.bucket_id = r.bucket_id),
+                                   (SELECT MIN(b.bucket_id) FROM {buckets} b
+                                    WHERE b.sku_id = r.sku_id AND b.warehouse_id = r.warehouse_id)
+                               ) AS bucket_id,
+                               r.quantity
+                        FROM released r
+                    ),
+                    refunded AS (
+                        UPDATE {buckets} b
+                        SET available = b.available + t.quantity, last_updated = CURRENT_TIMESTAMP
+                        FROM target t
+                        WHERE b.bucket_id = t.bucket_id
+                        RETURNING b.bucket_id
+                    )
+                    SELECT (SELECT COUNT(*) FROM released), (SELECT COUNT(*) FROM refunded)
+                """).format(**_reservation_tables()), (reservation_id,))
+                released, _ = cur.fetchone()
+                conn.commit()
+                return released > 0
+    except Exception as e:
+        logger.error("Release reservation error: %s", e)
+        return False
+
+@timed_query
+def expire_reservations(batch_size=500):
+    """Mark held reservations past their expiry as EXPIRED and return quantity to their buckets.
+
+    Expired rows are claimed with SKIP LOCKED so several sweepers can run side by side, and
+    buckets are locked in bucket_id order before being topped up. Only reservations whose
+    bucket still exists are refunded: once a pair is rebuilt, its recount decides what an
+    expired reservation frees up. Returns (success, expired_count).
+    """
+    try:
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql.SQL("""
+                    WITH due AS (
+                        SELECT reservation_id
+                        FROM {reservations}
+                        WHERE status = 'HELD' AND expires_at <= CURRENT_TIMESTAMP
+                        ORDER BY expires_at
+                        LIMIT %s
+                        FOR UPDATE SKIP LOCKED
+                    ),
+                    expired AS (
+                        UPDATE {reservations} r
+                        SET status = 'EXPIRED', last_updated = CURRENT_TIMESTAMP
+                        FROM due
+                        WHERE r.reservation_id = due.reservation_id
+                        RETURNING r.bucket_id, r.quantity
+                    ),
+                    refunds AS (
+                        SELECT bucket_id, SUM(quantity) AS quantity
+                        FROM expired
+                        WHERE bucket_id IS NOT NULL
+                        GROUP BY bucket_id
+                    ),
+                    locked_buckets AS (
+                        SELECT b.bucket_id
+                        FROM {buckets} b
+                        JOIN refunds f ON f.bucket_id = b.bucket_id
+                        ORDER BY b.bucket_id
+                        FOR UPDATE OF b
+                    ),
+                    refunded AS (
+                        UPDATE {buckets} b
+                        SET available = b.available + f.quantity, last_updated = CURRENT_TIMESTAMP
+                        FROM refunds f
+                        JOIN locked_buckets l ON l.bucket_id = f.bucket_id
+                        WHERE b.bucket_id = f.bucket_id
+                        RETURNING b.bucket_id
+                    )
+                    SELECT (SELECT COUNT(*) FROM expired), (SELECT COUNT(*) FROM refunded)
+                """).format(**_reservation_tables()), (batch_size,))
+                expired_count, _ = cur.fetchone()
+                conn.commit()
+                if expired_count:
+                    logger.info("Expired %s stock reservations", expired_count)
+                return True, expired_count
+    except Exception as e:
+        logger.error("Expire reservations error: %s", e)
+        return False, 0
+
+@timed_query
+def fulfil_reservation(reservation_id):
+    """Pick the stock for a held, unexpired reservation.
+
+    Draws the reserved quantity from the pair's inventory rows oldest first, marks the
+    reservation FULFILLED and records a PICK movement, all in one statement. Nothing is
+    written if the reservation is no longer held or the pair no longer has the stock.
+    """
+    try:
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql.SQL("""
+                    WITH reservation AS (
+                        SELECT reservation_id, sku_id, warehouse_id, quantity
+                        FROM {reservations}
+                        WHERE reservation_id = %(reservation_id)s
+                          AND status = 'HELD' AND expires_at > CURRENT_TIMESTAMP
+                        FOR UPDATE
+                    ),
+                    locked AS (
+                        SELECT i.id, i.quantity
+                        FROM {items} i
+                        JOIN reservation r ON i.sku_id = r.sku_id AND i.warehouse_id = r.warehouse_id
+                        ORDER BY i.id
+                        FOR UPDATE OF i
+                    ),
+                    takes AS (
+                        SELECT l.id,
+                               LEAST(l.quantity, GREATEST(0, r.quantity - COALESCE(SUM(l.quantity) OVER (
+                                   ORDER BY l.id ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING), 0))) AS take
+                        FROM locked l CROSS JOIN reservation r
+                    ),
+                    ready AS (
+                        SELECT r.* FROM reservation r
+                        WHERE (SELECT COALESCE(SUM(quantity), 0) FROM locked) >= r.quantity
+                    ),
+                    picked AS (
+                        UPDATE {items} t
+                        SET quantity = t.quantity - k.take, last_updated = CURRENT_TIMESTAMP
+                        FROM takes k
+                        WHERE t.id = k.id AND k.take > 0 AND EXISTS (SELECT 1 FROM ready)
+                        RETURNING t.id
+                    ),
+                    fulfilled AS (
+                        UPDATE {reservations} t
+                        SET status = 'FULFILLED', last_updated = CURRENT_TIMESTAMP
+                        FROM ready
+                        WHERE t.reservation_id = ready.reservation_id
+                        RETURNING t.reservation_id
+                    ),
+                    movement AS (
+                        INSERT INTO {movements} (sku_id, warehouse_id, movement_type, quantity, reference)
+                        SELECT sku_id, warehouse_id, 'PICK', -quantity, 'reservation:' || reservation_id
+                        FROM ready
+                        RETURNING movement_id
+                    )
+                    SELECT (SELECT COUNT(*) FROM reservation), (SELECT COUNT(*) FROM fulfilled),
+                           (SELECT COUNT(*) FROM picked)
+                """).format(**_reservation_tables()), {'reservation_id': reservation_id})
+                held, fulfilled, rows_picked = cur.fetchone()
+                conn.commit()
+                if not held:
+                    return False, {'error': 'Reservation is not held or has expired'}
+                if not fulfilled:
+                    return False, {'error': 'Insufficient on-hand stock to fulfil reservation'}
+                return True, {'reservation_id': reservation_id, 'rows_picked': rows_picked}
+    except Exception as e:
+        logger.error("Fulfil reservation error: %s", e)
+        return False, {'error': str(e)}
+
+@timed_query
+def get_available_to_promise(sku_id=None, warehouse_id=None):
+    """Get on-hand, reserved and available-to-promise quantities per SKU and warehouse."""
+    try:
+        with get_read_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql.SQL("""
+                    SELECT sku_id, warehouse_id, on_hand, reserved, available_to_promise
+                    FROM {}.{}
+                    WHERE (%(sku_id)s::int4 IS NULL OR sku_id = %(sku_id)s)
+                      AND (%(warehouse_id)s::int4 IS NULL OR warehouse_id = %(warehouse_id)s)
+                    ORDER BY sku_id, warehouse_id
+                """).format(
+                    sql.Identifier(get_schema_name()),
+                    sql.Identifier(get_available_to_promise_view_name())
+                ), {'sku_id': sku_id, 'warehouse_id': warehouse_id})
+                return [
+                    {
+                        'sku_id': row[0],
+                        'warehouse_id': row[1],
+                        'on_hand': int(row[2]),
+                        'reserved': int(row[3]),
+                        'available_to_promise': int(row[4])
+                    }
+                    for row in cur.fetchall()
+                ]
+    except Exception as e:
+        logger.error("Get available to promise error: %s", e)
+        return []
+
+# Purchase order functions
+PURCHASE_ORDER_CSV_COLUMNS = [
+    'batch_id', 'order_id', 'tracking_number', 'supplier_name', 'order_date', 'eta_date',
+    'sku_code', 'item_name', 'warehouse_name', 'on_hand', 'minimum_stock',
+    'quantity', 'unit_price', 'line_value'
+]
+
+@timed_query
+def get_replenishment_lines():
+    """Get every low-stock (sku, warehouse) pair with its reorder quantity and supplier in one query.
+
+    The pairs come from low_stock_items_query(), so the low-stock page and the purchase orders
+    share one definition, with on-hand stock read from the ledger. The reorder quantity is the
+    shortage below minimum stock, or one minimum-stock's worth when the pair sits exactly at its
+    minimum. Lines are priced at the pair's quantity-weighted unit price and assigned to its most
+    recently used supplier. Pairs without a warehouse are included with warehouse_id None.
+    """
+    try:
+        with get_read_connection() as conn:
+            with conn.cursor() as cur:
+                schema = get_schema_name()
+                cur.execute(sql.SQL("""
+                    WITH low_stock AS ({low_stock})
+                    SELECT p.supplier_id, s.supplier_name, l.sku_id, l.sku_code, l.item_name,
+                           l.warehouse_id, l.warehouse_name, l.quantity AS on_hand, l.minimum_stock,
+                           CASE WHEN l.minimum_stock > l.quantity THEN l.minimum_stock - l.quantity
+                                ELSE l.minimum_stock END AS quantity,
+                           COALESCE(p.weighted_price, l.unit_price, sk.unit_price, 0) AS unit_price
+                    FROM low_stock l
+                    JOIN {skus} sk ON sk.sku_id = l.sku_id
+                    LEFT JOIN LATERAL (
+                        SELECT SUM(i.quantity * i.unit_price) / NULLIF(SUM(i.quantity), 0) AS weighted_price,
+                               (ARRAY_AGG(i.supplier_id ORDER BY i.last_updated DESC NULLS LAST, i.id DESC)
+                                    FILTER (WHERE i.supplier_id IS NOT NULL))[1] AS supplier_id
+                        FROM {items} i
+                        WHERE i.sku_id = l.sku_id AND i.warehouse_id IS NOT DISTINCT FROM l.warehouse_id
+                    ) p ON true
+                    LEFT JOIN {suppliers} s ON s.supplier_id = p.supplier_id
+                    WHERE l.minimum_stock > 0
+                    ORDER BY s.supplier_name NULLS LAST, l.warehouse_id NULLS LAST, l.sku_code
+                """).format(
+                    low_stock=low_stock_items_query(),
+                    items=sql.SQL("{}.{}").format(sql.Identifier(schema), sql.Identifier(os.getenv("POSTGRES_TABLE", "inventory_items"))),
+                    skus=sql.SQL("{}.{}").format(sql.Identifier(schema), sql.Identifier(get_sku_table_name())),
+                    suppliers=sql.SQL("{}.{}").format(sql.Identifier(schema), sql.Identifier(get_supplier_table_name()))
+                ))
+                columns = [desc.name for desc in cur.description]
+                return [dict(zip(columns, row)) for row in cur.fetchall()]
+    except Exception as e:
+        logger.error("Get replenishment lines error: %s", e)
+        return []
+
+@timed_query
+def generate_purchase_orders():
+    """Generate one purchase order per supplier covering every low-stock (sku, warehouse) pair.
+
+    Low-stock lines are read in one query, grouped by supplier in memory and persisted with a
+    COPY into the purchase order header and line tables in a single transaction. Low-stock
+    pairs without a warehouse have nowhere to be delivered, so they are not ordered and are
+    returned as unassigned_lines instead. Returns (success, batch) where batch holds the
+    batch_id and the generated orders.
+    """
+    lines = get_replenishment_lines()
+    unassigned = [{key: line[key] for key in ('sku_id', 'sku_code', 'item_name', 'on_hand', 'minimum_stock', 'quantity')}
+                  for line in lines if line['warehouse_id'] is None]
+    lines = [line for line in lines if line['warehouse_id'] is not None]
+    if not lines:
+        return True, {'batch_id': None, 'orders': [], 'order_count': 0, 'line_count': 0, 'total_value': 0.0,
+                      'unassigned_lines': unassigned}
+
+    order_date = datetime.now()
+    batch_id = f"PO-{order_date.strftime('%Y%m%d%H%M%S')}-{os.urandom(2).hex()}"
+    orders = {}
+    for line in lines:
+        line['unit_price'] = round(float(line['unit_price']), 2)
+        line['line_value'] = round(line['quantity'] * line['unit_price'], 2)
+        order = orders.get(line['supplier_id'])
+        if order is None:
+            order = orders[line['supplier_id']] = {
+                'supplier_id': line['supplier_id'],
+                'supplier_name': line['supplier_name'] or 'Direct Order',
+                'lines': []
+            }
+        order['lines'].append(line)
+
+    for order in orders.values():
+        identifiers = generate_order_identifiers(order_date)
+        order['total_value'] = round(sum(line['line_value'] for line in order['lines']), 2)
+        order.update(
+            order_id=identifiers['order_id'],
+            tracking_number=identifiers['tracking_number'],
+            order_date=order_date.isoformat(timespec='seconds'),
+            eta_date=identifiers['eta_date'].date().isoformat(),
+            eta_days=identifiers['eta_days'],
+            status='CONFIRMED',
+            payment_method='Net 30 Terms',
+            shipping_method=get_shipping_method(order['total_value']),
+            line_count=len(order['lines'])
+        )
+
     try:
         with get_connection() as conn:
             with conn.cursor() as cur:
                 schema = get_schema_name()
-                table_name = os.getenv("POSTGRES_TABLE", "inventory_items")
-                cur.execute(sql.SQL("DELETE FROM {}.{} WHERE id = %s").format(sql.Identifier(schema), sql.Identifier(table_name)), (item_id,))
+                with cur.copy(sql.SQL("""
+                    COPY {}.{} (order_id, batch_id, supplier_id, supplier_name, tracking_number, status,
+                                payment_method, shipping_method, order_date, eta_date, line_count, total_value)
+                    FROM STDIN
+                """).format(sql.Identifier(schema), sql.Identifier(get_purchase_order_table_name()))) as copy:
+                    for order in orders.values():
+                        copy.write_row((
+                            order['order_id'], batch_id, order['supplier_id'], order['supplier_name'],
+                            order['tracking_number'], order['status'], order['payment_method'],
+                            order['shipping_method'], order_date, order['eta_date'],
+                            order['line_count'], order['total_value']
+                        ))
+                with cur.copy(sql.SQL("""
+                    COPY {}.{} (order_id, sku_id, sku_code, item_name, warehouse_id, warehouse_name,
+                                on_hand, minimum_stock, quantity, unit_price, line_value)
+                    FROM STDIN
+                """).format(sql.Identifier(schema), sql.Identifier(get_purchase_order_line_table_name()))) as copy:
+                    for order in orders.values():
+                        for line in order['lines']:
+                            copy.write_row((
+                                order['order_id'], line['sku_id'], line['sku_code'], line['item_name'],
+                                line['warehouse_id'], line['warehouse_name'], line['on_hand'],
+                                line['minimum_stock'], line['quantity'], line['unit_price'], line['line_value']
+                            ))
                 conn.commit()
-                return True
     except Exception as e:
-        print(f"Delete inventory item error: {e}")
-        return False
+        logger.error("Generate purchase orders error: %s", e)
+        return False, {'error': str(e)}
 
-def get_low_stock_items():
-    """Get items with quantity at or below minimum stock level, grouped by SKU and warehouse."""
+    for order in orders.values():
+        for line in order['lines']:
+            del line['supplier_id'], line['supplier_name']
+    logger.info("Generated %s purchase orders with %s lines in batch %s", len(orders), len(lines), batch_id)
+    return True, {
+        'batch_id': batch_id,
+        'orders': list(orders.values()),
+        'order_count': len(orders),
+        'line_count': len(lines),
+        'total_value': round(sum(order['total_value'] for order in orders.values()), 2),
+        'unassigned_lines': unassigned
+    }
+
+@timed_query
+def get_purchase_order_batch(batch_id):
+    """Get the purchase order lines of a replenishment batch, in PURCHASE_ORDER_CSV_COLUMNS order."""
     try:
-        with get_connection() as conn:
+        with get_read_connection() as conn:
             with conn.cursor() as cur:
                 schema = get_schema_name()
-                table_name = os.getenv("POSTGRES_TABLE", "inventory_items")
-                sku_table = get_sku_table_name()
-                category_table = get_category_table_name()
-                warehouse_table = get_warehouse_table_name()
                 cur.execute(sql.SQL("""
-                    SELECT 
-                        MIN(i.id) as id,
-                        sk.item_name,
-                        sk.description,
-                        c.category_name,
-                        w.warehouse_name,
-                        NULL as supplier_name,
-                        SUM(i.quantity) as quantity,
-                        AVG(i.unit_price) as unit_price,
-                        STRING_AGG(DISTINCT i.location, ', ') as location,
-                        MAX(i.minimum_stock) as minimum_stock,
-                        MIN(i.date_added) as date_added,
-                        MAX(i.last_updated) as last_updated,
-                        sk.category_id,
-                        i.warehouse_id,
-                        NULL as supplier_id,
-                        sk.sku_code,
-                        i.sku_id
-                    FROM {}.{} i
-                    INNER JOIN {}.{} sk ON i.sku_id = sk.sku_id
-                    LEFT JOIN {}.{} c ON sk.category_id = c.category_id
-                    LEFT JOIN {}.{} w ON i.warehouse_id = w.warehouse_id
-                    GROUP BY i.sku_id, sk.item_name, sk.description, c.category_name,
-                             w.warehouse_name, i.warehouse_id, sk.category_id, sk.sku_code
-                    HAVING MAX(i.minimum_stock) IS NOT NULL AND SUM(i.quantity) <= MAX(i.minimum_stock)
-                    ORDER BY (SUM(i.quantity) - MAX(i.minimum_stock)) ASC
+                    SELECT o.batch_id, o.order_id, o.tracking_number, o.supplier_name, o.order_date, o.eta_date,
+                           l.sku_code, l.item_name, l.warehouse_name, l.on_hand, l.minimum_stock,
+                           l.quantity, l.unit_price, l.line_value
+                    FROM {}.{} o
+                    JOIN {}.{} l ON l.order_id = o.order_id
+                    WHERE o.batch_id = %s
+                    ORDER BY o.supplier_name NULLS LAST, o.order_id, l.line_id
                 """).format(
-                    sql.Identifier(schema), sql.Identifier(table_name),
-                    sql.Identifier(schema), sql.Identifier(sku_table),
-                    sql.Identifier(schema), sql.Identifier(category_table),
-                    sql.Identifier(schema), sql.Identifier(warehouse_table)
-                ))
+                    sql.Identifier(schema), sql.Identifier(get_purchase_order_table_name()),
+                    sql.Identifier(schema), sql.Identifier(get_purchase_order_line_table_name())
+                ), (batch_id,))
                 return cur.fetchall()
     except Exception as e:
-        print(f"Get low stock items error: {e}")
+        logger.error("Get purchase order batch error: %s", e)
         return []
 
-def get_demand_forecast_suggestion(warehouse_id, category_id, sku_id, current_quantity, minimum_stock, new_quantity=0):
-    """Get suggested quantity based on demand forecast from model serving endpoint with smart inventory analysis."""
+def get_serving_token():
+    """Get a current OAuth token for model serving requests."""
+    if not refresh_oauth_token():
+        raise Exception("Failed to refresh OAuth token")
+    return postgres_password
+
+# Pooled keep-alive client for the model serving endpoint
+serving_config = config.get_model_serving_config()
+serving_client = ModelServingClient(
+    config.get_model_endpoint_url,
+    get_serving_token,
+    pool_size=serving_config['pool_size'],
+    latency_budget=serving_config['latency_budget'],
+    max_retries=serving_config['max_retries'],
+    breaker=CircuitBreaker(serving_config['breaker_failures'], serving_config['breaker_reset_seconds']),
+    latency=registry.histogram('inventory_model_serving_request_duration_seconds',
+                               'Model serving endpoint latency per attempt, retries included')
+)
+
+def serving_stat_samples(stat, labels=None):
+    """Scrape-time sample of one serving_client.stats() counter."""
+    return lambda: [(labels or {}, serving_client.stats()[stat])]
+
+registry.gauge('inventory_model_serving_circuit_state', 'Model serving circuit breaker state (1 for the current one)',
+               ['state'], callback=lambda: [({'state': state}, int(serving_client.breaker.state == state))
+                                            for state in (CircuitBreaker.CLOSED, CircuitBreaker.OPEN, CircuitBreaker.HALF_OPEN)])
+registry.counter('inventory_model_serving_circuit_opened_total', 'Times the model serving circuit opened',
+                 callback=lambda: [({}, serving_client.breaker.snapshot()['times_opened'])])
+registry.counter('inventory_model_serving_calls_total', 'Model serving calls by outcome', ['result'],
+                 callback=lambda: [({'result': 'success'}, serving_client.stats()['successes']),
+                                   ({'result': 'failure'}, serving_client.stats()['failures'])])
+registry.counter('inventory_model_serving_retries_total', 'Model serving attempts retried after a transient failure',
+                 callback=serving_stat_samples('retries'))
+registry.counter('inventory_model_serving_short_circuits_total', 'Model serving calls rejected while the circuit was open',
+                 callback=serving_stat_samples('short_circuits'))
+
+# Exported demand forecasting model scored in-process when FORECAST_MODE=local (loaded by warmup)
+local_model = None
+
+def is_forecast_model_available():
+    """Check if forecasts can be scored, either in-process or on the serving endpoint."""
+    return local_model is not None or config.is_model_endpoint_configured()
+
+# Raw model predictions per (warehouse_id, category_id, sku_id, month)
+forecast_cache = ForecastCache(config.get_forecast_cache_size(), config.get_forecast_cache_ttl_seconds())
+
+# In-flight serving calls per (warehouse_id, category_id, sku_id, months), shared by concurrent requests
+forecast_flights = SingleFlight()
+
+registry.counter('inventory_forecast_cache_lookups_total', 'Forecast cache lookups by result', ['result'],
+                 callback=lambda: [({'result': 'hit'}, forecast_cache.stats()['hits']),
+                                   ({'result': 'miss'}, forecast_cache.stats()['misses'])])
+registry.gauge('inventory_forecast_cache_entries', 'Predictions held in the forecast cache',
+               callback=lambda: [({}, len(forecast_cache))])
+registry.counter('inventory_forecast_flight_leader_calls_total', 'Forecast fetches made on behalf of concurrent requests',
+                 callback=lambda: [({}, forecast_flights.stats()['leader_calls'])])
+registry.counter('inventory_forecast_coalesced_total', "Forecast keys served by another request's in-flight fetch",
+                 callback=lambda: [({}, forecast_flights.stats()['coalesced'])])
+
+def get_forecast_months(horizon=3):
+    """Get the calendar months (1-12) covered by a forecast starting this month."""
+    current_month = datetime.now().month
+    return [((current_month + i - 1) % 12) + 1 for i in range(horizon)]
+
+FORECAST_FEATURE_COLUMNS = ["warehouse_id", "category_id", "sku_id", "month"]
+
+def build_forecast_payload(rows):
+    """Build a dataframe_split payload from (warehouse_id, category_id, sku_id, month) rows.
+
+    rows may be a sequence of tuples or a 2-D numpy array of any length; values are sent
+    as floats to match the model signature.
+    """
+    import numpy as np
+    if isinstance(rows, np.ndarray):
+        data = rows.astype(np.float64, copy=False).tolist()
+    else:
+        data = [[float(w), float(c), float(s), float(m)] for w, c, s, m in rows]
+    return {"dataframe_split": {"columns": FORECAST_FEATURE_COLUMNS, "data": data}}
+
+def invoke_model_endpoint(rows, timeout=None):
+    """Score (warehouse_id, category_id, sku_id, month) rows on the serving endpoint in one request.
+
+    timeout is the latency budget for the call including retries; it defaults to the
+    configured interactive budget. When a local model is loaded the same payload is
+    scored in-process instead.
+    """
+    payload = build_forecast_payload(rows)
+    
+    mode = 'local' if local_model is not None else 'serving'
     try:
-        # Check if model endpoint is configured
-        if not config.is_model_endpoint_configured():
-            print("Model endpoint not configured, using minimum stock logic")
-            # Fallback to minimum stock logic
-            if minimum_stock and current_quantity + new_quantity < minimum_stock:
-                needed_increase = minimum_stock - (current_quantity + new_quantity)
-                suggested_quantity = new_quantity + needed_increase
-                reasoning = f"Model endpoint not configured. Current inventory ({current_quantity}) + new quantity ({new_quantity}) = {current_quantity + new_quantity} below minimum stock ({minimum_stock}). Suggest adding {needed_increase} more items."
-            else:
-                suggested_quantity = new_quantity
-                reasoning = f"Model endpoint not configured. Current inventory ({current_quantity}) + new quantity ({new_quantity}) = {current_quantity + new_quantity} meets minimum stock requirement ({minimum_stock if minimum_stock else 'not set'})."
-            
-            return {
-                'suggested_quantity': suggested_quantity,
-                'forecast_90_days': 0,
-                'safety_stock': minimum_stock if minimum_stock else 1,
-                'current_total_available': current_quantity + new_quantity,
-                'recommended_total': minimum_stock if minimum_stock else current_quantity + new_quantity,
-                'reasoning': reasoning
-            }
-        
-        # Prepare batch data for next 3 months
-        current_month = datetime.now().month
-        months = [((current_month + i - 1) % 12) + 1 for i in range(3)]
-        
-        # Create batch data with all 3 months
-        batch_data = pd.DataFrame([
-            {
-                "warehouse_id": float(warehouse_id),
-                "category_id": float(category_id),
-                "sku_id": float(sku_id),
-                "month": float(m)
-            }
-            for m in months
-        ])
-        
-        # Prepare the request payload
-        payload = {
-            "dataframe_split": {
-                "columns": batch_data.columns.tolist(),
-                "data": batch_data.values.tolist()
-            }
-        }
+        if local_model is not None:
+            predictions = local_model.predict_payload(payload)
+        else:
+            # Call the serving endpoint through the pooled client
+            logger.debug("Calling model endpoint with %s rows", len(rows))
+            predictions = serving_client.predict(payload, latency_budget=timeout)
+    except CircuitOpenError:
+        FORECAST_CALLS.inc(mode=mode, result='circuit_open')
+        raise
+    except Exception:
+        FORECAST_CALLS.inc(mode=mode, result='error')
+        raise
+    FORECAST_CALLS.inc(mode=mode, result='success')
+    FORECAST_ROWS.inc(len(rows), mode=mode)
+    if len(predictions) != len(rows):
+        raise Exception(f"Unexpected response format: {len(predictions)} predictions for {len(rows)} rows")
+    return [float(p) for p in predictions]
+
+@timed_query
+def get_precomputed_predictions(keys):
+    """Get stored predictions for (warehouse_id, category_id, sku_id, month) keys from the demand forecast table.
+
+    Only forecasts generated within the configured maximum age are returned.
+    """
+    if not keys:
+        return {}
+    with get_read_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql.SQL("""
+                SELECT warehouse_id, category_id, sku_id, forecast_month, predicted_demand
+                FROM {}.{}
+                WHERE (warehouse_id, category_id, sku_id, forecast_month) IN (
+                    SELECT * FROM unnest(%s::int4[], %s::int4[], %s::int4[], %s::int2[])
+                )
+                  AND date_generated > %s
+            """).format(sql.Identifier(get_schema_name()), sql.Identifier(get_demand_table_name())), (
+                [key[0] for key in keys], [key[1] for key in keys],
+                [key[2] for key in keys], [key[3] for key in keys],
+                datetime.now() - timedelta(hours=config.get_forecast_max_age_hours())
+            ))
+            return {tuple(row[:4]): float(row[4]) for row in cur.fetchall()}
+
+def score_forecast_rows(rows, batch_size=None, timeout=None):
+    """Score rows on the serving endpoint, splitting them into requests of at most batch_size rows.
+
+    Returns (predictions, requests_made).
+    """
+    batch_size = batch_size or config.get_forecast_batch_size()
+    predictions = []
+    requests_made = 0
+    for offset in range(0, len(rows), batch_size):
+        predictions.extend(invoke_model_endpoint(rows[offset:offset + batch_size], timeout=timeout))
+        requests_made += 1
+    return predictions, requests_made
+
+def fetch_remote_predictions(keys):
+    """Score keys on the serving endpoint, sharing in-flight calls with concurrent requests.
+
+    Keys are grouped per (warehouse_id, category_id, sku_id, months); groups another request
+    is already fetching are waited on, and the rest are scored in one request.
+    """
+    groups = {}
+    for key in keys:
+        groups.setdefault(key[:3], []).append(key[3])
+    flight_keys = [(*item, tuple(months)) for item, months in groups.items()]
+    
+    def score(leading):
+        rows = [(w, c, s, m) for w, c, s, months in leading for m in months]
+        predictions = iter(score_forecast_rows(rows)[0])
+        return {flight_key: [next(predictions) for _ in flight_key[3]] for flight_key in leading}
+    
+    results = forecast_flights.do_many(flight_keys, score)
+    return {
+        (w, c, s, m): prediction
+        for (w, c, s, months), predictions in results.items()
+        for m, prediction in zip(months, predictions)
+    }
+
+def fetch_predictions(keys, allow_remote=True):
+    """Get the model's demand prediction for many (warehouse_id, category_id, sku_id, month) keys.
+
+    Predictions come from the in-process cache first, then the precomputed demand forecast
+    table, and only then from the serving endpoint (one coalesced request for all remaining keys,
+    skipped when allow_remote is False). With a local model loaded, cache misses are scored
+    in-process directly. Returns a dict of the keys that could be resolved.
+    """
+    predictions = {}
+    missing = []
+    for key in dict.fromkeys(keys):
+        prediction = forecast_cache.get(key)
+        if prediction is None:
+            missing.append(key)
+        else:
+            predictions[key] = prediction
+    
+    if missing:
+        try:
+            stored = get_precomputed_predictions(missing) if local_model is None else {}
+        except Exception as e:
+            logger.error("Get precomputed forecasts error: %s", e)
+            stored = {}
+        remaining = [key for key in missing if key not in stored]
+        if remaining and allow_remote:
+            stored.update(fetch_remote_predictions(remaining))
+        for key, prediction in stored.items():
+            predictions[key] = prediction
+            forecast_cache.put(key, prediction)
+    
+    return predictions
+
+@timed_query
+def precompute_demand_forecasts(batch_size=None):
+    """Score every (warehouse, category, sku) in inventory for the next three months and store the results.
+
+    Combinations are sent to the serving endpoint in large dataframe_split batches and the
+    predictions are bulk-loaded into the demand forecast table with COPY and an upsert, so
+    interactive suggestions can be answered without calling the endpoint.
+    Returns (success, summary).
+    """
+    if not is_forecast_model_available():
+        return False, {'error': 'Model endpoint not configured'}
+    
+    batch_id = f"FC-{datetime.now().strftime('%Y%m%d%H%M%S')}-{os.urandom(2).hex()}"
+    start_time = time.time()
+    try:
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                schema = get_schema_name()
+                cur.execute(sql.SQL("""
+                    SELECT DISTINCT i.warehouse_id, sk.category_id, i.sku_id
+                    FROM {}.{} i
+                    JOIN {}.{} sk ON sk.sku_id = i.sku_id
+                    WHERE i.warehouse_id IS NOT NULL AND sk.category_id IS NOT NULL
+                    ORDER BY i.warehouse_id, sk.category_id, i.sku_id
+                """).format(
+                    sql.Identifier(schema), sql.Identifier(os.getenv("POSTGRES_TABLE", "inventory_items")),
+                    sql.Identifier(schema), sql.Identifier(get_sku_table_name())
+                ))
+                combinations = cur.fetchall()
         
-        # Get the endpoint URL and prepare headers
-        endpoint_url = config.get_model_endpoint_url()
+        months = get_forecast_months()
+        rows = [(w, c, s, m) for w, c, s in combinations for m in months]
+        predictions, requests_made = score_forecast_rows(rows, batch_size, timeout=120)
         
-        # Refresh OAuth token and prepare headers
-        if not refresh_oauth_token():
-            raise Exception("Failed to refresh OAuth token")
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    CREATE TEMP TABLE demand_forecast_load (
+                        warehouse_id int4, category_id int4, sku_id int4, forecast_month int2, predicted_demand float8
+                    ) ON COMMIT DROP
+                """)
+                with cur.copy("COPY demand_forecast_load FROM STDIN") as copy:
+                    for row, prediction in zip(rows, predictions):
+                        copy.write_row((*row, prediction))
+                cur.execute(sql.SQL("""
+                    INSERT INTO {}.{} (warehouse_id, category_id, sku_id, forecast_month, predicted_demand, batch_id, date_generated)
+                    SELECT warehouse_id, category_id, sku_id, forecast_month, predicted_demand, %s, CURRENT_TIMESTAMP
+                    FROM demand_forecast_load
+                    ON CONFLICT (warehouse_id, category_id, sku_id, forecast_month) DO UPDATE
+                    SET predicted_demand = EXCLUDED.predicted_demand,
+                        batch_id = EXCLUDED.batch_id,
+                        date_generated = EXCLUDED.date_generated
+                """).format(sql.Identifier(get_schema_name()), sql.Identifier(get_demand_table_name())), (batch_id,))
+                conn.commit()
         
-        headers = {
-            "Authorization": f"Bearer {postgres_password}",
-            "Content-Type": "application/json"
+        # Drop cached predictions so the fresh ones are read from the table
+        forecast_cache.clear()
+        summary = {
+            'batch_id': batch_id,
+            'combinations': len(combinations),
+            'predictions': len(predictions),
+            'requests': requests_made,
+            'duration_ms': round((time.time() - start_time) * 1000, 1)
         }
-        
-        # Call the serving endpoint
-        print(f"Calling model endpoint: {endpoint_url}")
-        response = requests.post(
-            endpoint_url,
-            headers=headers,
-            json=payload,
-            timeout=30
+        logger.info("Precomputed %s demand forecasts for %s combinations in %s requests",
+                    len(predictions), len(combinations), requests_made)
+        return True, summary
+    except Exception as e:
+        logger.error("Precompute demand forecasts error: %s", e)
+        return False, {'error': str(e)}
+
+def normalize_forecast_entries(entries):
+    """Validate demand forecast batch entries.
+
+    Each entry is a dict with warehouse_id, category_id and sku_id plus optional
+    current_quantity, minimum_stock and new_quantity. Returns (normalized, errors).
+    """
+    normalized = []
+    errors = []
+    for entry_num, entry in enumerate(entries, start=1):
+        try:
+            normalized.append({
+                'warehouse_id': int(entry['warehouse_id']),
+                'category_id': int(entry['category_id']),
+                'sku_id': int(entry['sku_id']),
+                'current_quantity': int(entry.get('current_quantity') or 0),
+                'minimum_stock': int(entry['minimum_stock']) if entry.get('minimum_stock') is not None else None,
+                'new_quantity': int(entry.get('new_quantity') or 0)
+            })
+        except (KeyError, TypeError, ValueError, AttributeError):
+            errors.append(f"Entry {entry_num}: expected warehouse_id, category_id and sku_id as integers")
+    return normalized, errors
+
+def get_demand_forecast_suggestions(entries):
+    """Get suggested quantities for many items from one set of demand forecasts.
+
+    Predictions for the next 3 months of every entry are resolved together (cache, then the
+    precomputed table, then one serving request for the rest), and the reorder arithmetic
+    runs vectorized over the whole batch. Entries are dicts as accepted by
+    normalize_forecast_entries; one suggestion dict is returned per entry, in order.
+    """
+    if not entries:
+        return []
+    import numpy as np
+    current = np.array([entry['current_quantity'] for entry in entries], dtype=np.int64)
+    new = np.array([entry['new_quantity'] for entry in entries], dtype=np.int64)
+    minimum = np.array([entry['minimum_stock'] or 0 for entry in entries], dtype=np.int64)
+    total_available = current + new
+    months = get_forecast_months()
+    
+    try:
+        # Forecast the next 3 months from cached, precomputed or freshly fetched per-month predictions
+        endpoint_configured = is_forecast_model_available()
+        keys = [
+            [(entry['warehouse_id'], entry['category_id'], entry['sku_id'], m) for m in months]
+            for entry in entries
+        ]
+        predictions = fetch_predictions(
+            [key for entry_keys in keys for key in entry_keys],
+            allow_remote=local_model is not None or (endpoint_configured and not config.is_forecast_precomputed_only())
         )
-        
-        if response.status_code != 200:
-            raise Exception(f"Model endpoint returned status {response.status_code}: {response.text}")
-        
-        # Parse the response
-        predictions_data = response.json()
-        
-        # The response should have predictions for all 3 months
-        # Sum the predictions to get total forecast for next 3 months
-        if 'predictions' in predictions_data:
-            predictions = predictions_data['predictions']
-            total_forecast = sum(float(p) for p in predictions)
+    except Exception as e:
+        # An open circuit is expected while the endpoint is down; other failures get a
+        # warning, with the traceback only when debugging
+        if isinstance(e, CircuitOpenError):
+            logger.debug("Get demand forecast error: %s", e)
         else:
-            raise Exception(f"Unexpected response format: {predictions_data}")
-        
-        print(f"Model prediction for next 3 months: {total_forecast}")
-        
-        # Calculate total available inventory (current + new quantity being added)
-        total_available = current_quantity + new_quantity
+            logger.warning("Get demand forecast error: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
         
-        # Calculate safety stock (minimum_stock or 10% of total forecast, whichever is higher)
-        safety_stock = max(
-            minimum_stock if minimum_stock else 0,
-            max(1, int(total_forecast * 0.1))
-        )
-        
-        # Calculate recommended total inventory (forecast + safety stock)
-        recommended_total = int(total_forecast) + safety_stock
-        
-        # Check if current inventory + new quantity meets demand
-        if total_available >= recommended_total:
-            # Current inventory is sufficient, suggest minimal increase or no change
-            if total_available >= recommended_total + safety_stock:
-                # Very well stocked, suggest no increase
-                suggested_quantity = new_quantity
-                reasoning = f"Current inventory ({current_quantity}) + new quantity ({new_quantity}) = {total_available} is sufficient for 90-day AI forecast ({int(total_forecast)}) + safety stock ({safety_stock}). No additional increase needed."
+        # Fallback to minimum stock logic on error
+        FORECAST_FALLBACKS.inc(len(entries), reason='circuit_open' if isinstance(e, CircuitOpenError) else 'error')
+        below_minimum = (minimum > 0) & (total_available < minimum)
+        suggested = np.where(below_minimum, new + minimum - total_available, new + 1)
+        results = []
+        for i in range(len(entries)):
+            if below_minimum[i]:
+                reasoning = f"Error retrieving AI forecast: {str(e)}. Current inventory ({current[i]}) + new quantity ({new[i]}) = {total_available[i]} below minimum stock ({minimum[i]}). Suggest adding {minimum[i] - total_available[i]} more items."
             else:
-                # Adequate but could use small buffer
-                suggested_quantity = new_quantity + max(1, int(safety_stock * 0.2))
-                reasoning = f"Current inventory ({current_quantity}) + new quantity ({new_quantity}) = {total_available} meets AI forecast ({int(total_forecast)}) but adding small buffer for safety."
-        else:
-            # Insufficient inventory, calculate needed increase
-            needed_increase = recommended_total - total_available
-            suggested_quantity = new_quantity + needed_increase
-            reasoning = f"Current inventory ({current_quantity}) + new quantity ({new_quantity}) = {total_available} insufficient for 90-day AI forecast ({int(total_forecast)}) + safety stock ({safety_stock}). Suggest adding {needed_increase} more items."
-        
-        return {
-            'suggested_quantity': suggested_quantity,
-            'forecast_90_days': int(total_forecast),
-            'safety_stock': safety_stock,
-            'current_total_available': total_available,
-            'recommended_total': recommended_total,
-            'reasoning': reasoning
-        }
-        
-    except Exception as e:
-        print(f"Get demand forecast error: {e}")
-        import traceback
-        traceback.print_exc()
+                reasoning = f"Error retrieving AI forecast: {str(e)}. Suggesting small increase."
+            results.append({
+                'suggested_quantity': int(suggested[i]),
+                'forecast_90_days': 0,
+                'safety_stock': int(minimum[i]) if minimum[i] else 1,
+                'current_total_available': int(total_available[i]),
+                'recommended_total': int(total_available[i]) + 1,
+                'reasoning': reasoning
+            })
+        return results
+    
+    has_forecast = np.array([all(key in predictions for key in entry_keys) for entry_keys in keys])
+    totals = np.array([
+        sum(predictions[key] for key in entry_keys) if has_forecast[i] else 0.0
+        for i, entry_keys in enumerate(keys)
+    ])
+    forecast_90_days = np.trunc(totals).astype(np.int64)
+    
+    # Calculate safety stock (minimum_stock or 10% of total forecast, whichever is higher)
+    safety_stock = np.maximum(minimum, np.maximum(1, np.trunc(totals * 0.1).astype(np.int64)))
+    
+    # Calculate recommended total inventory (forecast + safety stock)
+    recommended_total = forecast_90_days + safety_stock
+    
+    # Well stocked: no increase; adequate: small buffer; insufficient: cover the gap
+    sufficient = total_available >= recommended_total
+    well_stocked = total_available >= recommended_total + safety_stock
+    buffer = np.maximum(1, np.trunc(safety_stock * 0.2).astype(np.int64))
+    suggested = np.where(sufficient, np.where(well_stocked, new, new + buffer), new + recommended_total - total_available)
+    
+    # Without a forecast, fall back to the minimum stock
+    below_minimum = (minimum > 0) & (total_available < minimum)
+    fallback_suggested = np.where(below_minimum, new + minimum - total_available, new)
+    fallback_reason = "No precomputed forecast available" if endpoint_configured else "Model endpoint not configured"
+    if not has_forecast.all():
+        FORECAST_FALLBACKS.inc(int((~has_forecast).sum()), reason='no_forecast' if endpoint_configured else 'not_configured')
+    
+    results = []
+    for i in range(len(entries)):
+        if not has_forecast[i]:
+            if below_minimum[i]:
+                reasoning = f"{fallback_reason}. Current inventory ({current[i]}) + new quantity ({new[i]}) = {total_available[i]} below minimum stock ({minimum[i]}). Suggest adding {minimum[i] - total_available[i]} more items."
+            else:
+                reasoning = f"{fallback_reason}. Current inventory ({current[i]}) + new quantity ({new[i]}) = {total_available[i]} meets minimum stock requirement ({minimum[i] if minimum[i] else 'not set'})."
+            results.append({
+                'suggested_quantity': int(fallback_suggested[i]),
+                'forecast_90_days': 0,
+                'safety_stock': int(minimum[i]) if minimum[i] else 1,
+                'current_total_available': int(total_available[i]),
+                'recommended_total': int(minimum[i]) if minimum[i] else int(total_available[i]),
+                'reasoning': reasoning
+            })
+            continue
         
-        # Fallback to minimum stock logic on error
-        if minimum_stock and current_quantity + new_quantity < minimum_stock:
-            needed_increase = minimum_stock - (current_quantity + new_quantity)
-            suggested_quantity = new_quantity + needed_increase
-            reasoning = f"Error retrieving AI forecast: {str(e)}. Current inventory ({current_quantity}) + new quantity ({new_quantity}) = {current_quantity + new_quantity} below minimum stock ({minimum_stock}). Suggest adding {needed_increase} more items."
+        if sufficient[i] and well_stocked[i]:
+            reasoning = f"Current inventory ({current[i]}) + new quantity ({new[i]}) = {total_available[i]} is sufficient for 90-day AI forecast ({forecast_90_days[i]}) + safety stock ({safety_stock[i]}). No additional increase needed."
+        elif sufficient[i]:
+            reasoning = f"Current inventory ({current[i]}) + new quantity ({new[i]}) = {total_available[i]} meets AI forecast ({forecast_90_days[i]}) but adding small buffer for safety."
         else:
-            suggested_quantity = new_quantity + 1
-            reasoning = f"Error retrieving AI forecast: {str(e)}. Suggesting small increase."
-        
-        return {
-            'suggested_quantity': suggested_quantity,
-            'forecast_90_days': 0,
-            'safety_stock': minimum_stock if minimum_stock else 1,
-            'current_total_available': current_quantity + new_quantity,
-            'recommended_total': current_quantity + new_quantity + 1,
+            reasoning = f"Current inventory ({current[i]}) + new quantity ({new[i]}) = {total_available[i]} insufficient for 90-day AI forecast ({forecast_90_days[i]}) + safety stock ({safety_stock[i]}). Suggest adding {recommended_total[i] - total_available[i]} more items."
+        results.append({
+            'suggested_quantity': int(suggested[i]),
+            'forecast_90_days': int(forecast_90_days[i]),
+            'safety_stock': int(safety_stock[i]),
+            'current_total_available': int(total_available[i]),
+            'recommended_total': int(recommended_total[i]),
             'reasoning': reasoning
-        }
+        })
+    return results
+
+def get_demand_forecast_suggestion(warehouse_id, category_id, sku_id, current_quantity, minimum_stock, new_quantity=0):
+    """Get suggested quantity based on demand forecast from model serving endpoint with smart inventory analysis."""
+    return get_demand_forecast_suggestions([{
+        'warehouse_id': int(warehouse_id),
+        'category_id': int(category_id),
+        'sku_id': int(sku_id),
+        'current_quantity': current_quantity or 0,
+        'minimum_stock': minimum_stock,
+        'new_quantity': new_quantity or 0
+    }])[0]
 
 def get_dashboard_embed_url():
     """Generate dashboard embed URL with proper authentication."""
@@ -1773,7 +3970,7 @@ def get_dashboard_embed_url():
         
         return embed_url
     except Exception as e:
-        print(f"Dashboard URL generation error: {e}")
+        logger.error("Dashboard URL generation error: %s", e)
         return None
 
 def get_dashboard_public_url():
@@ -1781,7 +3978,7 @@ def get_dashboard_public_url():
     try:
         return config.get_dashboard_public_url()
     except Exception as e:
-        print(f"Dashboard public URL error: {e}")
+        logger.error("Dashboard public URL error: %s", e)
         return None
 
 def is_token_expired():
@@ -1792,16 +3989,124 @@ def is_token_expired():
     # Consider token expired if it's been 13+ minutes (15 min expiry with 2 min buffer)
     return time.time() - last_password_refresh > 780
 
-# Initialize Flask app
-app = Flask(__name__)
-app.secret_key = os.getenv('SECRET_KEY', 'dev-secret-key')
-app.config['MAX_CONTENT_LENGTH'] = MAX_FILE_SIZE
+# Whether the database is initialized: None until warmup() succeeds, so a failed attempt is retried
+database_ready = None
+startup_configured = False
+warmup_lock = threading.Lock()
+
+def warmup():
+    """Run the one-time startup work: print the configuration, load the local forecast model
+    (in local mode), initialize the database, which takes a token, opens the pool, runs
+    the DDL and may load sample data, and pre-warm the pools.
+
+    Runs on the first request or when called explicitly (`flask --app app warmup`,
+    `python app.py`). If the database can't be initialized, the next call tries again.
+    Returns whether the database is ready.
+    """
+    global database_ready, startup_configured, local_model
+    if database_ready is not None:
+        return database_ready
+    with warmup_lock:
+        if database_ready is None:
+            if not startup_configured:
+                config.print_config_summary()
+                if config.get_forecast_mode() == 'local':
+                    from local_model import load_local_model
+                    local_model = load_local_model(config.get_local_model_path())
+                startup_configured = True
+            if init_database():
+                prewarm_connection_pools()
+                database_ready = True
+            else:
+                logger.error("Failed to initialize database; retrying on the next request")
+                return False
+    return database_ready
+
+def create_app():
+    """Create the Flask app with this module's routes and CLI commands registered.
+
+    Nothing contacts Databricks or the database here; warmup() runs before the first
+    request is handled, or earlier if called explicitly.
+    """
+    flask_app = Flask(__name__)
+    flask_app.secret_key = os.getenv('SECRET_KEY', 'dev-secret-key')
+    flask_app.config['MAX_CONTENT_LENGTH'] = MAX_FILE_SIZE
+    
+    @flask_app.before_request
+    def bind_request_id():
+        # Correlates every log record of this request; a caller-supplied X-Request-ID is kept
+        g.request_id_token = request_id.set(new_request_id(request.headers.get('X-Request-ID')))
+    
+    @flask_app.before_request
+    def warmup_before_first_request():
+        warmup()
+    
+    @flask_app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+    
+    @flask_app.after_request
+    def record_request_latency(response):
+        started = g.get('request_started')
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            REQUEST_LATENCY.observe(time.perf_counter() - started, route=route,
+                                    method=request.method, status=response.status_code)
+        return response
+    
+    @flask_app.after_request
+    def echo_request_id(response):
+        if request_id.get():
+            response.headers['X-Request-ID'] = request_id.get()
+        return response
+    
+    @flask_app.teardown_request
+    def unbind_request_id(error=None):
+        token = g.pop('request_id_token', None)
+        if token is not None:
+            request_id.reset(token)
+    
+    @flask_app.after_request
+    def pin_reads_after_write(response):
+        # Read this session's own writes from the primary until the replica has caught up
+        if (request.method not in READ_ONLY_METHODS and response.status_code < 400
+                and config.get_read_replica_host()):
+            session['read_primary_until'] = time.time() + config.get_read_your_writes_window()
+        return response
+    
+    profiling = config.get_profiling_settings()
+    if profiling['enabled']:
+        # Installed only when enabled, so requests pay nothing for it otherwise
+        from profiler import install_request_profiler
+        install_request_profiler(flask_app, profiling['token'], profiling['interval_ms'] / 1000)
+    
+    for rule, view_func, options in routes:
+        flask_app.add_url_rule(rule, view_func=view_func, **options)
+    for command in cli_commands:
+        flask_app.cli.add_command(command)
+    
+    return flask_app
+
+# Views and CLI commands defined below; create_app() registers them on each app it builds
+routes = []
+cli_commands = []
 
-# Initialize database
-if not init_database():
-    print("Failed to initialize database")
+def route(rule, **options):
+    """Like Flask's app.route, but records the view for create_app() to register."""
+    def decorator(view_func):
+        routes.append((rule, view_func, options))
+        return view_func
+    return decorator
 
-@app.route('/')
+def cli_command(name):
+    """Like Flask's app.cli.command, but records the command for create_app() to register."""
+    def decorator(func):
+        command = click.command(name)(with_appcontext(func))
+        cli_commands.append(command)
+        return command
+    return decorator
+
+@route('/')
 def index():
     """Main page showing all inventory items."""
     items = get_inventory_items()
@@ -1817,7 +4122,7 @@ def index():
     return render_template('index.html', items=items, low_stock_count=len(low_stock_items), 
                          warehouses=warehouses, total_value=total_value, oms_confirmation=oms_confirmation)
 
-@app.route('/add', methods=['GET', 'POST'])
+@route('/add', methods=['GET', 'POST'])
 def add_item_route():
     """Add a new inventory item."""
     if request.method == 'POST':
@@ -1831,16 +4136,11 @@ def add_item_route():
         if sku_id and quantity is not None and unit_price is not None:
             if add_inventory_item(sku_id, quantity, unit_price, warehouse_id, supplier_id, None, minimum_stock):
                 # Get details for OMS confirmation
-                sku_details = get_sku_details(sku_id)
-                warehouse_details = get_warehouse_details(warehouse_id) if warehouse_id else None
-                supplier_details = get_supplier_details(supplier_id) if supplier_id else None
+                order_details = get_order_details(sku_id, warehouse_id, supplier_id)
                 
                 # Generate OMS order confirmation
-                if sku_details:
-                    sku_code = sku_details[1]
-                    item_name = sku_details[2]
-                    warehouse_name = warehouse_details[1] if warehouse_details else None
-                    supplier_name = supplier_details[1] if supplier_details else None
+                if order_details:
+                    sku_code, item_name, warehouse_name, supplier_name = order_details
                     
                     oms_confirmation = generate_oms_order_confirmation(
                         sku_code, item_name, quantity, unit_price, warehouse_name, supplier_name
@@ -1862,7 +4162,7 @@ def add_item_route():
     low_stock_items = get_low_stock_items()
     return render_template('add_item.html', categories=categories, warehouses=warehouses, suppliers=suppliers, low_stock_count=len(low_stock_items))
 
-@app.route('/upload-csv', methods=['GET', 'POST'])
+@route('/upload-csv', methods=['GET', 'POST'])
 def upload_csv_route():
     """Upload CSV file to add multiple inventory items."""
     if request.method == 'POST':
@@ -1928,7 +4228,7 @@ def upload_csv_route():
     low_stock_items = get_low_stock_items()
     return render_template('upload_csv.html', low_stock_count=len(low_stock_items))
 
-@app.route('/download-template')
+@route('/download-template')
 def download_template():
     """Download CSV template file."""
     from flask import Response
@@ -1945,7 +4245,7 @@ def download_template():
         headers={'Content-Disposition': 'attachment; filename=inventory_template.csv'}
     )
 
-@app.route('/edit/<int:item_id>', methods=['GET', 'POST'])
+@route('/edit/<int:item_id>', methods=['GET', 'POST'])
 def edit_item_route(item_id):
     """Edit an existing inventory item."""
     item = get_inventory_item(item_id)
@@ -1977,7 +4277,7 @@ def edit_item_route(item_id):
     low_stock_items = get_low_stock_items()
     return render_template('edit_item.html', item=item, categories=categories, warehouses=warehouses, suppliers=suppliers, skus=skus, low_stock_count=len(low_stock_items))
 
-@app.route('/delete/<int:item_id>')
+@route('/delete/<int:item_id>')
 def delete_item_route(item_id):
     """Delete an inventory item."""
     if delete_inventory_item(item_id):
@@ -1986,26 +4286,61 @@ def delete_item_route(item_id):
         flash('Failed to delete item.', 'error')
     return redirect(url_for('index'))
 
-@app.route('/low-stock')
+@route('/low-stock')
 def low_stock_route():
     """Show items with low stock."""
     low_stock_items = get_low_stock_items()
     return render_template('low_stock.html', items=low_stock_items, low_stock_count=len(low_stock_items))
 
-@app.route('/dashboard')
+@route('/low-stock/reorder', methods=['POST'])
+def reorder_low_stock_route():
+    """Generate purchase orders for every low-stock item and download the batch."""
+    success, result = generate_purchase_orders()
+    if not success:
+        flash(f"Failed to generate purchase orders: {result.get('error')}", 'error')
+        return redirect(url_for('low_stock_route'))
+    if result['unassigned_lines']:
+        flash(f"{len(result['unassigned_lines'])} low-stock items have no warehouse and were not reordered.", 'warning')
+    if not result['batch_id']:
+        flash('No low-stock items need reordering.', 'success')
+        return redirect(url_for('low_stock_route'))
+    return redirect(url_for('download_purchase_orders', batch_id=result['batch_id']))
+
+@route('/purchase-orders/<batch_id>/download')
+def download_purchase_orders(batch_id):
+    """Download a replenishment batch of purchase orders as CSV."""
+    from flask import Response
+    
+    rows = get_purchase_order_batch(batch_id)
+    if not rows:
+        flash('Purchase order batch not found.', 'error')
+        return redirect(url_for('low_stock_route'))
+    
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(PURCHASE_ORDER_CSV_COLUMNS)
+    writer.writerows(rows)
+    return Response(
+        output.getvalue(),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename=purchase_orders_{batch_id}.csv'}
+    )
+
+@route('/dashboard')
 def dashboard_route():
     """Display embedded Databricks AI/BI dashboard."""
     dashboard_embed_url = get_dashboard_embed_url()
     dashboard_url = get_dashboard_public_url()
     low_stock_items = get_low_stock_items()
     
-    # Debug information
-    print(f"Dashboard Debug Info:")
-    print(f"  DASHBOARD_ID: {os.getenv('DASHBOARD_ID')}")
-    print(f"  DATABRICKS_HOST: {os.getenv('DATABRICKS_HOST')}")
-    print(f"  Workspace URL: {workspace_client.config.host}")
-    print(f"  Embed URL: {dashboard_embed_url}")
-    print(f"  Public URL: {dashboard_url}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Dashboard debug info", extra={
+            'dashboard_id': os.getenv('DASHBOARD_ID'),
+            'databricks_host': os.getenv('DATABRICKS_HOST'),
+            'workspace_url': get_workspace_client().config.host,
+            'embed_url': dashboard_embed_url,
+            'public_url': dashboard_url
+        })
     
     if not dashboard_embed_url:
         flash('Dashboard not configured. Please set DASHBOARD_ID environment variable.', 'warning')
@@ -2016,47 +4351,47 @@ def dashboard_route():
                          dashboard_url=dashboard_url,
                          low_stock_count=len(low_stock_items))
 
-@app.route('/api/items')
+def inventory_item_to_dict(item):
+    """JSON shape of an inventory row from get_inventory_items()."""
+    return {
+        'id': item[0],
+        'item_name': item[1],
+        'description': item[2],
+        'category_name': item[3],
+        'warehouse_name': item[4],
+        'supplier_name': item[5],
+        'quantity': item[6],
+        'unit_price': item[7],
+        'location': item[8],
+        'minimum_stock': item[9],
+        'date_added': item[10].isoformat() if item[10] else None,
+        'last_updated': item[11].isoformat() if item[11] else None,
+        'category_id': item[12],
+        'warehouse_id': item[13],
+        'supplier_id': item[14]
+    }
+
+def category_sku_to_dict(sku):
+    """JSON shape of a SKU row from get_skus_by_category()."""
+    return {
+        'sku_id': sku[0],
+        'sku_code': sku[1],
+        'item_name': sku[2],
+        'description': sku[3],
+        'unit_price': float(sku[4]) if sku[4] else 0.0
+    }
+
+@route('/api/items')
 def api_items():
     """API endpoint to get all items as JSON."""
-    items = get_inventory_items()
-    items_list = []
-    for item in items:
-        items_list.append({
-            'id': item[0],
-            'item_name': item[1],
-            'description': item[2],
-            'category_name': item[3],
-            'warehouse_name': item[4],
-            'supplier_name': item[5],
-            'quantity': item[6],
-            'unit_price': item[7],
-            'location': item[8],
-            'minimum_stock': item[9],
-            'date_added': item[10].isoformat() if item[10] else None,
-            'last_updated': item[11].isoformat() if item[11] else None,
-            'category_id': item[12],
-            'warehouse_id': item[13],
-            'supplier_id': item[14]
-        })
-    return jsonify(items_list)
+    return jsonify([inventory_item_to_dict(item) for item in get_inventory_items()])
 
-@app.route('/api/skus-by-category/<int:category_id>')
+@route('/api/skus-by-category/<int:category_id>')
 def api_skus_by_category(category_id):
     """API endpoint to get SKUs by category."""
-    skus = get_skus_by_category(category_id)
-    skus_list = []
-    for sku in skus:
-        skus_list.append({
-            'sku_id': sku[0],
-            'sku_code': sku[1],
-            'item_name': sku[2],
-            'description': sku[3],
-            'unit_price': float(sku[4]) if sku[4] else 0.0
-        })
-    return jsonify(skus_list)
+    return jsonify([category_sku_to_dict(sku) for sku in get_skus_by_category(category_id)])
 
-@app.route('/api/token-status')
+@route('/api/token-status')
 def api_token_status():
     """API endpoint to check token expiry status."""
     return jsonify({
@@ -2065,18 +4400,18 @@ def api_token_status():
         'current_time': time.time()
     })
 
-@app.route('/api/dashboard-config')
+@route('/api/dashboard-config')
 def api_dashboard_config():
     """API endpoint to get dashboard configuration."""
     return jsonify({
         'dashboard_id': os.getenv('DASHBOARD_ID'),
-        'workspace_url': os.getenv('DATABRICKS_HOST') or workspace_client.config.host,
+        'workspace_url': os.getenv('DATABRICKS_HOST') or get_workspace_client().config.host,
         'embed_url': get_dashboard_embed_url(),
         'public_url': get_dashboard_public_url(),
         'configured': get_dashboard_embed_url() is not None
     })
 
-@app.route('/api/current-inventory')
+@route('/api/current-inventory')
 def api_current_inventory():
     """API endpoint to get current inventory for a SKU at a warehouse."""
     warehouse_id = request.args.get('warehouse_id', type=int)
@@ -2085,36 +4420,14 @@ def api_current_inventory():
     if not sku_id:
         return jsonify({'error': 'sku_id is required'}), 400
     
-    try:
-        with get_connection() as conn:
-            with conn.cursor() as cur:
-                schema = get_schema_name()
-                table_name = os.getenv("POSTGRES_TABLE", "inventory_items")
-                
-                # Query to get current total inventory for this SKU at this warehouse
-                if warehouse_id:
-                    cur.execute(sql.SQL("""
-                        SELECT COALESCE(SUM(quantity), 0) as total_quantity
-                        FROM {}.{}
-                        WHERE sku_id = %s AND warehouse_id = %s
-                    """).format(sql.Identifier(schema), sql.Identifier(table_name)), (sku_id, warehouse_id))
-                else:
-                    # If no warehouse specified, get total across all warehouses
-                    cur.execute(sql.SQL("""
-                        SELECT COALESCE(SUM(quantity), 0) as total_quantity
-                        FROM {}.{}
-                        WHERE sku_id = %s
-                    """).format(sql.Identifier(schema), sql.Identifier(table_name)), (sku_id,))
-                
-                result = cur.fetchone()
-                current_quantity = int(result[0]) if result else 0
-                
-                return jsonify({'current_quantity': current_quantity})
-    except Exception as e:
-        print(f"Error getting current inventory: {e}")
-        return jsonify({'error': str(e)}), 500
+    # Current stock comes from the ledger snapshot plus the movements recorded after it
+    current_quantity = get_current_stock(sku_id, warehouse_id)
+    if current_quantity is None:
+        return jsonify({'error': 'Failed to read current inventory'}), 500
+    
+    return jsonify({'current_quantity': current_quantity})
 
-@app.route('/api/demand-forecast')
+@route('/api/demand-forecast')
 def api_demand_forecast():
     """API endpoint to get demand forecast suggestion."""
     warehouse_id = request.args.get('warehouse_id', type=int)
@@ -2133,7 +4446,171 @@ def api_demand_forecast():
     suggestion = get_demand_forecast_suggestion(warehouse_id, category_id, sku_id, current_quantity, minimum_stock, new_quantity)
     return jsonify(suggestion)
 
-@app.route('/api/reset-data', methods=['POST'])
+@route('/api/demand-forecast/cache-stats')
+def api_forecast_cache_stats():
+    """API endpoint to get demand forecast cache hit and miss statistics."""
+    return jsonify(forecast_cache.stats())
+
+@route('/api/demand-forecast/batch', methods=['POST'])
+def api_demand_forecast_batch():
+    """API endpoint to get demand forecast suggestions for many items with one model call."""
+    payload = request.get_json(silent=True)
+    entries = payload.get('items') if isinstance(payload, dict) else payload
+    if not isinstance(entries, list) or not entries:
+        return jsonify({'error': 'items must be a non-empty list'}), 400
+    
+    entries, errors = normalize_forecast_entries(entries)
+    if errors:
+        return jsonify({'error': 'Invalid forecast entries', 'errors': errors}), 400
+    
+    suggestions = get_demand_forecast_suggestions(entries)
+    return jsonify({
+        'suggestions': [
+            {'warehouse_id': entry['warehouse_id'], 'category_id': entry['category_id'], 'sku_id': entry['sku_id'], **suggestion}
+            for entry, suggestion in zip(entries, suggestions)
+        ]
+    })
+
+@route('/api/demand-forecast/precompute', methods=['POST'])
+def api_precompute_demand_forecasts():
+    """API endpoint to score all inventory combinations and store the forecasts."""
+    batch_size = request.args.get('batch_size', type=int)
+    success, result = precompute_demand_forecasts(batch_size)
+    if success:
+        return jsonify({'status': 'success', **result})
+    return jsonify({'status': 'error', 'message': result.get('error')}), 500
+
+@route('/api/model-serving/stats')
+def api_model_serving_stats():
+    """API endpoint to get model serving latency, request counters, circuit breaker and coalescing stats."""
+    return jsonify({
+        **serving_client.stats(),
+        'coalescing': forecast_flights.stats(),
+        'forecast_mode': 'local' if local_model is not None else 'serving'
+    })
+
+@route('/metrics')
+def metrics_route():
+    """Prometheus scrape endpoint for this worker's request, query, pool, token, model serving,
+    forecast cache and CSV metrics."""
+    return current_app.response_class(registry.render(), content_type=METRICS_CONTENT_TYPE)
+
+@route('/api/slow-queries')
+def api_slow_queries():
+    """API endpoint listing this worker's most recent slow statements, newest first, with
+    redacted parameters and (in explain mode) their plans."""
+    return jsonify({
+        'settings': config.get_slow_query_settings(),
+        'slow_queries': slow_query_log.recent(request.args.get('limit', type=int))
+    })
+
+@route('/api/pool-stats')
+def api_pool_stats():
+    """API endpoint for this worker's connection pool usage: size, connections in use, waiting
+    clients, wait time and errors. Counters are cumulative since the pool was opened."""
+    return jsonify({
+        'pid': os.getpid(),
+        'settings': config.get_pool_settings(),
+        'primary': summarize_pool_stats(connection_pool if connection_pool_pid == os.getpid() else None),
+        'read_replica': summarize_pool_stats(read_pool if read_pool_pid == os.getpid() else None),
+        'async': async_database.get_stats() or None
+    })
+
+@route('/api/stock-ledger/compact', methods=['POST'])
+def api_compact_stock_ledger():
+    """API endpoint to roll settled stock movements into per-(sku, warehouse) snapshots."""
+    settle_seconds = request.args.get('settle_seconds', 300, type=int)
+    success, result = compact_stock_ledger(settle_seconds)
+    if success:
+        return jsonify({'status': 'success', **result})
+    return jsonify({'status': 'error', 'message': result.get('error')}), 500
+
+@route('/api/compact-inventory', methods=['POST'])
+def api_compact_inventory():
+    """API endpoint to merge duplicate inventory item rows per SKU and warehouse."""
+    batch_size = request.args.get('batch_size', 200, type=int)
+    max_batches = request.args.get('max_batches', type=int)
+    success, result = compact_inventory_items(batch_size, max_batches)
+    if success:
+        return jsonify({'status': 'success', **result})
+    return jsonify({'status': 'error', 'message': result.get('error'), **result}), 500
+
+@route('/api/transfers', methods=['POST'])
+def api_transfers():
+    """API endpoint to move stock between warehouses in one atomic transaction."""
+    payload = request.get_json(silent=True) or {}
+    lines = payload.get('lines')
+    if not isinstance(lines, list) or not lines:
+        return jsonify({'status': 'error', 'message': 'lines must be a non-empty list'}), 400
+    
+    success, result = transfer_stock(lines, payload.get('reference'))
+    if success:
+        return jsonify({'status': 'success', **result})
+    if result.get('errors'):
+        return jsonify({'status': 'error', 'message': result['error'], 'errors': result['errors']}), 400
+    if result.get('overdrawn'):
+        return jsonify({'status': 'error', 'message': result['error'], 'overdrawn': result['overdrawn']}), 409
+    return jsonify({'status': 'error', 'message': result.get('error')}), 500
+
+@route('/api/reservations', methods=['POST'])
+def api_reserve_stock():
+    """API endpoint to reserve stock for an order."""
+    payload = request.get_json(silent=True) or {}
+    if payload.get('sku_id') is None or payload.get('warehouse_id') is None or payload.get('quantity') is None:
+        return jsonify({'status': 'error', 'message': 'sku_id, warehouse_id and quantity are required'}), 400
+    
+    success, result = reserve_stock(payload['sku_id'], payload['warehouse_id'], payload['quantity'],
+                                    payload.get('order_reference'), payload.get('ttl_seconds'))
+    if success:
+        return jsonify({'status': 'success', **result}), 201
+    if result.get('errors'):
+        return jsonify({'status': 'error', 'message': result['error'], 'errors': result['errors']}), 400
+    if 'available' in result:
+        return jsonify({'status': 'error', 'message': result['error'], 'available': result['available']}), 409
+    return jsonify({'status': 'error', 'message': result.get('error')}), 500
+
+@route('/api/reservations/<int:reservation_id>/release', methods=['POST'])
+def api_release_reservation(reservation_id):
+    """API endpoint to release a held reservation."""
+    if release_reservation(reservation_id):
+        return jsonify({'status': 'success', 'reservation_id': reservation_id})
+    return jsonify({'status': 'error', 'message': 'Reservation is not held or has expired'}), 409
+
+@route('/api/reservations/<int:reservation_id>/fulfil', methods=['POST'])
+def api_fulfil_reservation(reservation_id):
+    """API endpoint to pick the stock for a held reservation."""
+    success, result = fulfil_reservation(reservation_id)
+    if success:
+        return jsonify({'status': 'success', **result})
+    return jsonify({'status': 'error', 'message': result.get('error')}), 409
+
+@route('/api/reservations/expire', methods=['POST'])
+def api_expire_reservations():
+    """API endpoint to expire held reservations past their expiry time."""
+    batch_size = request.args.get('batch_size', 500, type=int)
+    success, expired_count = expire_reservations(batch_size)
+    if success:
+        return jsonify({'status': 'success', 'expired': expired_count})
+    return jsonify({'status': 'error', 'message': 'Failed to expire reservations'}), 500
+
+@route('/api/available-to-promise')
+def api_available_to_promise():
+    """API endpoint to get available-to-promise stock net of held reservations."""
+    sku_id = request.args.get('sku_id', type=int)
+    warehouse_id = request.args.get('warehouse_id', type=int)
+    return jsonify(get_available_to_promise(sku_id, warehouse_id))
+
+@route('/api/purchase-orders/replenish', methods=['POST'])
+def api_generate_purchase_orders():
+    """API endpoint to generate purchase orders for every low-stock item, grouped by supplier."""
+    success, result = generate_purchase_orders()
+    if not success:
+        return jsonify({'status': 'error', 'message': result.get('error')}), 500
+    if result['batch_id']:
+        result['download_url'] = url_for('download_purchase_orders', batch_id=result['batch_id'])
+    return jsonify({'status': 'success', **result})
+
+@route('/api/reset-data', methods=['POST'])
 def api_reset_data():
     """API endpoint to reset all data and identity sequences."""
     try:
@@ -2154,15 +4631,136 @@ def api_reset_data():
             'message': f'Error resetting data: {str(e)}'
         }), 500
 
+# Async JSON API (v2): the same data served from the async pool. Under the WSGI server each view
+# still holds its request thread until it returns; what async buys is running one request's
+# independent queries concurrently (see api_v2_reference_data)
+SKU_FIELDS = ('sku_id', 'sku_code', 'item_name', 'category_id', 'category_name', 'description', 'unit_price')
+CATEGORY_FIELDS = ('category_id', 'category_name', 'description', 'date_created', 'last_updated')
+WAREHOUSE_FIELDS = ('warehouse_id', 'warehouse_name', 'address', 'city', 'state', 'country', 'county', 'zipcode',
+                    'latitude', 'longitude', 'contact_person', 'phone', 'email', 'date_created', 'last_updated')
+SUPPLIER_FIELDS = ('supplier_id', 'supplier_name', 'contact_person', 'email', 'phone', 'address', 'city', 'state',
+                   'country', 'county', 'zipcode', 'latitude', 'longitude', 'website', 'tax_id', 'payment_terms',
+                   'date_created', 'last_updated')
+
+def row_to_dict(fields, row):
+    """Map a row to its field names, with timestamps as ISO strings and numerics as floats."""
+    result = {}
+    for field, value in zip(fields, row):
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        elif isinstance(value, Decimal):
+            value = float(value)
+        result[field] = value
+    return result
+
+def json_body_fields(required, optional=()):
+    """Read required and optional fields from the JSON body; returns (fields, missing names)."""
+    payload = request.get_json(silent=True) or {}
+    missing = [name for name in required if payload.get(name) in (None, '')]
+    fields = {name: payload[name] for name in (*required, *optional) if payload.get(name) not in (None, '')}
+    return fields, missing
+
+async def created_response(write, fields, missing):
+    """Run an async add_* helper for a validated JSON body and build the API response."""
+    if missing:
+        return jsonify({'status': 'error', 'message': f"Missing required fields: {', '.join(missing)}"}), 400
+    if await async_database.call(write(**fields)):
+        return jsonify({'status': 'success'}), 201
+    return jsonify({'status': 'error', 'message': 'Failed to save record'}), 500
+
+@route('/api/v2/items')
+async def api_v2_items():
+    """Async API endpoint to get all items as JSON."""
+    items = await async_database.call(get_inventory_items_async())
+    return jsonify([inventory_item_to_dict(item) for item in items])
+
+@route('/api/v2/items', methods=['POST'])
+async def api_v2_add_item():
+    """Async API endpoint to receive a new inventory item."""
+    fields, missing = json_body_fields(('sku_id', 'quantity', 'unit_price'),
+                                       ('warehouse_id', 'supplier_id', 'location', 'minimum_stock'))
+    return await created_response(add_inventory_item_async, fields, missing)
+
+@route('/api/v2/skus')
+async def api_v2_skus():
+    """Async API endpoint to get all SKUs."""
+    skus = await async_database.call(get_skus_async())
+    return jsonify([row_to_dict(SKU_FIELDS, sku) for sku in skus])
+
+@route('/api/v2/skus', methods=['POST'])
+async def api_v2_add_sku():
+    """Async API endpoint to add a SKU."""
+    fields, missing = json_body_fields(('sku_code', 'item_name', 'category_id', 'unit_price'), ('description',))
+    return await created_response(add_sku_async, fields, missing)
+
+@route('/api/v2/skus-by-category/<int:category_id>')
+async def api_v2_skus_by_category(category_id):
+    """Async API endpoint to get SKUs by category."""
+    skus = await async_database.call(get_skus_by_category_async(category_id))
+    return jsonify([category_sku_to_dict(sku) for sku in skus])
+
+@route('/api/v2/categories')
+async def api_v2_categories():
+    """Async API endpoint to get all categories."""
+    categories = await async_database.call(get_categories_async())
+    return jsonify([row_to_dict(CATEGORY_FIELDS, category) for category in categories])
+
+@route('/api/v2/categories', methods=['POST'])
+async def api_v2_add_category():
+    """Async API endpoint to add a category."""
+    fields, missing = json_body_fields(('category_name',), ('description',))
+    return await created_response(add_category_async, fields, missing)
+
+@route('/api/v2/warehouses')
+async def api_v2_warehouses():
+    """Async API endpoint to get all warehouses."""
+    warehouses = await async_database.call(get_warehouses_async())
+    return jsonify([row_to_dict(WAREHOUSE_FIELDS, warehouse) for warehouse in warehouses])
+
+@route('/api/v2/warehouses', methods=['POST'])
+async def api_v2_add_warehouse():
+    """Async API endpoint to add a warehouse."""
+    fields, missing = json_body_fields(('warehouse_name',), WAREHOUSE_FIELDS[2:13])
+    return await created_response(add_warehouse_async, fields, missing)
+
+@route('/api/v2/suppliers')
+async def api_v2_suppliers():
+    """Async API endpoint to get all suppliers."""
+    suppliers = await async_database.call(get_suppliers_async())
+    return jsonify([row_to_dict(SUPPLIER_FIELDS, supplier) for supplier in suppliers])
+
+@route('/api/v2/suppliers', methods=['POST'])
+async def api_v2_add_supplier():
+    """Async API endpoint to add a supplier."""
+    fields, missing = json_body_fields(('supplier_name',), SUPPLIER_FIELDS[2:16])
+    return await created_response(add_supplier_async, fields, missing)
+
+@route('/api/v2/reference-data')
+async def api_v2_reference_data():
+    """Async API endpoint returning categories, warehouses, suppliers and SKUs in one response.
+    The four queries run concurrently on separate pooled connections."""
+    categories, warehouses, suppliers, skus = await asyncio.gather(
+        async_database.call(get_categories_async()),
+        async_database.call(get_warehouses_async()),
+        async_database.call(get_suppliers_async()),
+        async_database.call(get_skus_async())
+    )
+    return jsonify({
+        'categories': [row_to_dict(CATEGORY_FIELDS, category) for category in categories],
+        'warehouses': [row_to_dict(WAREHOUSE_FIELDS, warehouse) for warehouse in warehouses],
+        'suppliers': [row_to_dict(SUPPLIER_FIELDS, supplier) for supplier in suppliers],
+        'skus': [row_to_dict(SKU_FIELDS, sku) for sku in skus]
+    })
+
 # Category management routes
-@app.route('/categories')
+@route('/categories')
 def categories_route():
     """Show all categories."""
     categories = get_categories()
     low_stock_items = get_low_stock_items()
     return render_template('categories.html', categories=categories, low_stock_count=len(low_stock_items))
 
-@app.route('/categories/add', methods=['GET', 'POST'])
+@route('/categories/add', methods=['GET', 'POST'])
 def add_category_route():
     """Add a new category."""
     if request.method == 'POST':
@@ -2181,7 +4779,7 @@ def add_category_route():
     low_stock_items = get_low_stock_items()
     return render_template('add_category.html', low_stock_count=len(low_stock_items))
 
-@app.route('/categories/edit/<int:category_id>', methods=['GET', 'POST'])
+@route('/categories/edit/<int:category_id>', methods=['GET', 'POST'])
 def edit_category_route(category_id):
     """Edit an existing category."""
     category = get_category(category_id)
@@ -2205,7 +4803,7 @@ def edit_category_route(category_id):
     low_stock_items = get_low_stock_items()
     return render_template('edit_category.html', category=category, low_stock_count=len(low_stock_items))
 
-@app.route('/categories/delete/<int:category_id>')
+@route('/categories/delete/<int:category_id>')
 def delete_category_route(category_id):
     """Delete a category."""
     success, message = delete_category(category_id)
@@ -2216,14 +4814,14 @@ def delete_category_route(category_id):
     return redirect(url_for('categories_route'))
 
 # Warehouse management routes
-@app.route('/warehouses')
+@route('/warehouses')
 def warehouses_route():
     """Show all warehouses."""
     warehouses = get_warehouses()
     low_stock_items = get_low_stock_items()
     return render_template('warehouses.html', warehouses=warehouses, low_stock_count=len(low_stock_items))
 
-@app.route('/warehouses/add', methods=['GET', 'POST'])
+@route('/warehouses/add', methods=['GET', 'POST'])
 def add_warehouse_route():
     """Add a new warehouse."""
     if request.method == 'POST':
@@ -2253,7 +4851,7 @@ def add_warehouse_route():
     low_stock_items = get_low_stock_items()
     return render_template('add_warehouse.html', low_stock_count=len(low_stock_items))
 
-@app.route('/warehouses/edit/<int:warehouse_id>', methods=['GET', 'POST'])
+@route('/warehouses/edit/<int:warehouse_id>', methods=['GET', 'POST'])
 def edit_warehouse_route(warehouse_id):
     """Edit an existing warehouse."""
     warehouse = get_warehouse(warehouse_id)
@@ -2288,7 +4886,7 @@ def edit_warehouse_route(warehouse_id):
     low_stock_items = get_low_stock_items()
     return render_template('edit_warehouse.html', warehouse=warehouse, low_stock_count=len(low_stock_items))
 
-@app.route('/warehouses/delete/<int:warehouse_id>')
+@route('/warehouses/delete/<int:warehouse_id>')
 def delete_warehouse_route(warehouse_id):
     """Delete a warehouse."""
     if delete_warehouse(warehouse_id):
@@ -2298,14 +4896,14 @@ def delete_warehouse_route(warehouse_id):
     return redirect(url_for('warehouses_route'))
 
 # Supplier management routes
-@app.route('/suppliers')
+@route('/suppliers')
 def suppliers_route():
     """Show all suppliers."""
     suppliers = get_suppliers()
     low_stock_items = get_low_stock_items()
     return render_template('suppliers.html', suppliers=suppliers, low_stock_count=len(low_stock_items))
 
-@app.route('/suppliers/add', methods=['GET', 'POST'])
+@route('/suppliers/add', methods=['GET', 'POST'])
 def add_supplier_route():
     """Add a new supplier."""
     if request.method == 'POST':
@@ -2338,7 +4936,7 @@ def add_supplier_route():
     low_stock_items = get_low_stock_items()
     return render_template('add_supplier.html', low_stock_count=len(low_stock_items))
 
-@app.route('/suppliers/edit/<int:supplier_id>', methods=['GET', 'POST'])
+@route('/suppliers/edit/<int:supplier_id>', methods=['GET', 'POST'])
 def edit_supplier_route(supplier_id):
     """Edit an existing supplier."""
     supplier = get_supplier(supplier_id)
@@ -2376,7 +4974,7 @@ def edit_supplier_route(supplier_id):
     low_stock_items = get_low_stock_items()
     return render_template('edit_supplier.html', supplier=supplier, low_stock_count=len(low_stock_items))
 
-@app.route('/suppliers/delete/<int:supplier_id>')
+@route('/suppliers/delete/<int:supplier_id>')
 def delete_supplier_route(supplier_id):
     """Delete a supplier."""
     if delete_supplier(supplier_id):
@@ -2386,14 +4984,14 @@ def delete_supplier_route(supplier_id):
     return redirect(url_for('suppliers_route'))
 
 # SKU management routes
-@app.route('/skus')
+@route('/skus')
 def skus_route():
     """Show all SKUs."""
     skus = get_skus()
     low_stock_items = get_low_stock_items()
     return render_template('skus.html', skus=skus, low_stock_count=len(low_stock_items))
 
-@app.route('/skus/add', methods=['GET', 'POST'])
+@route('/skus/add', methods=['GET', 'POST'])
 def add_sku_route():
     """Add a new SKU."""
     if request.method == 'POST':
@@ -2416,7 +5014,7 @@ def add_sku_route():
     low_stock_items = get_low_stock_items()
     return render_template('add_sku.html', categories=categories, low_stock_count=len(low_stock_items))
 
-@app.route('/skus/edit/<int:sku_id>', methods=['GET', 'POST'])
+@route('/skus/edit/<int:sku_id>', methods=['GET', 'POST'])
 def edit_sku_route(sku_id):
     """Edit an existing SKU."""
     sku = get_sku(sku_id)
@@ -2444,7 +5042,7 @@ def edit_sku_route(sku_id):
     low_stock_items = get_low_stock_items()
     return render_template('edit_sku.html', sku=sku, categories=categories, low_stock_count=len(low_stock_items))
 
-@app.route('/skus/delete/<int:sku_id>')
+@route('/skus/delete/<int:sku_id>')
 def delete_sku_route(sku_id):
     """Delete a SKU."""
     if delete_sku(sku_id):
@@ -2454,5 +5052,23 @@ def delete_sku_route(sku_id):
     return redirect(url_for('skus_route'))
 
 
+@cli_command('precompute-forecasts')
+def precompute_forecasts_command():
+    """Score all inventory combinations on the serving endpoint and store the forecasts."""
+    warmup()
+    success, result = precompute_demand_forecasts()
+    if not success:
+        raise SystemExit(f"❌ {result.get('error')}")
+
+@cli_command('warmup')
+def warmup_command():
+    """Initialize the database and load the local forecast model ahead of the first request."""
+    if not warmup():
+        raise SystemExit("❌ Database initialization failed")
+
+# Initialize Flask app
+app = create_app()
+
 if __name__ == '__main__':
+    warmup()
     app.run(debug=True, host='0.0.0.0', port=int(os.getenv('PORT', 8080))) 
\ No newline at end of file
@@ -0,0 +1,156 @@
+"""
+Structured, leveled logging for the inventory app.
+
+Modules log through loggers under the 'inventory' namespace (get_logger('app') is
+'inventory.app'). Records are put on an in-memory queue by the calling thread and written
+to stderr by a background listener thread, so a request never waits on a terminal or log
+collector. Every record carries the id of the request that produced it (from the
+X-Request-ID header, or generated), and is rendered as one JSON object per line
+(LOG_FORMAT=json) or as plain text (LOG_FORMAT=text).
+
+The listener is started on the first record in each process, so importing the app starts no
+threads and every forked server worker gets a listener of its own.
+"""
+
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import sys
+import threading
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+ROOT_LOGGER = 'inventory'
+TEXT_FORMAT = '%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s'
+
+# Id of the request being handled by this thread or task
+request_id = ContextVar('request_id', default=None)
+
+# Incoming X-Request-ID values are only trusted when they look like an id
+VALID_REQUEST_ID = re.compile(r'^[A-Za-z0-9._:-]{1,128}$')
+
+# Attributes every LogRecord has; anything else on a record came from extra={...}
+RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'request_id'}
+
+def get_logger(name):
+    """Logger for one module of the app, under the shared 'inventory' namespace."""
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+def new_request_id(supplied=None):
+    """The caller's request id when it is well formed, otherwise a fresh one."""
+    if supplied and VALID_REQUEST_ID.match(supplied):
+        return supplied
+    return uuid.uuid4().hex
+
+class RequestIdFilter(logging.Filter):
+    """Stamp each record with the current request id; runs on the thread that logged it."""
+
+    def filter(self, record):
+        record.request_id = request_id.get() or '-'
+        return True
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record with the time, level, logger, message, request id and extras."""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', '-')
+        }
+        for name, value in vars(record).items():
+            if name not in RECORD_ATTRIBUTES:
+                entry[name] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+class BackgroundQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler whose records are written to target by a listener thread.
+
+    The listener is (re)started lazily in whichever process emits, since a listener thread
+    does not survive a fork.
+    """
+
+    def __init__(self, target):
+        super().__init__(queue.SimpleQueue())
+        self.target = target
+        self.listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_listener(self):
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            # Records queued by the parent before the fork belong to the parent's listener
+            self.queue = queue.SimpleQueue()
+            self.listener = logging.handlers.QueueListener(self.queue, self.target, respect_handler_level=True)
+            self.listener.start()
+            self._pid = os.getpid()
+
+    def prepare(self, record):
+        # Resolve the message and traceback now, while the arguments are still current, but
+        # leave formatting to the listener's handler
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def emit(self, record):
+        if self._pid != os.getpid():
+            self._ensure_listener()
+        super().emit(record)
+
+    def flush(self):
+        """Write out everything queued so far (stops and restarts the listener)."""
+        with self._start_lock:
+            if self.listener is not None and self._pid == os.getpid():
+                self.listener.stop()
+                self.listener.start()
+
+    def close(self):
+        with self._start_lock:
+            if self.listener is not None and self._pid == os.getpid():
+                self.listener.stop()
+            self.listener = None
+            self._pid = None
+        super().close()
+
+def configure_logging(level='INFO', fmt='json', stream=None):
+    """Send the app's loggers through a background queue to stream (stderr by default).
+
+    Calling it again replaces the previous configuration. Returns the queue handler.
+    """
+    target = logging.StreamHandler(stream or sys.stderr)
+    target.setFormatter(JsonFormatter() if fmt == 'json' else logging.Formatter(TEXT_FORMAT))
+    handler = BackgroundQueueHandler(target)
+    handler.addFilter(RequestIdFilter())
+
+    logger = logging.getLogger(ROOT_LOGGER)
+    for previous in list(logger.handlers):
+        logger.removeHandler(previous)
+        previous.close()
+    logger.addHandler(handler)
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+    logger.propagate = False
+    return handler
+
+def flush_logging():
+    """Write out queued records, e.g. before a worker process exits."""
+    for handler in logging.getLogger(ROOT_LOGGER).handlers:
+        handler.flush()
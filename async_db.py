@@ -0,0 +1,121 @@
+"""
+Async database access for the inventory app, built on psycopg's AsyncConnectionPool.
+
+An AsyncConnectionPool belongs to the event loop that opened it, while Flask runs each async
+view in a fresh event loop of its own. AsyncDatabase therefore keeps one long-lived event loop
+on a background thread per worker process; the pool lives there, and views hand their queries
+to it with `await async_database.call(coro)`. Independent queries submitted together (for
+example with asyncio.gather) run concurrently on the shared pool.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+
+from psycopg_pool import AsyncConnectionPool
+
+from app_logging import get_logger
+
+logger = get_logger('async_db')
+
+class AsyncDatabase:
+    """Process-wide async connection pool with its own event loop thread.
+
+    conninfo_provider is a blocking callable returning a libpq connection string; it is called
+    off the loop whenever a pool is (re)built. The pool is rebuilt once it is older than
+    refresh_after seconds, so new connections pick up a refreshed OAuth token. connect_kwargs
+    are passed to every connection (for example a cursor_factory).
+    """
+
+    def __init__(self, conninfo_provider, min_size=1, max_size=4, refresh_after=900, connect_kwargs=None):
+        self.conninfo_provider = conninfo_provider
+        self.connect_kwargs = connect_kwargs
+        self.min_size = min_size
+        self.max_size = max_size
+        self.refresh_after = refresh_after
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._loop = None
+        self._thread = None
+        self._pool = None
+        self._pool_created = 0
+        self._pool_lock = None
+        self._closing = set()
+
+    def _get_loop(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                # A forked worker inherits neither the loop thread nor usable connections
+                self._reset()
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name='async-db', daemon=True)
+                thread.start()
+                self._loop, self._thread = loop, thread
+            return self._loop
+
+    def submit(self, coro):
+        """Schedule coro on the database loop; returns a concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self._get_loop())
+
+    def run(self, coro, timeout=None):
+        """Run coro on the database loop and block until it finishes (for sync callers)."""
+        return self.submit(coro).result(timeout)
+
+    async def call(self, coro):
+        """Run coro on the database loop and await its result from any other event loop."""
+        return await asyncio.wrap_future(self.submit(coro))
+
+    async def get_pool(self):
+        """Get the open pool, (re)building it when missing or older than refresh_after.
+        Must be awaited on the database loop."""
+        if self._pool_lock is None:
+            self._pool_lock = asyncio.Lock()
+        async with self._pool_lock:
+            if self._pool is not None and time.time() - self._pool_created > self.refresh_after:
+                old_pool, self._pool = self._pool, None
+                # Connections still in use are closed when they are returned
+                task = asyncio.get_running_loop().create_task(old_pool.close())
+                self._closing.add(task)
+                task.add_done_callback(self._closing.discard)
+            if self._pool is None:
+                conninfo = await asyncio.to_thread(self.conninfo_provider)
+                pool = AsyncConnectionPool(conninfo, kwargs=self.connect_kwargs,
+                                           min_size=min(self.min_size, self.max_size),
+                                           max_size=self.max_size, open=False)
+                await pool.open()
+                self._pool, self._pool_created = pool, time.time()
+            return self._pool
+
+    @asynccontextmanager
+    async def connection(self):
+        """Borrow a connection from the pool; use inside coroutines run through call()/run()."""
+        pool = await self.get_pool()
+        async with pool.connection() as conn:
+            yield conn
+
+    def get_stats(self):
+        """Pool statistics, or an empty dict when no pool has been opened in this process."""
+        pool = self._pool if self._pid == os.getpid() else None
+        return pool.get_stats() if pool is not None else {}
+
+    def close(self, timeout=5.0):
+        """Close the pool and stop the loop thread. Returns whether anything was running."""
+        with self._lock:
+            loop, thread, pool, pid = self._loop, self._thread, self._pool, self._pid
+            self._reset()
+        if loop is None or pid != os.getpid():
+            return False
+        if pool is not None:
+            try:
+                asyncio.run_coroutine_threadsafe(pool.close(timeout), loop).result(timeout + 1)
+            except Exception as e:
+                logger.warning("Async pool did not close cleanly: %s", e)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        return True
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Data-access benchmark for the inventory app against a local PostgreSQL.
+
+Starts a throwaway PostgreSQL server (or uses --dsn), creates the app's schema with
+init_database(), and loads generated datasets at several scales (number of inventory item
+rows). At each scale it times the data-access helpers and the main routes, the routes
+through the Flask test client so templates and JSON encoding are included:
+
+    python benchmarks/db_benchmark.py --save benchmarks/db_baseline.json
+    python benchmarks/db_benchmark.py --baseline benchmarks/db_baseline.json
+
+With --baseline, any benchmark whose median got slower than --threshold percent (and by at
+least --min-delta-ms) is reported as a regression and the script exits with status 1, so it
+can gate a deploy.
+
+The local server needs PostgreSQL binaries: --pg-bin, initdb on the PATH, or the optional
+pgserver package. Credentials are pinned for the run, so no Databricks workspace is needed.
+Tables live in their own schema (POSTGRES_SCHEMA, default inventory_benchmark) and are
+truncated between scales, so never point --dsn at a database whose data you want to keep
+in that schema.
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+ROUTES = ['/', '/low-stock', '/api/items', '/api/v2/items', '/categories', '/warehouses', '/suppliers', '/skus']
+
+class LocalPostgres:
+    """Throwaway PostgreSQL server in a temporary directory, reachable on a Unix socket only."""
+
+    def __init__(self, bin_dir=None):
+        self.bin_dir = bin_dir
+        self.directory = None
+        self.server = None
+        self.conninfo = None
+
+    def find_bin_dir(self):
+        if self.bin_dir:
+            return self.bin_dir
+        initdb = shutil.which('initdb')
+        if initdb:
+            return os.path.dirname(initdb)
+        pg_config = shutil.which('pg_config')
+        if pg_config:
+            # pg_config also comes with the client libraries alone, without a server
+            bin_dir = subprocess.run([pg_config, '--bindir'], capture_output=True, text=True).stdout.strip()
+            if os.path.exists(os.path.join(bin_dir, 'initdb')):
+                return bin_dir
+        return None
+
+    def start(self):
+        self.directory = tempfile.mkdtemp(prefix='inventory-bench-')
+        bin_dir = self.find_bin_dir()
+        if bin_dir is None:
+            try:
+                import pgserver
+            except ImportError:
+                raise RuntimeError("No PostgreSQL binaries found; pass --pg-bin, put initdb on the PATH, "
+                                   "install pgserver, or use --dsn")
+            self.server = pgserver.get_server(self.directory, cleanup_mode='stop')
+            self.conninfo = self.server.get_uri()
+            return self.conninfo
+
+        data_dir = os.path.join(self.directory, 'data')
+        subprocess.run([os.path.join(bin_dir, 'initdb'), '-D', data_dir, '-U', 'postgres', '-A', 'trust',
+                        '-E', 'UTF8', '--no-sync'], check=True, capture_output=True)
+        subprocess.run([os.path.join(bin_dir, 'pg_ctl'), '-D', data_dir, '-l', os.path.join(self.directory, 'server.log'),
+                        '-o', f"-k {self.directory} -c listen_addresses=''", '-w', 'start'],
+                       check=True, capture_output=True)
+        self.server = (bin_dir, data_dir)
+        self.conninfo = f"host={self.directory} dbname=postgres user=postgres"
+        return self.conninfo
+
+    def stop(self):
+        if isinstance(self.server, tuple):
+            bin_dir, data_dir = self.server
+            subprocess.run([os.path.join(bin_dir, 'pg_ctl'), '-D', data_dir, '-m', 'fast', '-w', 'stop'],
+                           capture_output=True)
+        elif self.server is not None:
+            self.server.cleanup()
+        self.server = None
+        if self.directory:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+def use_database(conninfo):
+    """Point the app's PG* settings at conninfo and keep its data in a schema of its own."""
+    from psycopg.conninfo import conninfo_to_dict
+    params = conninfo_to_dict(conninfo)
+    os.environ.update({
+        'PGHOST': str(params.get('host', 'localhost')),
+        'PGPORT': str(params.get('port', 5432)),
+        'PGDATABASE': str(params.get('dbname', 'postgres')),
+        'PGUSER': str(params.get('user', 'postgres')),
+        'PGSSLMODE': str(params.get('sslmode', 'disable')),
+        'PGAPPNAME': 'inventory-benchmark'
+    })
+    os.environ.setdefault('POSTGRES_SCHEMA', 'inventory_benchmark')
+    os.environ['LOAD_SAMPLE_DATA'] = 'false'
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    return params.get('password') or 'local'
+
+def pin_credentials(app, password):
+    """Use a fixed password instead of a Databricks OAuth token for the whole run."""
+    app.postgres_password = password
+    app.last_password_refresh = math.inf
+
+def app_tables(app):
+    return [app.get_purchase_order_line_table_name(), app.get_purchase_order_table_name(),
+            app.get_reservation_table_name(), app.get_allocation_bucket_table_name(),
+            app.get_snapshot_table_name(), app.get_movement_table_name(), app.get_demand_table_name(),
+            os.getenv("POSTGRES_TABLE", "inventory_items"), app.get_sku_table_name(),
+            app.get_supplier_table_name(), app.get_warehouse_table_name(), app.get_category_table_name()]
+
+def dataset_shape(items):
+    """Reference-table sizes for a dataset of `items` inventory rows."""
+    return {
+        'categories': 12,
+        'warehouses': 10,
+        'suppliers': 25,
+        'skus': max(50, items // 4),
+        'items': items
+    }
+
+def load_dataset(app, items, seed=42):
+    """Replace the benchmark schema's data with a generated dataset; returns its shape."""
+    from psycopg import sql
+    shape = dataset_shape(items)
+    schema = sql.Identifier(app.get_schema_name())
+    table = lambda name: sql.SQL('{}.{}').format(schema, sql.Identifier(name))
+    with app.get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql.SQL("TRUNCATE {} RESTART IDENTITY CASCADE").format(
+                sql.SQL(', ').join(table(name) for name in app_tables(app))))
+            cur.execute("SELECT setseed(%s)", (seed / 1000,))
+            cur.execute(sql.SQL("""
+                INSERT INTO {} (category_name, description)
+                SELECT 'Category ' || g, 'Generated category ' || g FROM generate_series(1, %s) g
+            """).format(table(app.get_category_table_name())), (shape['categories'],))
+            cur.execute(sql.SQL("""
+                INSERT INTO {} (warehouse_name, city, state, country)
+                SELECT 'Warehouse ' || g, 'City ' || g, 'State', 'United States' FROM generate_series(1, %s) g
+            """).format(table(app.get_warehouse_table_name())), (shape['warehouses'],))
+            cur.execute(sql.SQL("""
+                INSERT INTO {} (supplier_name, contact_person, payment_terms)
+                SELECT 'Supplier ' || g, 'Contact ' || g, 'Net 30' FROM generate_series(1, %s) g
+            """).format(table(app.get_supplier_table_name())), (shape['suppliers'],))
+            cur.execute(sql.SQL("""
+                INSERT INTO {} (sku_code, item_name, category_id, unit_price, description)
+                SELECT 'BENCH-' || lpad(g::text, 7, '0'), 'Item ' || g, 1 + g %% %s,
+                       round((5 + random() * 495)::numeric, 2), 'Generated SKU ' || g
+                FROM generate_series(1, %s) g
+            """).format(table(app.get_sku_table_name())), (shape['categories'], shape['skus']))
+            # Roughly one row in ten is below its minimum stock
+            cur.execute(sql.SQL("""
+                INSERT INTO {} (sku_id, warehouse_id, supplier_id, quantity, unit_price, location, minimum_stock)
+                SELECT 1 + g %% %s, 1 + (g / %s) %% %s, 1 + g %% %s,
+                       CASE WHEN random() < 0.1 THEN (random() * 4)::int ELSE 10 + (random() * 200)::int END,
+                       round((5 + random() * 495)::numeric, 2), 'A-' || (g %% 20) || '-' || (g %% 50), 5
+                FROM generate_series(1, %s) g
+            """).format(table(os.getenv("POSTGRES_TABLE", "inventory_items"))),
+                (shape['skus'], shape['skus'], shape['warehouses'], shape['suppliers'], shape['items']))
+            conn.commit()
+            cur.execute(sql.SQL("ANALYZE {}").format(table(os.getenv("POSTGRES_TABLE", "inventory_items"))))
+    app.backfill_stock_movements()
+    return shape
+
+def generate_csv(shape, rows, seed=42):
+    """A valid upload of `rows` rows against the generated SKUs, warehouses and suppliers."""
+    rng = random.Random(seed)
+    lines = ['sku_code,warehouse_id,quantity,unit_price,supplier,minimum_stock']
+    for _ in range(rows):
+        lines.append(f"BENCH-{rng.randint(1, shape['skus']):07d},{rng.randint(1, shape['warehouses'])},"
+                     f"{rng.randint(1, 100)},{rng.uniform(5, 500):.2f},Supplier {rng.randint(1, shape['suppliers'])},5")
+    return '\n'.join(lines) + '\n'
+
+def summarize(samples):
+    """Latency statistics in milliseconds for a list of samples in seconds."""
+    ordered = sorted(sample * 1000 for sample in samples)
+    p95 = ordered[max(0, math.ceil(0.95 * len(ordered)) - 1)]
+    return {
+        'runs': len(ordered),
+        'median_ms': round(statistics.median(ordered), 3),
+        'p95_ms': round(p95, 3),
+        'min_ms': round(ordered[0], 3),
+        'mean_ms': round(statistics.fmean(ordered), 3)
+    }
+
+def measure(func, runs, warmup, setup=None):
+    """Time func() runs times after warmup untimed calls; setup() runs untimed before each call.
+    func returns whether the call succeeded."""
+    samples = []
+    for i in range(warmup + runs):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        ok = func()
+        elapsed = time.perf_counter() - started
+        if not ok:
+            raise RuntimeError("call failed")
+        if i >= warmup:
+            samples.append(elapsed)
+    return summarize(samples)
+
+def run_scale(app, items, args):
+    """Load a dataset of `items` rows and time every benchmark on it."""
+    print(f"\n📦 Scale {items} inventory rows")
+    print("-" * 60)
+    load_started = time.perf_counter()
+    shape = load_dataset(app, items)
+    print(f"   Loaded {shape['skus']} SKUs and {items} items in {time.perf_counter() - load_started:.1f}s")
+
+    client = app.app.test_client()
+    csv_text = generate_csv(shape, args.csv_rows)
+    rng = random.Random(7)
+
+    def current_inventory():
+        query = f"sku_id={rng.randint(1, shape['skus'])}&warehouse_id={rng.randint(1, shape['warehouses'])}"
+        return client.get(f"/api/current-inventory?{query}").status_code == 200
+
+    benchmarks = [
+        ('get_inventory_items', lambda: bool(app.get_inventory_items())),
+        ('get_low_stock_items', lambda: bool(app.get_low_stock_items())),
+        ('process_csv_file', lambda: app.process_csv_file(csv_text)['valid_items'] == args.csv_rows),
+        ('api_current_inventory', current_inventory)
+    ]
+    benchmarks += [(f"GET {route}", lambda route=route: client.get(route).status_code == 200) for route in ROUTES]
+
+    results = {}
+    for name, func in benchmarks:
+        results[name] = run_benchmark(name, func, args)
+
+    # Inserts go last so the rows they add don't skew the read benchmarks
+    rows = app.process_csv_file(csv_text)['data']
+    results['add_inventory_items_bulk'] = run_benchmark(
+        'add_inventory_items_bulk', lambda: app.add_inventory_items_bulk(rows)[0], args)
+    return {'dataset': shape, 'benchmarks': results}
+
+def run_benchmark(name, func, args):
+    try:
+        stats = measure(func, args.runs, args.warmup)
+    except RuntimeError as e:
+        print(f"   ❌ {name:<28} {e}")
+        return {'error': str(e)}
+    print(f"   {name:<30} median {stats['median_ms']:>9.2f} ms   p95 {stats['p95_ms']:>9.2f} ms")
+    return stats
+
+def compare(result, baseline, threshold, min_delta_ms):
+    """Benchmarks slower than the baseline median by threshold percent and min_delta_ms, or
+    failing now after having a baseline median.
+
+    Returns (regressions, comparisons), each a list of (scale, name, baseline ms, current ms);
+    current ms is None for a benchmark that failed.
+    """
+    comparisons = []
+    regressions = []
+    for scale, current in result['scales'].items():
+        previous = baseline.get('scales', {}).get(scale)
+        if previous is None:
+            continue
+        for name, stats in current['benchmarks'].items():
+            before = previous['benchmarks'].get(name, {}).get('median_ms')
+            after = stats.get('median_ms')
+            if before is None:
+                continue
+            comparisons.append((scale, name, before, after))
+            if after is None or (after - before >= min_delta_ms and after > before * (1 + threshold / 100)):
+                regressions.append((scale, name, before, after))
+    return regressions, comparisons
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the app's data-access helpers and routes on local PostgreSQL")
+    parser.add_argument('--dsn', help="Use this PostgreSQL database instead of starting a local server")
+    parser.add_argument('--pg-bin', help="Directory with initdb and pg_ctl for the local server")
+    parser.add_argument('--scales', default='1000,10000,50000', help="Comma-separated inventory row counts")
+    parser.add_argument('--runs', type=int, default=20, help="Timed calls per benchmark")
+    parser.add_argument('--warmup', type=int, default=3, help="Untimed calls before each benchmark")
+    parser.add_argument('--csv-rows', type=int, default=200, help="Rows in the generated CSV upload")
+    parser.add_argument('--save', help="Write the results to this JSON file")
+    parser.add_argument('--baseline', help="Compare against results saved with --save")
+    parser.add_argument('--threshold', type=float, default=20.0, help="Regression threshold in percent of the baseline median")
+    parser.add_argument('--min-delta-ms', type=float, default=1.0, help="Ignore slowdowns smaller than this")
+    args = parser.parse_args()
+    scales = [int(scale) for scale in args.scales.split(',') if scale.strip()]
+
+    print(f"🧪 Data-Access Benchmark: scales {scales}, {args.runs} runs each")
+    print("=" * 60)
+
+    server = None
+    if args.dsn:
+        conninfo = args.dsn
+    else:
+        server = LocalPostgres(args.pg_bin)
+        try:
+            conninfo = server.start()
+        except (RuntimeError, OSError, subprocess.CalledProcessError) as e:
+            server.stop()
+            print(f"❌ Could not start a local PostgreSQL server: {e}")
+            sys.exit(1)
+    try:
+        password = use_database(conninfo)
+        sys.path.insert(0, REPO_ROOT)
+        import app
+        pin_credentials(app, password)
+        if not app.warmup():
+            print("❌ Could not create the app's schema")
+            sys.exit(1)
+        with app.get_connection() as conn:
+            server_version = conn.execute("SHOW server_version").fetchone()[0]
+
+        result = {
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'postgres': server_version,
+            'runs': args.runs,
+            'csv_rows': args.csv_rows,
+            'scales': {str(items): run_scale(app, items, args) for items in scales}
+        }
+        app.close_connection_pool()
+        app.async_database.close()
+    finally:
+        if server is not None:
+            server.stop()
+
+    failed = False
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions, comparisons = compare(result, baseline, args.threshold, args.min_delta_ms)
+        print(f"\n📈 Against baseline {args.baseline} (threshold {args.threshold:g}%, {args.min_delta_ms:g} ms):")
+        for scale, name, before, after in comparisons:
+            flag = '❌' if (scale, name, before, after) in regressions else '  '
+            if after is None:
+                print(f"   {flag} {scale:>7} {name:<30} {before:>9.2f} -> failed")
+                continue
+            print(f"   {flag} {scale:>7} {name:<30} {before:>9.2f} -> {after:>9.2f} ms ({(after - before) / before * 100:+.1f}%)")
+        if regressions:
+            print(f"\n❌ {len(regressions)} benchmark(s) regressed")
+            failed = True
+        else:
+            print("\n✅ No regressions")
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(result, file, indent=2)
+        print(f"\n💾 Saved results to {args.save}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
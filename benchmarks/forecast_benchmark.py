@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark for the demand forecast path (/api/demand-forecast) against the local serving stub.
+
+Run the stub and the app in this process, with the app on a throwaway local PostgreSQL (as in
+db_benchmark.py) and both its database credentials and its serving token pinned, so no
+Databricks workspace is needed:
+
+    python benchmarks/forecast_benchmark.py --start-stub --start-app --requests 400 --concurrency 16
+
+Or start the stub and an app (pointed at the stub with MODEL_ENDPOINT_URL) yourself, then run:
+
+    python benchmarks/model_serving_stub.py --port 8081 --latency-ms 40 &
+    MODEL_ENDPOINT_URL=http://127.0.0.1:8081/serving-endpoints/demand-forecast/invocations python app.py &
+    python benchmarks/forecast_benchmark.py --requests 400 --concurrency 16
+
+An app started that way still fetches a Databricks OAuth token for its serving calls.
+
+Scenarios:
+  cold      every request is a new SKU, so each one reaches the endpoint (cache misses)
+  warm      a small set of SKUs requested repeatedly (cache hits, no endpoint calls)
+  failure   the stub fails every call; shows retries, the circuit breaker opening and fallbacks
+  recovery  the stub is healthy again; waits for the breaker's half-open trial and shows it closing
+
+App overhead is reported as the app's latency minus the stub's injected latency, which covers
+payload building, JSON encoding, the token refresh check and Flask itself.
+"""
+
+import argparse
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from model_serving_stub import start_stub
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+_sessions = threading.local()
+
+def get_session():
+    """Keep-alive session per worker thread."""
+    if not hasattr(_sessions, 'session'):
+        _sessions.session = requests.Session()
+    return _sessions.session
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of samples."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+def forecast_request(base_url, sku_id, warehouse_id=1, category_id=1):
+    """Call /api/demand-forecast once; returns (latency_ms, suggestion or None)."""
+    params = {'warehouse_id': warehouse_id, 'category_id': category_id, 'sku_id': sku_id,
+              'current_quantity': 5, 'minimum_stock': 10}
+    start = time.perf_counter()
+    try:
+        response = get_session().get(f"{base_url}/api/demand-forecast", params=params, timeout=30)
+        body = response.json() if response.status_code == 200 else None
+    except requests.exceptions.RequestException:
+        body = None
+    return (time.perf_counter() - start) * 1000, body
+
+def run_load(base_url, sku_ids, concurrency):
+    """Request a forecast for each SKU with the given concurrency; returns per-request results."""
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(lambda sku_id: forecast_request(base_url, sku_id), sku_ids))
+
+def is_fallback(body):
+    reasoning = (body or {}).get('reasoning', '')
+    return reasoning.startswith('Error retrieving AI forecast') or 'not configured' in reasoning
+
+def get_json(url):
+    try:
+        return requests.get(url, timeout=10).json()
+    except (requests.exceptions.RequestException, ValueError):
+        return {}
+
+def configure_stub(stub_url, **settings):
+    return requests.post(f"{stub_url}/stub/config", json=settings, timeout=10).json()
+
+def report(name, results, elapsed, stub_latency_ms=None, extra=None):
+    latencies = [latency for latency, _ in results]
+    failed = sum(1 for _, body in results if body is None)
+    fallbacks = sum(1 for _, body in results if body is not None and is_fallback(body))
+    p50 = percentile(latencies, 50)
+    p99 = percentile(latencies, 99)
+    print(f"\n📊 {name}: {len(results)} requests in {elapsed:.2f}s ({len(results) / elapsed:.1f} req/s)")
+    print(f"   p50 {p50:.1f} ms | p99 {p99:.1f} ms | max {max(latencies):.1f} ms")
+    print(f"   HTTP failures: {failed} | minimum-stock fallbacks: {fallbacks}")
+    if stub_latency_ms is not None:
+        print(f"   app overhead over {stub_latency_ms:.0f} ms endpoint latency: p50 {p50 - stub_latency_ms:.1f} ms | p99 {p99 - stub_latency_ms:.1f} ms")
+    for line in extra or []:
+        print(f"   {line}")
+    return {'requests': len(results), 'p50_ms': p50, 'p99_ms': p99, 'failures': failed, 'fallbacks': fallbacks}
+
+def serving_summary(base_url):
+    stats = get_json(f"{base_url}/api/model-serving/stats")
+    breaker = stats.get('circuit_breaker', {})
+    cache = get_json(f"{base_url}/api/demand-forecast/cache-stats")
+    return stats, [
+        f"endpoint requests {stats.get('requests')} | retries {stats.get('retries')} | failures {stats.get('failures')} | short circuits {stats.get('short_circuits')}",
+        f"circuit breaker {breaker.get('state')} (opened {breaker.get('times_opened')} times)",
+        f"cache hit rate {cache.get('hit_rate')} ({cache.get('hits')} hits, {cache.get('misses')} misses)"
+    ]
+
+def pin_serving_token(app, token='stub-token'):
+    """Send a fixed bearer token to the stub instead of a Databricks OAuth token."""
+    app.serving_client.token_provider = lambda: token
+
+def start_app(args):
+    """Serve the app on --base-url from a background thread, backed by a local PostgreSQL (or
+    --dsn) and pointed at the stub. Returns a function that shuts both down."""
+    from werkzeug.serving import make_server
+    from db_benchmark import LocalPostgres, use_database, pin_credentials
+
+    database = None
+    if args.dsn:
+        conninfo = args.dsn
+    else:
+        database = LocalPostgres(args.pg_bin)
+        try:
+            conninfo = database.start()
+        except (RuntimeError, OSError, subprocess.CalledProcessError) as e:
+            database.stop()
+            print(f"❌ Could not start a local PostgreSQL server: {e}")
+            sys.exit(1)
+    password = use_database(conninfo)
+    # Read by the app's config when it is imported
+    os.environ['MODEL_ENDPOINT_URL'] = f"{args.stub_url}/serving-endpoints/demand-forecast/invocations"
+    sys.path.insert(0, REPO_ROOT)
+    import app
+    pin_credentials(app, password)
+    pin_serving_token(app)
+    if not app.warmup():
+        if database is not None:
+            database.stop()
+        print("❌ Could not create the app's schema")
+        sys.exit(1)
+
+    base_url = urlparse(args.base_url)
+    # One access log line per request would drown out the report
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server(base_url.hostname, base_url.port, app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"🧪 Started the app at {args.base_url} with pinned credentials")
+
+    def stop():
+        server.shutdown()
+        app.close_connection_pool()
+        if database is not None:
+            database.stop()
+    return stop
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /api/demand-forecast against the model serving stub")
+    parser.add_argument('--base-url', default='http://localhost:8080', help="Running inventory app")
+    parser.add_argument('--stub-url', default='http://127.0.0.1:8081', help="Model serving stub (control endpoints)")
+    parser.add_argument('--start-stub', action='store_true', help="Start the stub in this process on the --stub-url port")
+    parser.add_argument('--start-app', action='store_true',
+                        help="Serve the app in this process on the --base-url port, on a local PostgreSQL with pinned credentials")
+    parser.add_argument('--dsn', help="With --start-app, use this PostgreSQL database instead of starting a local server")
+    parser.add_argument('--pg-bin', help="With --start-app, directory with initdb and pg_ctl for the local server")
+    parser.add_argument('--requests', type=int, default=400, help="Requests per scenario")
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--latency-ms', type=float, default=40.0, help="Stub latency for the cold and warm scenarios")
+    parser.add_argument('--sku-base', type=int, default=None, help="First SKU id used for cache-missing requests")
+    args = parser.parse_args()
+
+    if args.start_stub:
+        port = int(args.stub_url.rsplit(':', 1)[1])
+        print(f"🧪 Started model serving stub at {start_stub(port).url}")
+    stop_app = start_app(args) if args.start_app else None
+    try:
+        run_scenarios(args)
+    finally:
+        if stop_app is not None:
+            stop_app()
+
+def run_scenarios(args):
+    print("🧪 Demand Forecast Latency Benchmark")
+    print("=" * 60)
+    configure_stub(args.stub_url, latency_ms=args.latency_ms, jitter_ms=0, error_rate=0)
+    # Unused SKU ids so nothing is cached or precomputed yet
+    next_sku = args.sku_base or 1_000_000 + int(time.time()) % 1_000_000 * 10
+    def fresh_skus(count):
+        nonlocal next_sku
+        next_sku += count
+        return list(range(next_sku - count, next_sku))
+
+    start = time.perf_counter()
+    results = run_load(args.base_url, fresh_skus(args.requests), args.concurrency)
+    report("Cold (cache misses)", results, time.perf_counter() - start, args.latency_ms, serving_summary(args.base_url)[1])
+
+    hot_skus = fresh_skus(20)
+    run_load(args.base_url, hot_skus, args.concurrency)
+    start = time.perf_counter()
+    results = run_load(args.base_url, [hot_skus[i % len(hot_skus)] for i in range(args.requests)], args.concurrency)
+    report("Warm (cache hits)", results, time.perf_counter() - start, extra=serving_summary(args.base_url)[1])
+
+    configure_stub(args.stub_url, error_rate=1.0, error_status=503)
+    stub_before = get_json(f"{args.stub_url}/stub/stats")
+    start = time.perf_counter()
+    results = run_load(args.base_url, fresh_skus(args.requests), args.concurrency)
+    stats, summary = serving_summary(args.base_url)
+    stub_after = get_json(f"{args.stub_url}/stub/stats")
+    reached = stub_after.get('requests', 0) - stub_before.get('requests', 0)
+    report("Failure (endpoint returning 503)", results, time.perf_counter() - start,
+           extra=summary + [f"endpoint calls (retries included): {reached} for {args.requests} requests"])
+
+    configure_stub(args.stub_url, error_rate=0.0)
+    retry_in = stats.get('circuit_breaker', {}).get('retry_in_seconds')
+    if retry_in:
+        print(f"\n⏳ Waiting {retry_in:.1f}s for the circuit breaker's half-open trial...")
+        time.sleep(retry_in + 0.5)
+    start = time.perf_counter()
+    results = run_load(args.base_url, fresh_skus(args.requests), args.concurrency)
+    report("Recovery (endpoint healthy again)", results, time.perf_counter() - start, args.latency_ms,
+           serving_summary(args.base_url)[1])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Import-time benchmark for the app module, based on `python -X importtime`.
+Each run imports app in a fresh interpreter; the median cumulative time is reported with the
+slowest modules, and can be saved as a baseline and compared against later:
+
+    python benchmarks/import_time.py --save benchmarks/import_time_baseline.json
+    python benchmarks/import_time.py --baseline benchmarks/import_time_baseline.json
+
+Importing app must not contact Databricks or the database, so this runs without credentials.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+HEAVY_MODULES = ['databricks.sdk', 'pandas', 'numpy', 'requests', 'psycopg', 'psycopg_pool', 'flask']
+
+def import_once(module):
+    """Import module in a fresh interpreter; returns {module name: (self_us, cumulative_us)}."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+        cwd=REPO_ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        name = name.strip()
+        # A module is only imported once per interpreter; keep the first (real) entry
+        timings.setdefault(name, (int(self_us), int(cumulative_us)))
+    return timings
+
+def run_benchmark(module, runs):
+    samples = [import_once(module) for _ in range(runs)]
+    totals = [sample[module][1] / 1000 for sample in samples]
+    last = samples[-1]
+    slowest = sorted(last.items(), key=lambda item: item[1][0], reverse=True)[:10]
+    return {
+        'module': module,
+        'runs': runs,
+        'median_ms': round(statistics.median(totals), 1),
+        'min_ms': round(min(totals), 1),
+        'heavy_modules': {name: round(last[name][1] / 1000, 1) for name in HEAVY_MODULES if name in last},
+        'slowest_self_ms': {name: round(timing[0] / 1000, 1) for name, timing in slowest}
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure how long importing the app takes")
+    parser.add_argument('--module', default='app')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--save', help="Write the result to this JSON file")
+    parser.add_argument('--baseline', help="Compare against a result saved with --save")
+    args = parser.parse_args()
+
+    print(f"🧪 Import Time Benchmark: import {args.module} ({args.runs} runs)")
+    print("=" * 60)
+    try:
+        result = run_benchmark(args.module, args.runs)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    print(f"📊 Median {result['median_ms']} ms (min {result['min_ms']} ms)")
+    print("   Heavy dependencies loaded (cumulative ms):")
+    for name in HEAVY_MODULES:
+        loaded = result['heavy_modules'].get(name)
+        print(f"     {name:<16} {'not imported' if loaded is None else f'{loaded} ms'}")
+    print("   Slowest modules (self ms):")
+    for name, self_ms in result['slowest_self_ms'].items():
+        print(f"     {name:<40} {self_ms}")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        change = result['median_ms'] - baseline['median_ms']
+        print(f"\n📈 Baseline {baseline['median_ms']} ms -> {result['median_ms']} ms ({change:+.1f} ms, "
+              f"{change / baseline['median_ms'] * 100:+.1f}%)")
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(result, file, indent=2)
+        print(f"\n💾 Saved result to {args.save}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for a Databricks Model Serving endpoint.
+Speaks the dataframe_split -> predictions protocol with configurable latency and error injection,
+so the forecast path can be exercised and benchmarked without a workspace.
+
+Run it, then start the app with MODEL_ENDPOINT_URL pointing at it:
+
+    python benchmarks/model_serving_stub.py --port 8081 --latency-ms 40
+    MODEL_ENDPOINT_URL=http://127.0.0.1:8081/serving-endpoints/demand-forecast/invocations python app.py
+
+Behaviour can be changed while running with POST /stub/config (JSON with any of latency_ms,
+jitter_ms, error_rate, error_status) and counters read with GET /stub/stats.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class StubState:
+    """Injected latency and errors plus request counters, shared by all handler threads."""
+
+    def __init__(self, latency_ms=40.0, jitter_ms=0.0, error_rate=0.0, error_status=503):
+        self.lock = threading.Lock()
+        self.settings = {
+            'latency_ms': float(latency_ms),
+            'jitter_ms': float(jitter_ms),
+            'error_rate': float(error_rate),
+            'error_status': int(error_status)
+        }
+        self.requests = 0
+        self.rows = 0
+        self.errors = 0
+
+    def configure(self, **settings):
+        """Update settings; unknown keys are ignored. Returns the settings in effect."""
+        with self.lock:
+            for name, value in settings.items():
+                if name in self.settings:
+                    self.settings[name] = type(self.settings[name])(value)
+            return dict(self.settings)
+
+    def stats(self):
+        with self.lock:
+            return {**self.settings, 'requests': self.requests, 'rows': self.rows, 'errors': self.errors}
+
+def predict(row):
+    """Deterministic demand for a (warehouse_id, category_id, sku_id, month) row."""
+    warehouse_id, category_id, sku_id, month = row
+    return float(10 + (warehouse_id * 7 + category_id * 3 + sku_id) % 40 + month)
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def send_json(self, status, body):
+        content = json.dumps(body).encode()
+        try:
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up waiting (latency budget spent)
+            pass
+
+    def read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length) or b'{}')
+
+    def do_GET(self):
+        if self.path == '/stub/stats':
+            self.send_json(200, self.server.state.stats())
+        else:
+            self.send_json(404, {'error_code': 'NOT_FOUND'})
+
+    def do_POST(self):
+        state = self.server.state
+        if self.path == '/stub/config':
+            self.send_json(200, state.configure(**self.read_json()))
+            return
+        if not (self.path.startswith('/serving-endpoints/') and self.path.endswith('/invocations')):
+            self.send_json(404, {'error_code': 'NOT_FOUND'})
+            return
+
+        try:
+            split = self.read_json()['dataframe_split']
+            columns = split['columns']
+            order = [columns.index(col) for col in ('warehouse_id', 'category_id', 'sku_id', 'month')]
+            rows = [[int(record[i]) for i in order] for record in split['data']]
+        except (KeyError, ValueError, TypeError) as e:
+            self.send_json(400, {'error_code': 'BAD_REQUEST', 'message': f"Invalid dataframe_split payload: {e}"})
+            return
+
+        settings = state.stats()
+        with state.lock:
+            state.requests += 1
+            state.rows += len(rows)
+        delay = settings['latency_ms'] + random.uniform(0, settings['jitter_ms'])
+        time.sleep(delay / 1000)
+
+        if random.random() < settings['error_rate']:
+            with state.lock:
+                state.errors += 1
+            self.send_json(settings['error_status'], {'error_code': 'INJECTED_ERROR', 'message': 'Injected by model serving stub'})
+            return
+        self.send_json(200, {'predictions': [predict(row) for row in rows]})
+
+    def log_message(self, *args):
+        pass
+
+def start_stub(port=0, host='127.0.0.1', **settings):
+    """Start the stub on a background thread and return the server; server.url is the invocations URL."""
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    server.state = StubState(**settings)
+    server.base_url = f"http://{host}:{server.server_port}"
+    server.url = f"{server.base_url}/serving-endpoints/demand-forecast/invocations"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Model Serving stand-in for the demand forecast endpoint")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency-ms', type=float, default=40.0, help="Base latency added to every invocation")
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help="Extra random latency, uniform in [0, jitter]")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of invocations that fail")
+    parser.add_argument('--error-status', type=int, default=503, help="HTTP status returned for injected errors")
+    args = parser.parse_args()
+
+    server = start_stub(args.port, args.host, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                        error_rate=args.error_rate, error_status=args.error_status)
+    print(f"🧪 Model serving stub listening on {server.url}")
+    print(f"   Set MODEL_ENDPOINT_URL={server.url} for the app")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,10 @@ import os
 import yaml
 from typing import Dict, Any, Optional
 
+# Connections the app may hold in total on each Lakebase capacity tier, leaving headroom
+# for sync pipelines, notebooks and admin sessions. Override with POSTGRES_MAX_CONNECTIONS.
+LAKEBASE_CONNECTION_BUDGETS = {'CU_1': 50, 'CU_2': 100, 'CU_4': 200, 'CU_8': 400}
+
 class Config:
     """Configuration class that loads settings from environment variables and YAML file."""
     
@@ -38,12 +42,47 @@ class Config:
             'DATABRICKS_HOST': ['databricks', 'host'],
             'DASHBOARD_ID': ['databricks', 'dashboard_id'],
             'MODEL_ENDPOINT_NAME': ['databricks', 'model_endpoint_name'],
+            'MODEL_ENDPOINT_URL': ['databricks', 'model_endpoint_url'],
             'SECRET_KEY': ['app', 'secret_key'],
             'PORT': ['app', 'port'],
             'DEBUG': ['app', 'debug'],
             'POSTGRES_CATEGORY_TABLE': ['database', 'category_table'],
             'POSTGRES_WAREHOUSE_TABLE': ['database', 'warehouse_table'],
-            'POSTGRES_SUPPLIER_TABLE': ['database', 'supplier_table']
+            'POSTGRES_SUPPLIER_TABLE': ['database', 'supplier_table'],
+            'FORECAST_CACHE_SIZE': ['forecast', 'cache_size'],
+            'FORECAST_CACHE_TTL_SECONDS': ['forecast', 'cache_ttl_seconds'],
+            'FORECAST_BATCH_SIZE': ['forecast', 'batch_size'],
+            'FORECAST_MAX_AGE_HOURS': ['forecast', 'max_age_hours'],
+            'FORECAST_PRECOMPUTED_ONLY': ['forecast', 'precomputed_only'],
+            'FORECAST_MODE': ['forecast', 'mode'],
+            'FORECAST_LOCAL_MODEL_PATH': ['forecast', 'local_model_path'],
+            'MODEL_SERVING_POOL_SIZE': ['model_serving', 'pool_size'],
+            'MODEL_SERVING_LATENCY_BUDGET_SECONDS': ['model_serving', 'latency_budget_seconds'],
+            'MODEL_SERVING_MAX_RETRIES': ['model_serving', 'max_retries'],
+            'MODEL_SERVING_BREAKER_FAILURES': ['model_serving', 'breaker_failures'],
+            'MODEL_SERVING_BREAKER_RESET_SECONDS': ['model_serving', 'breaker_reset_seconds'],
+            'SERVER_WORKERS': ['server', 'workers'],
+            'SERVER_THREADS': ['server', 'threads'],
+            'SERVER_GRACEFUL_TIMEOUT_SECONDS': ['server', 'graceful_timeout_seconds'],
+            'LAKEBASE_CAPACITY': ['database', 'capacity'],
+            'POSTGRES_MAX_CONNECTIONS': ['database', 'max_connections'],
+            'ASYNC_POOL_MAX_SIZE': ['database', 'async_pool_max_size'],
+            'POSTGRES_READ_HOST': ['database', 'read_host'],
+            'READ_YOUR_WRITES_SECONDS': ['database', 'read_your_writes_seconds'],
+            'POSTGRES_POOL_MIN_SIZE': ['database', 'pool_min_size'],
+            'POSTGRES_POOL_MAX_SIZE': ['database', 'pool_max_size'],
+            'POSTGRES_POOL_TIMEOUT_SECONDS': ['database', 'pool_timeout_seconds'],
+            'POSTGRES_POOL_MAX_IDLE_SECONDS': ['database', 'pool_max_idle_seconds'],
+            'POSTGRES_POOL_MAX_LIFETIME_SECONDS': ['database', 'pool_max_lifetime_seconds'],
+            'SLOW_QUERY_THRESHOLD_MS': ['slow_query', 'threshold_ms'],
+            'SLOW_QUERY_SAMPLE_RATE': ['slow_query', 'sample_rate'],
+            'SLOW_QUERY_EXPLAIN': ['slow_query', 'explain'],
+            'SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS': ['slow_query', 'explain_interval_seconds'],
+            'PROFILING_ENABLED': ['profiling', 'enabled'],
+            'PROFILING_TOKEN': ['profiling', 'token'],
+            'PROFILING_INTERVAL_MS': ['profiling', 'interval_ms'],
+            'LOG_LEVEL': ['logging', 'level'],
+            'LOG_FORMAT': ['logging', 'format']
         }
         
         for env_var, config_path in env_mappings.items():
@@ -124,7 +163,11 @@ class Config:
         return self.get('databricks.model_endpoint_name')
     
     def get_model_endpoint_url(self) -> Optional[str]:
-        """Get the model serving endpoint URL."""
+        """Get the model serving endpoint URL (MODEL_ENDPOINT_URL overrides the workspace endpoint)."""
+        override_url = self.get('databricks.model_endpoint_url')
+        if override_url:
+            return override_url
+        
         host = self.get('databricks.host')
         endpoint_name = self.get_model_endpoint_name()
         
@@ -138,6 +181,127 @@ class Config:
         """Check if model serving endpoint is configured."""
         return self.get_model_endpoint_url() is not None
     
+    def get_forecast_cache_size(self) -> int:
+        """Get the maximum number of cached forecast predictions."""
+        return int(self.get('forecast.cache_size', 4096))
+    
+    def get_forecast_cache_ttl_seconds(self) -> float:
+        """Get how long a cached forecast prediction stays valid."""
+        return float(self.get('forecast.cache_ttl_seconds', 21600))
+    
+    def get_forecast_batch_size(self) -> int:
+        """Get the number of rows sent per request when precomputing forecasts."""
+        return int(self.get('forecast.batch_size', 5000))
+    
+    def get_forecast_max_age_hours(self) -> float:
+        """Get how old a precomputed forecast may be before it is ignored."""
+        return float(self.get('forecast.max_age_hours', 36))
+    
+    def is_forecast_precomputed_only(self) -> bool:
+        """Check if suggestions must only use precomputed forecasts (no live endpoint calls)."""
+        return self.get('forecast.precomputed_only', False) is True
+    
+    def get_forecast_mode(self) -> str:
+        """Get where demand forecasts are scored: 'serving' (model serving endpoint) or 'local' (in-process)."""
+        return str(self.get('forecast.mode', 'serving')).lower()
+    
+    def get_local_model_path(self) -> str:
+        """Get the path of the exported demand forecasting model used in local mode."""
+        return self.get('forecast.local_model_path', 'models/demand_forecast_model.npz')
+    
+    def get_model_serving_config(self) -> Dict[str, Any]:
+        """Get connection pool, latency budget, retry and circuit breaker settings for model serving."""
+        return {
+            'pool_size': int(self.get('model_serving.pool_size', 10)),
+            'latency_budget': float(self.get('model_serving.latency_budget_seconds', 5)),
+            'max_retries': int(self.get('model_serving.max_retries', 2)),
+            'breaker_failures': int(self.get('model_serving.breaker_failures', 5)),
+            'breaker_reset_seconds': float(self.get('model_serving.breaker_reset_seconds', 30))
+        }
+    
+    def get_server_workers(self) -> int:
+        """Get the number of pre-forked server worker processes (default: one per CPU)."""
+        return max(1, int(self.get('server.workers', os.cpu_count() or 1)))
+    
+    def get_server_threads(self) -> int:
+        """Get the number of request threads per server worker."""
+        return max(1, int(self.get('server.threads', 8)))
+    
+    def get_server_graceful_timeout(self) -> float:
+        """Get how long a stopping worker may finish in-flight requests and drain its pool."""
+        return float(self.get('server.graceful_timeout_seconds', 30))
+    
+    def get_connection_budget(self) -> int:
+        """Get how many Lakebase connections the whole app (all workers) may hold."""
+        max_connections = self.get('database.max_connections')
+        if max_connections:
+            return int(max_connections)
+        capacity = str(self.get('database.capacity', 'CU_1')).upper()
+        return LAKEBASE_CONNECTION_BUDGETS.get(capacity, LAKEBASE_CONNECTION_BUDGETS['CU_1'])
+    
+    def get_worker_connection_share(self) -> int:
+        """Get how many connections one worker may hold across its sync and async pools."""
+        return self.get_connection_budget() // self.get_server_workers()
+    
+    def get_pool_max_size(self) -> int:
+        """Get the connection pool size for one worker: POSTGRES_POOL_MAX_SIZE, or one connection
+        per request thread, capped by what the async pool leaves of the worker's budget share."""
+        remaining = self.get_worker_connection_share() - self.get_async_pool_max_size()
+        return max(1, min(int(self.get('database.pool_max_size', self.get_server_threads())), remaining))
+    
+    def get_pool_settings(self) -> Dict[str, Any]:
+        """Get the ConnectionPool arguments for one worker's pool."""
+        max_size = self.get_pool_max_size()
+        return {
+            'min_size': min(max(0, int(self.get('database.pool_min_size', 2))), max_size),
+            'max_size': max_size,
+            'timeout': float(self.get('database.pool_timeout_seconds', 30)),
+            'max_idle': float(self.get('database.pool_max_idle_seconds', 600)),
+            'max_lifetime': float(self.get('database.pool_max_lifetime_seconds', 3600))
+        }
+    
+    def get_async_pool_max_size(self) -> int:
+        """Get the async connection pool size for one worker. It comes out of the worker's budget
+        share first, leaving at least one connection for the sync pool. Async handlers multiplex
+        many requests over a few connections, so the default is small."""
+        share = self.get_worker_connection_share()
+        return max(1, min(int(self.get('database.async_pool_max_size', 4)), share - 1))
+    
+    def get_slow_query_settings(self) -> Dict[str, Any]:
+        """Get statement timing and slow-query log settings."""
+        return {
+            'threshold_ms': float(self.get('slow_query.threshold_ms', 500)),
+            'sample_rate': min(1.0, max(0.0, float(self.get('slow_query.sample_rate', 1.0)))),
+            'explain': bool(self.get('slow_query.explain', False)),
+            'explain_interval': float(self.get('slow_query.explain_interval_seconds', 300))
+        }
+    
+    def get_profiling_settings(self) -> Dict[str, Any]:
+        """Get request profiling settings; profiling is only enabled together with an admin token."""
+        token = self.get('profiling.token')
+        return {
+            'enabled': bool(self.get('profiling.enabled', False)) and bool(token),
+            'token': str(token) if token else None,
+            'interval_ms': max(0.1, float(self.get('profiling.interval_ms', 1)))
+        }
+    
+    def get_logging_settings(self) -> Dict[str, Any]:
+        """Get the log level and format ('json' lines, or 'text' for reading in a terminal)."""
+        level = str(self.get('logging.level', 'INFO')).upper()
+        log_format = str(self.get('logging.format', 'json')).lower()
+        return {
+            'level': level if level in ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL') else 'INFO',
+            'format': log_format if log_format in ('json', 'text') else 'json'
+        }
+    
+    def get_read_replica_host(self) -> Optional[str]:
+        """Get the host of a Lakebase readable secondary for read-only queries, if configured."""
+        return self.get('database.read_host') or None
+    
+    def get_read_your_writes_window(self) -> float:
+        """Get how long a session reads from the primary after it writes, so it sees its own writes."""
+        return float(self.get('database.read_your_writes_seconds', 5))
+    
     def print_config_summary(self):
         """Print a summary of the current configuration."""
         print("📋 Configuration Summary:")
@@ -146,6 +310,11 @@ class Config:
         print(f"  Dashboard ID: {self.get('databricks.dashboard_id', 'Not set')}")
         print(f"  Model endpoint configured: {self.is_model_endpoint_configured()}")
         print(f"  Model endpoint name: {self.get_model_endpoint_name() or 'Not set'}")
+        print(f"  Forecast mode: {self.get_forecast_mode()}")
+        print(f"  Read replica: {self.get_read_replica_host() or 'Not set'}")
+        logging_settings = self.get_logging_settings()
+        print(f"  Logging: {logging_settings['level']} ({logging_settings['format']})")
+        print(f"  Server: {self.get_server_workers()} workers x {self.get_server_threads()} threads, pool max {self.get_pool_max_size()} per worker, async pool max {self.get_async_pool_max_size()}")
 
 # Global config instance
 config = Config()
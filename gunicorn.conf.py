@@ -0,0 +1,47 @@
+"""
+Gunicorn configuration for serving the inventory app in production.
+
+    gunicorn -c gunicorn.conf.py app:app
+
+Runs SERVER_WORKERS pre-forked worker processes (default: one per CPU) with SERVER_THREADS
+request threads each. The master runs the one-time database setup before forking, then
+closes its pool; every worker opens its own pool after the fork, sized from its threads
+and its share of the Lakebase connection budget, and drains it on graceful shutdown.
+"""
+
+import os
+
+from config import config as app_config
+
+bind = f"0.0.0.0:{os.getenv('PORT', 8080)}"
+workers = app_config.get_server_workers()
+threads = app_config.get_server_threads()
+worker_class = 'gthread'
+graceful_timeout = int(app_config.get_server_graceful_timeout())
+timeout = 120
+keepalive = 5
+accesslog = '-'
+
+def on_starting(server):
+    """Create the schema and load sample data once, before any worker exists."""
+    import app
+    app.warmup()
+    # Workers inherit the warmed-up module but must not share the master's connections
+    app.close_connection_pool()
+
+def post_worker_init(worker):
+    """Open and health-check this worker's own pools so its first requests don't pay connection setup."""
+    import app
+    if app.prewarm_connection_pools():
+        worker.log.info(f"Worker {os.getpid()} pool ready (max {app_config.get_pool_max_size()} connections)")
+    else:
+        worker.log.warning(f"Worker {os.getpid()} could not warm up its pool yet")
+
+def worker_exit(server, worker):
+    """Drain the worker's pools once in-flight requests have finished."""
+    import app
+    app.close_connection_pool()
+    app.async_database.close()
+    # Write out log records still queued for the background writer
+    from app_logging import flush_logging
+    flush_logging()
@@ -0,0 +1,198 @@
+"""
+In-process scoring for the demand forecasting model.
+The RandomForest + OneHotEncoder model from notebook 2.2 is exported to a single .npz file
+of plain numpy arrays, which is loaded once at startup and scored with vectorized numpy,
+so forecasts need neither scikit-learn nor a network round trip.
+Rows with a category the encoder never saw are answered from compact fallback tables of
+mean training quantity per (warehouse, category, month) and per (warehouse, category).
+"""
+
+import numpy as np
+from typing import Any, Dict, Optional, Sequence
+
+FORMAT_VERSION = 1
+
+FALLBACK_TABLES = ('fallback_month_keys', 'fallback_month_means', 'fallback_category_keys', 'fallback_category_means')
+
+def fallback_key(warehouse_id, category_id, month) -> np.ndarray:
+    """Pack (warehouse_id, category_id, month) into sortable int64 keys; month 0 stands for all months."""
+    return (
+        (np.asarray(warehouse_id, dtype=np.int64) << 40)
+        | (np.asarray(category_id, dtype=np.int64) << 16)
+        | np.asarray(month, dtype=np.int64)
+    )
+
+def build_fallback_tables(warehouse_id, category_id, month, quantity) -> Dict[str, np.ndarray]:
+    """Compute mean quantity per (warehouse, category, month) and per (warehouse, category).
+
+    Returns sorted int64 key arrays with float32 means, ready to be stored with the model.
+    """
+    quantity = np.asarray(quantity, dtype=np.float64)
+    tables = {}
+    for name, keys in (('month', fallback_key(warehouse_id, category_id, month)),
+                       ('category', fallback_key(warehouse_id, category_id, 0))):
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        means = np.bincount(inverse, weights=quantity) / np.bincount(inverse)
+        tables[f'fallback_{name}_keys'] = unique_keys
+        tables[f'fallback_{name}_means'] = means.astype(np.float32)
+    return tables
+
+def lookup_fallback(keys: np.ndarray, means: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """Look up query keys in a sorted fallback table; keys not in the table give NaN."""
+    result = np.full(len(query), np.nan)
+    if len(keys):
+        positions = np.minimum(np.searchsorted(keys, query), len(keys) - 1)
+        found = keys[positions] == query
+        result[found] = means[positions[found]]
+    return result
+
+def export_model(model, encoder, feature_cols: Sequence[str], path: str,
+                 fallback: Optional[Dict[str, np.ndarray]] = None) -> Dict[str, Any]:
+    """Export a fitted RandomForestRegressor and OneHotEncoder(handle_unknown='ignore') to an .npz file.
+
+    fallback holds the tables from build_fallback_tables; without it, unseen categories are
+    scored by the forest like the encoder's all-zero encoding. Only public fitted attributes
+    are read, so this does not import scikit-learn itself. Returns a summary of the exported model.
+    """
+    trees = [estimator.tree_ for estimator in model.estimators_]
+    offsets = np.zeros(len(trees) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([tree.node_count for tree in trees])
+
+    def concat(attribute, dtype):
+        return np.concatenate([np.asarray(getattr(tree, attribute)) for tree in trees]).astype(dtype)
+
+    # Child indices become global node ids; leaves keep -1
+    children_left = concat('children_left', np.int64)
+    children_right = concat('children_right', np.int64)
+    for i, tree in enumerate(trees):
+        nodes = slice(offsets[i], offsets[i + 1])
+        for children in (children_left, children_right):
+            internal = children[nodes] >= 0
+            children[nodes][internal] += offsets[i]
+
+    arrays = {
+        'format_version': np.array(FORMAT_VERSION),
+        'feature_cols': np.array(list(feature_cols)),
+        'tree_offsets': offsets,
+        'children_left': children_left,
+        'children_right': children_right,
+        'feature': concat('feature', np.int64),
+        'threshold': concat('threshold', np.float64),
+        'value': np.concatenate([np.asarray(tree.value)[:, 0, 0] for tree in trees]).astype(np.float64)
+    }
+    for i, categories in enumerate(encoder.categories_):
+        arrays[f'categories_{i}'] = np.asarray(categories, dtype=np.float64)
+    if fallback is not None:
+        arrays.update({name: fallback[name] for name in FALLBACK_TABLES})
+    np.savez_compressed(path, **arrays)
+    return {'path': path, 'trees': len(trees), 'nodes': int(offsets[-1]), 'features': list(feature_cols),
+            'fallback_keys': len(fallback['fallback_month_keys']) if fallback is not None else 0}
+
+class LocalForecastModel:
+    """Vectorized numpy scorer for an exported RandomForest + OneHotEncoder model."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        version = int(arrays['format_version'])
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported model format version {version}")
+        self.feature_cols = [str(col) for col in arrays['feature_cols']]
+        self.categories = [np.asarray(arrays[f'categories_{i}']) for i in range(len(self.feature_cols))]
+        self.tree_offsets = np.asarray(arrays['tree_offsets'])
+        self.children_left = np.asarray(arrays['children_left'])
+        self.children_right = np.asarray(arrays['children_right'])
+        self.feature = np.asarray(arrays['feature'])
+        self.threshold = np.asarray(arrays['threshold'])
+        self.value = np.asarray(arrays['value'])
+        self.is_leaf = self.children_left < 0
+        self.n_trees = len(self.tree_offsets) - 1
+        self.fallback = {name: np.asarray(arrays[name]) for name in FALLBACK_TABLES} if FALLBACK_TABLES[0] in arrays else None
+
+        # Start of each feature's one-hot block in the encoded matrix
+        sizes = [len(categories) for categories in self.categories]
+        self.column_offsets = np.concatenate([[0], np.cumsum(sizes)]).astype(np.int64)
+
+    @classmethod
+    def load(cls, path: str) -> 'LocalForecastModel':
+        """Load an exported model file."""
+        with np.load(path, allow_pickle=False) as data:
+            return cls({name: data[name] for name in data.files})
+
+    def _category_positions(self, X: np.ndarray):
+        """Yield (feature index, category positions, known mask) for each feature column."""
+        for i, categories in enumerate(self.categories):
+            positions = np.minimum(np.searchsorted(categories, X[:, i]), len(categories) - 1)
+            yield i, positions, categories[positions] == X[:, i]
+
+    def encode(self, X: np.ndarray) -> np.ndarray:
+        """One-hot encode rows like OneHotEncoder(handle_unknown='ignore'); unseen values encode as zeros."""
+        encoded = np.zeros((X.shape[0], int(self.column_offsets[-1])), dtype=np.float32)
+        rows = np.arange(X.shape[0])
+        for i, positions, known in self._category_positions(X):
+            encoded[rows[known], self.column_offsets[i] + positions[known]] = 1.0
+        return encoded
+
+    def unseen_rows(self, X: np.ndarray) -> np.ndarray:
+        """Mask of rows with at least one value the encoder never saw."""
+        unseen = np.zeros(X.shape[0], dtype=bool)
+        for _, _, known in self._category_positions(X):
+            unseen |= ~known
+        return unseen
+
+    def _apply_fallback(self, X: np.ndarray, predictions: np.ndarray) -> np.ndarray:
+        """Replace predictions for unseen rows with the (warehouse, category, month) or (warehouse, category) mean."""
+        unseen = self.unseen_rows(X)
+        if self.fallback is None or not unseen.any():
+            return predictions
+        columns = {col: X[unseen, i] for i, col in enumerate(self.feature_cols)}
+        warehouse_id, category_id = columns['warehouse_id'], columns['category_id']
+        means = lookup_fallback(self.fallback['fallback_month_keys'], self.fallback['fallback_month_means'],
+                                fallback_key(warehouse_id, category_id, columns['month']))
+        missing = np.isnan(means)
+        means[missing] = lookup_fallback(self.fallback['fallback_category_keys'], self.fallback['fallback_category_means'],
+                                         fallback_key(warehouse_id[missing], category_id[missing], 0))
+        predictions[unseen] = np.where(np.isnan(means), predictions[unseen], means)
+        return predictions
+
+    def predict(self, rows, chunk_size: int = 10000) -> np.ndarray:
+        """Predict demand for rows of feature values (in feature_cols order)."""
+        X = np.asarray(rows, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != len(self.feature_cols):
+            raise ValueError(f"Expected rows of {len(self.feature_cols)} features: {self.feature_cols}")
+        predictions = np.empty(X.shape[0], dtype=np.float64)
+        for start in range(0, X.shape[0], chunk_size):
+            chunk = X[start:start + chunk_size]
+            predictions[start:start + chunk_size] = self._predict_encoded(self.encode(chunk))
+        return self._apply_fallback(X, predictions)
+
+    def _predict_encoded(self, encoded: np.ndarray) -> np.ndarray:
+        """Walk every tree for every row at once and average the leaf values."""
+        n_rows = encoded.shape[0]
+        nodes = np.broadcast_to(self.tree_offsets[:-1], (n_rows, self.n_trees)).copy()
+        row_index = np.arange(n_rows)[:, None]
+        active = ~self.is_leaf[nodes]
+        while active.any():
+            features = self.feature[nodes]
+            go_left = encoded[row_index, np.where(active, features, 0)] <= self.threshold[nodes]
+            next_nodes = np.where(go_left, self.children_left[nodes], self.children_right[nodes])
+            nodes = np.where(active, next_nodes, nodes)
+            active = ~self.is_leaf[nodes]
+        return self.value[nodes].mean(axis=1)
+
+    def predict_payload(self, payload: Dict[str, Any]) -> list:
+        """Score a serving-style dataframe_split payload and return its predictions list."""
+        split = payload['dataframe_split']
+        order = [split['columns'].index(col) for col in self.feature_cols]
+        data = np.asarray(split['data'], dtype=np.float64).reshape(-1, len(split['columns']))
+        return self.predict(data[:, order]).tolist()
+
+def load_local_model(path: Optional[str]) -> Optional[LocalForecastModel]:
+    """Load the exported model, or return None (with a message) if it cannot be loaded."""
+    if not path:
+        return None
+    try:
+        model = LocalForecastModel.load(path)
+        print(f"✅ Loaded local forecast model from {path} ({model.n_trees} trees)")
+        return model
+    except Exception as e:
+        print(f"⚠️  Could not load local forecast model from {path}: {e}")
+        return None
@@ -0,0 +1,190 @@
+"""
+Opt-in per-request profiling.
+
+When profiling is enabled and a request carries the admin token (X-Profile-Token header or
+_profile query parameter), the handler runs under a profiler and the response is replaced
+by its report:
+
+- sample (default): a background thread samples the request thread's stack every interval.
+  Samples are split into time in the database driver, template rendering, JSON
+  serialization, external HTTP and everything else, and folded into flame-graph stacks
+  (_profile_format=collapsed gives the flamegraph.pl / speedscope input).
+- cprofile: deterministic cProfile of the request, reported as a pstats table.
+
+Nothing is installed unless profiling is enabled, so it costs nothing when off.
+"""
+
+import cProfile
+import hmac
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+# Where time is spent, judged by the innermost frame on the stack that matches
+CATEGORIES = (
+    ('db', ('/psycopg/', '/psycopg_pool/', '/psycopg_binary/')),
+    ('template', ('/jinja2/', '/markupsafe/')),
+    ('serialization', ('/json/', '/flask/json/')),
+    ('http', ('/requests/', '/urllib3/', '/http/client.py', '/ssl.py'))
+)
+MAX_STACK_DEPTH = 64
+
+def frame_label(code):
+    return f"{os.path.splitext(os.path.basename(code.co_filename))[0]}:{code.co_name}"
+
+def classify(filenames):
+    """Category of a stack given its filenames from innermost to outermost frame."""
+    for filename in filenames:
+        path = filename.replace('\\', '/')
+        for category, markers in CATEGORIES:
+            if any(marker in path for marker in markers):
+                return category
+    return 'app'
+
+class SamplingProfiler:
+    """Samples one thread's stack at a fixed interval from a background thread."""
+
+    def __init__(self, thread_id=None, interval=0.001):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.stacks = Counter()
+        self.leaves = Counter()
+        self.categories = Counter()
+        self.samples = 0
+        self.wall = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+        self._started = None
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.wall = time.perf_counter() - self._started
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            # Once stopping, the thread is only waiting for this sampler to finish
+            if frame is not None and not self._stop.is_set():
+                self.record(frame)
+
+    def record(self, frame):
+        labels = []
+        filenames = []
+        while frame is not None and len(labels) < MAX_STACK_DEPTH:
+            labels.append(frame_label(frame.f_code))
+            filenames.append(frame.f_code.co_filename)
+            frame = frame.f_back
+        self.samples += 1
+        self.leaves[labels[0]] += 1
+        self.categories[classify(filenames)] += 1
+        self.stacks[';'.join(reversed(labels))] += 1
+
+    def report(self, top=20):
+        """Time breakdown by category, hottest functions (self samples) and stacks."""
+        total = self.samples or 1
+        return {
+            'mode': 'sample',
+            'wall_ms': round(self.wall * 1000, 1),
+            'interval_ms': self.interval * 1000,
+            'samples': self.samples,
+            'breakdown': {
+                category: {
+                    'ms': round(self.wall * 1000 * self.categories[category] / total, 1),
+                    'percent': round(100 * self.categories[category] / total, 1)
+                }
+                for category in [name for name, _ in CATEGORIES] + ['app']
+            },
+            'top_functions': [{'function': name, 'samples': count} for name, count in self.leaves.most_common(top)],
+            'top_stacks': [{'stack': stack, 'samples': count} for stack, count in self.stacks.most_common(top)]
+        }
+
+    def collapsed(self):
+        """Folded stacks, one 'frame;frame;frame count' line each, for flame graph tools."""
+        return '\n'.join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + '\n'
+
+def format_sample_report(report, request_line):
+    lines = [f"Profile of {request_line}: {report['wall_ms']} ms wall, "
+             f"{report['samples']} samples every {report['interval_ms']} ms", "", "Time by category:"]
+    for category, share in report['breakdown'].items():
+        lines.append(f"  {category:<14} {share['ms']:>9.1f} ms  {share['percent']:>5.1f}%")
+    lines += ["", "Hottest functions (self samples):"]
+    lines += [f"  {entry['samples']:>6}  {entry['function']}" for entry in report['top_functions']]
+    lines += ["", "Hottest stacks:"]
+    lines += [f"  {entry['samples']:>6}  {entry['stack']}" for entry in report['top_stacks']]
+    return '\n'.join(lines) + '\n'
+
+def format_cprofile_report(profile, request_line, wall, top=40):
+    stream = io.StringIO()
+    stats = pstats.Stats(profile, stream=stream)
+    stats.strip_dirs().sort_stats('cumulative').print_stats(top)
+    return f"Profile of {request_line}: {round(wall * 1000, 1)} ms wall (cProfile)\n{stream.getvalue()}"
+
+def install_request_profiler(flask_app, token, interval=0.001):
+    """Register the hooks that profile requests carrying the admin token."""
+    from flask import g, request
+
+    def requested_token():
+        return request.headers.get('X-Profile-Token') or request.args.get('_profile')
+
+    @flask_app.before_request
+    def start_request_profiler():
+        supplied = requested_token()
+        if not supplied or not hmac.compare_digest(supplied.encode(), token.encode()):
+            return None
+        mode = request.args.get('_profile_mode', 'sample')
+        if mode == 'cprofile':
+            profile = cProfile.Profile()
+            g.request_profiler = ('cprofile', profile, time.perf_counter())
+            profile.enable()
+        else:
+            g.request_profiler = ('sample', SamplingProfiler(interval=interval).start(), None)
+        return None
+
+    @flask_app.after_request
+    def finish_request_profiler(response):
+        active = g.pop('request_profiler', None)
+        if active is None:
+            return response
+        mode, profiler, started = active
+        # The path only, so the token in a _profile query parameter never appears in the report
+        request_line = f"{request.method} {request.path} -> {response.status_code}"
+        if mode == 'cprofile':
+            profiler.disable()
+            body = format_cprofile_report(profiler, request_line, time.perf_counter() - started)
+            return flask_app.response_class(body, content_type='text/plain; charset=utf-8')
+
+        profiler.stop()
+        output = request.args.get('_profile_format', 'text')
+        if output == 'collapsed':
+            return flask_app.response_class(profiler.collapsed(), content_type='text/plain; charset=utf-8')
+        report = profiler.report()
+        if output == 'json':
+            return flask_app.response_class(json.dumps({'request': request_line, **report}),
+                                            content_type='application/json')
+        return flask_app.response_class(format_sample_report(report, request_line),
+                                        content_type='text/plain; charset=utf-8')
+
+    @flask_app.teardown_request
+    def discard_request_profiler(error=None):
+        # The handler raised before after_request ran; don't leave a profiler running
+        active = g.pop('request_profiler', None)
+        if active is not None:
+            mode, profiler, _ = active
+            if mode == 'cprofile':
+                profiler.disable()
+            else:
+                profiler.stop()
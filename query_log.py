@@ -0,0 +1,217 @@
+"""
+Statement instrumentation for psycopg connections.
+
+Pools open their connections with cursor_factory=TimedCursor (or TimedAsyncCursor), so every
+cur.execute()/executemany() is timed and recorded in the statement metrics, under the logical
+name of the data-access helper that issued it (set with query_name()). Statements slower
+than the threshold go to the slow-query log with redacted parameters and row counts; with
+explain enabled, slow SELECTs are re-run under EXPLAIN (ANALYZE, BUFFERS) to capture the
+plan, at most once per logical name per interval.
+"""
+
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+
+import psycopg
+from psycopg import sql
+
+from app_logging import get_logger
+from metrics import registry
+
+logger = get_logger('query_log')
+
+STATEMENT_LATENCY = registry.histogram('inventory_db_statement_duration_seconds',
+                                       'Latency of individual SQL statements by logical query name', ['query'])
+SLOW_STATEMENTS = registry.counter('inventory_db_slow_statements_total',
+                                   'Statements slower than the slow-query threshold', ['query'])
+
+# Logical name of the data-access helper running in this thread or task
+current_query = ContextVar('current_query', default=None)
+
+WRITE_STATEMENT = re.compile(r'\b(INSERT|UPDATE|DELETE|MERGE|TRUNCATE|CREATE|ALTER|DROP|CALL)\b', re.IGNORECASE)
+
+@contextmanager
+def query_name(name):
+    """Attribute the statements run inside the block to the logical query name."""
+    token = current_query.set(name)
+    try:
+        yield
+    finally:
+        current_query.reset(token)
+
+def redact_params(params):
+    """Describe parameters by type (and length for strings) without their values."""
+    def describe(value):
+        if isinstance(value, (str, bytes)):
+            return f"{type(value).__name__}({len(value)})"
+        if isinstance(value, (list, tuple)):
+            return f"{type(value).__name__}[{len(value)}]"
+        return type(value).__name__
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {name: describe(value) for name, value in params.items()}
+    return [describe(value) for value in params]
+
+def is_read_only(statement):
+    stripped = statement.lstrip().upper()
+    return stripped.startswith(('SELECT', 'WITH')) and not WRITE_STATEMENT.search(statement)
+
+class SlowQueryLog:
+    """Settings and in-memory history of slow statements for this process."""
+
+    def __init__(self, threshold_ms=500, sample_rate=1.0, explain=False, explain_interval=300, history=100):
+        self.configure(threshold_ms, sample_rate, explain, explain_interval)
+        self._entries = deque(maxlen=history)
+        self._last_explain = {}
+        self._lock = threading.Lock()
+
+    def configure(self, threshold_ms=500, sample_rate=1.0, explain=False, explain_interval=300):
+        self.threshold_ms = float(threshold_ms)
+        self.sample_rate = float(sample_rate)
+        self.explain = bool(explain)
+        self.explain_interval = float(explain_interval)
+
+    def should_time(self):
+        """Whether to instrument the next statement (sample_rate of them; 0 disables timing)."""
+        return self.sample_rate >= 1 or (self.sample_rate > 0 and random.random() < self.sample_rate)
+
+    def should_explain(self, name, statement):
+        """Whether to capture a plan: explain mode on, a read-only statement, and no plan for
+        this logical name within the interval."""
+        if not self.explain or not is_read_only(statement):
+            return False
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_explain.get(name)
+            if last is not None and now - last < self.explain_interval:
+                return False
+            self._last_explain[name] = now
+        return True
+
+    def record(self, name, statement, duration_ms, rowcount, params, executions=1, plan=None):
+        entry = {
+            'query': name,
+            'duration_ms': round(duration_ms, 1),
+            'rows': rowcount,
+            'executions': executions,
+            'params': redact_params(params),
+            'statement': ' '.join(statement.split())[:500],
+            'plan': plan,
+            'timestamp': datetime.now().isoformat()
+        }
+        with self._lock:
+            self._entries.append(entry)
+        logger.warning("Slow query %s: %s ms, %s rows", name, entry['duration_ms'], rowcount,
+                       extra={'query': name, 'duration_ms': entry['duration_ms'], 'rows': rowcount,
+                              'params': entry['params'], 'statement': entry['statement'], 'plan': plan})
+
+    def recent(self, limit=None):
+        """Most recent slow statements, newest first."""
+        with self._lock:
+            entries = list(self._entries)
+        entries.reverse()
+        return entries[:limit] if limit else entries
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._last_explain.clear()
+
+slow_query_log = SlowQueryLog()
+
+def statement_text(query, connection):
+    if isinstance(query, sql.Composable):
+        return query.as_string(connection)
+    return query.decode() if isinstance(query, bytes) else str(query)
+
+def observe_statement(cursor, query, params, started, executions=1):
+    """Record a finished statement; returns (name, statement) when it was slow, else None."""
+    duration = time.perf_counter() - started
+    name = current_query.get() or 'unnamed'
+    STATEMENT_LATENCY.observe(duration, query=name)
+    if duration * 1000 < slow_query_log.threshold_ms:
+        return None
+    SLOW_STATEMENTS.inc(query=name)
+    return name, statement_text(query, cursor.connection), duration * 1000
+
+class TimedCursor(psycopg.Cursor):
+    """Cursor that times every statement and logs the slow ones."""
+
+    def execute(self, query, params=None, **kwargs):
+        if not slow_query_log.should_time():
+            return super().execute(query, params, **kwargs)
+        started = time.perf_counter()
+        result = super().execute(query, params, **kwargs)
+        slow = observe_statement(self, query, params, started)
+        if slow:
+            name, statement, duration_ms = slow
+            plan = self._explain(statement, params) if slow_query_log.should_explain(name, statement) else None
+            slow_query_log.record(name, statement, duration_ms, self.rowcount, params, plan=plan)
+        return result
+
+    def executemany(self, query, params_seq, **kwargs):
+        if not slow_query_log.should_time():
+            return super().executemany(query, params_seq, **kwargs)
+        params_seq = list(params_seq)
+        started = time.perf_counter()
+        result = super().executemany(query, params_seq, **kwargs)
+        slow = observe_statement(self, query, None, started, len(params_seq))
+        if slow:
+            name, statement, duration_ms = slow
+            slow_query_log.record(name, statement, duration_ms, self.rowcount,
+                                  params_seq[0] if params_seq else None, executions=len(params_seq))
+        return result
+
+    def _explain(self, statement, params):
+        # In a savepoint, so a failing EXPLAIN can't abort the caller's transaction
+        try:
+            with self.connection.transaction():
+                with psycopg.Cursor(self.connection) as cur:
+                    cur.execute(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", params)
+                    return [row[0] for row in cur.fetchall()]
+        except Exception as e:
+            return [f"EXPLAIN failed: {e}"]
+
+class TimedAsyncCursor(psycopg.AsyncCursor):
+    """Async counterpart of TimedCursor."""
+
+    async def execute(self, query, params=None, **kwargs):
+        if not slow_query_log.should_time():
+            return await super().execute(query, params, **kwargs)
+        started = time.perf_counter()
+        result = await super().execute(query, params, **kwargs)
+        slow = observe_statement(self, query, params, started)
+        if slow:
+            name, statement, duration_ms = slow
+            plan = await self._explain(statement, params) if slow_query_log.should_explain(name, statement) else None
+            slow_query_log.record(name, statement, duration_ms, self.rowcount, params, plan=plan)
+        return result
+
+    async def executemany(self, query, params_seq, **kwargs):
+        if not slow_query_log.should_time():
+            return await super().executemany(query, params_seq, **kwargs)
+        params_seq = list(params_seq)
+        started = time.perf_counter()
+        result = await super().executemany(query, params_seq, **kwargs)
+        slow = observe_statement(self, query, None, started, len(params_seq))
+        if slow:
+            name, statement, duration_ms = slow
+            slow_query_log.record(name, statement, duration_ms, self.rowcount,
+                                  params_seq[0] if params_seq else None, executions=len(params_seq))
+        return result
+
+    async def _explain(self, statement, params):
+        try:
+            async with self.connection.transaction():
+                async with psycopg.AsyncCursor(self.connection) as cur:
+                    await cur.execute(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", params)
+                    return [row[0] for row in await cur.fetchall()]
+        except Exception as e:
+            return [f"EXPLAIN failed: {e}"]
@@ -0,0 +1,270 @@
+"""
+HTTP client for the Databricks Model Serving endpoint.
+Keeps connections alive in a pooled session, bounds each call by a latency budget with
+jittered retries, and trips a circuit breaker while the endpoint is unhealthy.
+"""
+
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from metrics import Histogram
+
+class ModelServingError(Exception):
+    """Raised when the serving endpoint cannot return predictions."""
+
+class CircuitOpenError(ModelServingError):
+    """Raised without calling the endpoint while the circuit breaker is open."""
+
+class CircuitBreaker:
+    """Closed/open/half-open circuit breaker.
+
+    After failure_threshold consecutive failures the circuit opens and calls are rejected
+    until reset_timeout seconds pass; then a single trial call is let through (half-open)
+    and its outcome closes or re-opens the circuit.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = float(reset_timeout)
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._times_opened = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    def allow_request(self) -> bool:
+        """Return True if a call may be made now."""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._consecutive_failures = 0
+            self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """Give back a half-open trial that ended without reaching the endpoint."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._consecutive_failures += 1
+            if self._state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self._times_opened += 1
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            state = self._current_state()
+            retry_in = None
+            if state == self.OPEN:
+                retry_in = round(max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at)), 3)
+            return {
+                'state': state,
+                'consecutive_failures': self._consecutive_failures,
+                'failure_threshold': self.failure_threshold,
+                'reset_timeout_seconds': self.reset_timeout,
+                'times_opened': self._times_opened,
+                'retry_in_seconds': retry_in
+            }
+
+class ModelServingClient:
+    """Pooled keep-alive client for a model serving invocations endpoint.
+
+    url_provider and token_provider are called per request so endpoint and OAuth token
+    changes are picked up without rebuilding the client. The HTTP session (and requests
+    itself) is only loaded on the first call. Each attempt's latency is observed in the
+    latency histogram, which may be shared with the metrics registry.
+    """
+
+    RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+    # Rejected credentials: no call can succeed until they change, so these count against the circuit
+    AUTH_FAILURE_STATUS_CODES = {401, 403}
+
+    def __init__(self, url_provider: Callable[[], Optional[str]], token_provider: Callable[[], str],
+                 pool_size: int = 10, latency_budget: float = 5.0, max_retries: int = 2,
+                 backoff_base: float = 0.1, connect_timeout: float = 3.05,
+                 breaker: Optional[CircuitBreaker] = None, latency: Optional[Histogram] = None):
+        self.url_provider = url_provider
+        self.token_provider = token_provider
+        self.latency_budget = float(latency_budget)
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_base = float(backoff_base)
+        self.connect_timeout = float(connect_timeout)
+        self.breaker = breaker or CircuitBreaker()
+        self.latency = latency or Histogram('model_serving_request_duration_seconds',
+                                            'Model serving call latency per attempt')
+        self.pool_size = max(1, int(pool_size))
+        self._session = None
+        self._counters = {'requests': 0, 'successes': 0, 'failures': 0, 'retries': 0, 'short_circuits': 0}
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        """Pooled keep-alive session, created on first use."""
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    self._session = session
+        return self._session
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def _backoff(self, attempt: int, remaining: float) -> bool:
+        """Sleep for a full-jitter exponential backoff; return False if the budget would run out."""
+        delay = random.uniform(0, self.backoff_base * (2 ** attempt))
+        if delay >= remaining:
+            return False
+        time.sleep(delay)
+        return True
+
+    def invoke(self, payload: Dict[str, Any], latency_budget: Optional[float] = None) -> Dict[str, Any]:
+        """POST payload to the endpoint and return the decoded JSON response.
+
+        The whole call, retries included, must finish within latency_budget seconds.
+        Raises CircuitOpenError while the breaker is open and ModelServingError on failure.
+        """
+        import requests
+
+        if not self.breaker.allow_request():
+            self._count('short_circuits')
+            raise CircuitOpenError("Model serving circuit is open; endpoint marked unhealthy")
+
+        # Everything after allow_request() must record an outcome, or a half-open trial
+        # would stay in flight and keep the circuit from ever closing
+        try:
+            url = self.url_provider()
+        except Exception:
+            self.breaker.release_trial()
+            raise
+        if not url:
+            self.breaker.release_trial()
+            raise ModelServingError("Model endpoint not configured")
+        try:
+            token = self.token_provider()
+        except Exception as e:
+            # No token means no call can succeed, so it counts against the endpoint's health
+            self._count('failures')
+            self.breaker.record_failure()
+            raise ModelServingError(f"Could not get a model serving token: {e}") from e
+        budget = float(latency_budget) if latency_budget is not None else self.latency_budget
+        deadline = time.monotonic() + budget
+        last_error = None
+
+        for attempt in range(self.max_retries + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            if attempt > 0:
+                self._count('retries')
+            self._count('requests')
+            started = time.monotonic()
+            try:
+                response = self.session.post(
+                    url,
+                    headers={
+                        "Authorization": f"Bearer {token}",
+                        "Content-Type": "application/json"
+                    },
+                    json=payload,
+                    timeout=(min(self.connect_timeout, remaining), remaining)
+                )
+            except requests.RequestException as e:
+                self.latency.observe(time.monotonic() - started)
+                last_error = ModelServingError(f"Model endpoint request failed: {e}")
+            except Exception:
+                self._count('failures')
+                self.breaker.record_failure()
+                raise
+            else:
+                self.latency.observe(time.monotonic() - started)
+                if response.status_code == 200:
+                    try:
+                        data = response.json()
+                    except ValueError as e:
+                        self._count('failures')
+                        self.breaker.record_failure()
+                        raise ModelServingError(f"Model endpoint returned invalid JSON: {e}") from e
+                    self._count('successes')
+                    self.breaker.record_success()
+                    return data
+                last_error = ModelServingError(
+                    f"Model endpoint returned status {response.status_code}: {response.text}"
+                )
+                if response.status_code in self.AUTH_FAILURE_STATUS_CODES:
+                    self._count('failures')
+                    self.breaker.record_failure()
+                    raise last_error
+                if response.status_code not in self.RETRYABLE_STATUS_CODES:
+                    # The request itself was rejected: says nothing about the endpoint's health,
+                    # so the failure streak is left as it is
+                    self._count('failures')
+                    self.breaker.release_trial()
+                    raise last_error
+            if attempt < self.max_retries and not self._backoff(attempt, deadline - time.monotonic()):
+                break
+
+        self._count('failures')
+        self.breaker.record_failure()
+        raise last_error or ModelServingError(f"Model endpoint exceeded latency budget of {budget}s")
+
+    def predict(self, payload: Dict[str, Any], latency_budget: Optional[float] = None) -> List[Any]:
+        """Invoke the endpoint and return its predictions list."""
+        data = self.invoke(payload, latency_budget)
+        if 'predictions' not in data:
+            raise ModelServingError(f"Unexpected response format: {data}")
+        return data['predictions']
+
+    def stats(self) -> Dict[str, Any]:
+        """Return request counters, breaker state and the latency sample count and mean."""
+        with self._lock:
+            counters = dict(self._counters)
+        latency = self.latency.value()
+        return {
+            **counters,
+            'latency_budget_seconds': self.latency_budget,
+            'max_retries': self.max_retries,
+            'circuit_breaker': self.breaker.snapshot(),
+            'latency_ms': {
+                'count': latency['count'],
+                'sum_ms': round(latency['sum'] * 1000, 3),
+                'mean_ms': round(latency['sum'] * 1000 / latency['count'], 3) if latency['count'] else None
+            }
+        }
@@ -0,0 +1,84 @@
+"""
+Single-flight request coalescing.
+Concurrent callers asking for the same key share one in-flight call and its result.
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Sequence
+
+class _Call:
+    """One in-flight call that followers can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Coalesce concurrent calls for identical keys into a single execution."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.leader_calls = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Run fn for key, or wait for and share the result of a call already in flight."""
+        return self.do_many([key], lambda keys: {keys[0]: fn()})[key]
+
+    def do_many(self, keys: Sequence[Hashable], fn: Callable[[List[Hashable]], Dict[Hashable, Any]]) -> Dict[Hashable, Any]:
+        """Resolve many keys at once.
+
+        Keys already in flight are waited on; the rest are passed to a single fn(keys) call,
+        which must return a dict with a result for each key it was given. If the call
+        raises, every caller waiting on those keys receives the same exception.
+        """
+        leading = []
+        following = []
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                call = self._calls.get(key)
+                if call is None:
+                    call = self._calls[key] = _Call()
+                    leading.append((key, call))
+                else:
+                    following.append((key, call))
+            if leading:
+                self.leader_calls += 1
+            self.coalesced += len(following)
+
+        if leading:
+            try:
+                results = fn([key for key, _ in leading])
+                for key, call in leading:
+                    if key not in results:
+                        raise KeyError(f"No result returned for {key!r}")
+                    call.result = results[key]
+            except BaseException as e:
+                for _, call in leading:
+                    call.error = e
+                raise
+            finally:
+                with self._lock:
+                    for key, call in leading:
+                        del self._calls[key]
+                for _, call in leading:
+                    call.done.set()
+
+        resolved = {key: call.result for key, call in leading}
+        for key, call in following:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            resolved[key] = call.result
+        return resolved
+
+    def stats(self) -> Dict[str, int]:
+        """Return leader call and coalesced key counts and the number of keys in flight."""
+        with self._lock:
+            return {
+                'leader_calls': self.leader_calls,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._calls)
+            }
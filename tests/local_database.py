@@ -0,0 +1,100 @@
+"""
+Throwaway PostgreSQL for tests that exercise the app's SQL.
+
+Reuses the local server from benchmarks/db_benchmark.py: the app is pointed at it with
+pinned credentials, its schema is created with init_database(), and everything is torn
+down afterwards. When no PostgreSQL binaries (or pgserver) are available, local_app_database()
+yields None and the calling test skips itself.
+
+Also holds the helpers every test file shares: reference data for the database tests and
+the runner used when a test file is executed directly instead of through pytest.
+"""
+
+import os
+import sys
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+@contextmanager
+def local_app_database():
+    """Yield the app module connected to a fresh local database with the app's schema, or None."""
+    from db_benchmark import LocalPostgres, use_database, pin_credentials
+
+    server = LocalPostgres()
+    try:
+        conninfo = server.start()
+    except Exception as e:
+        server.stop()
+        print(f"  ⚠️  Skipping: no local PostgreSQL ({e})")
+        yield None
+        return
+
+    saved_env = dict(os.environ)
+    import app
+    saved_credentials = (app.postgres_password, app.last_password_refresh)
+    try:
+        password = use_database(conninfo)
+        os.environ['POSTGRES_SCHEMA'] = 'inventory_test'
+        app.close_connection_pool(timeout=0)
+        pin_credentials(app, password)
+        if not app.init_database():
+            raise RuntimeError("Could not create the app's schema")
+        yield app
+    finally:
+        app.close_connection_pool(timeout=5)
+        app.postgres_password, app.last_password_refresh = saved_credentials
+        os.environ.clear()
+        os.environ.update(saved_env)
+        server.stop()
+
+def execute(app, query, params=None):
+    """Run one statement on the app's pool and return its rows (None when it returns none)."""
+    with app.get_connection() as conn:
+        cur = conn.execute(query, params)
+        rows = cur.fetchall() if cur.description else None
+        conn.commit()
+        return rows
+
+def seed_reference_data(app):
+    """Insert the category, warehouses, supplier and SKUs the database tests build on."""
+    schema = app.get_schema_name()
+    execute(app, f"INSERT INTO {schema}.inventory_category (category_name) VALUES ('Tools')")
+    execute(app, f"INSERT INTO {schema}.inventory_warehouse (warehouse_name) VALUES ('North'), ('South')")
+    execute(app, f"INSERT INTO {schema}.inventory_supplier (supplier_name) VALUES ('Acme')")
+    execute(app, f"""INSERT INTO {schema}.inventory_sku (sku_code, item_name, category_id, unit_price)
+                     VALUES ('HAM-1', 'Hammer', 1, 10), ('SAW-1', 'Saw', 1, 20)""")
+
+def run_tests(title, tests):
+    """Run (name, test) pairs when a test file is executed as a script, and print a summary.
+
+    The tests assert their checks, so under pytest a failing check fails the test; here a
+    failed assertion or an exception marks that test as failed. Returns True when all passed.
+    """
+    print(title)
+    print("=" * 60)
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            results.append((test_name, True))
+        except AssertionError as e:
+            print(f"  ❌ {e}")
+            results.append((test_name, False))
+        except Exception as e:
+            print(f"❌ {test_name} test failed with exception: {e}")
+            results.append((test_name, False))
+
+    print("\n" + "=" * 60)
+    print("📊 Test Results Summary:")
+
+    all_passed = True
+    for test_name, passed in results:
+        status = "✅ PASS" if passed else "❌ FAIL"
+        print(f"   {status} {test_name}")
+        if not passed:
+            all_passed = False
+
+    return all_passed
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test script to verify that importing the app has no side effects, that create_app() builds
+complete apps and that a failed warmup is retried. The import runs in a fresh interpreter
+without Databricks credentials or a database.
+"""
+
+import sys
+import os
+import json
+import subprocess
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from local_database import run_tests
+
+REPO_ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+CHECK_IMPORT = """
+import json, sys
+import app
+print(json.dumps({
+    'workspace_client': app.workspace_client is not None,
+    'connection_pool': app.connection_pool is not None,
+    'database_ready': app.database_ready,
+    'lazy_modules_loaded': [name for name in ('databricks.sdk', 'numpy', 'pandas', 'requests') if name in sys.modules],
+    'routes': len(list(app.app.url_map.iter_rules())),
+    'factory_routes': len(list(app.create_app().url_map.iter_rules())),
+    'factory_commands': sorted(app.create_app().cli.commands)
+}))
+"""
+
+def test_import_has_no_side_effects():
+    """Test that importing app creates no clients or pools and skips heavy imports."""
+    print("🧪 Testing Side-Effect-Free App Import")
+    print("=" * 50)
+
+    env = {name: value for name, value in os.environ.items()
+           if not name.startswith(('DATABRICKS_', 'PG'))}
+    result = subprocess.run([sys.executable, '-c', CHECK_IMPORT], cwd=REPO_ROOT, env=env,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, f"Import failed: {result.stderr[-500:]}"
+    state = json.loads(result.stdout.strip().splitlines()[-1])
+
+    assert not state['workspace_client'], "No workspace client created"
+    assert not state['connection_pool'], "No connection pool opened"
+    assert state['database_ready'] is None, "Database not initialized yet"
+    assert state['lazy_modules_loaded'] == [], "Heavy modules imported lazily"
+    assert state['routes'] > 40, "Routes registered"
+    assert state['factory_routes'] == state['routes'], "Each created app gets every route"
+    assert state['factory_commands'] == ['precompute-forecasts', 'warmup'], "CLI commands registered"
+
+def test_failed_warmup_is_retried():
+    """Test that warmup() tries again after the database fails to initialize."""
+    print("🧪 Testing Warmup Retry")
+    print("=" * 50)
+
+    import app
+
+    attempts = []
+    saved = (app.database_ready, app.startup_configured, app.init_database,
+             app.prewarm_connection_pools, app.config.print_config_summary)
+    app.database_ready, app.startup_configured = None, False
+    app.init_database = lambda: attempts.append('init') or attempts.count('init') > 1
+    app.prewarm_connection_pools = lambda: True
+    app.config.print_config_summary = lambda: attempts.append('config')
+    try:
+        first = app.warmup()
+        after_failure = app.database_ready
+        second = app.warmup()
+        third = app.warmup()
+    finally:
+        (app.database_ready, app.startup_configured, app.init_database,
+         app.prewarm_connection_pools, app.config.print_config_summary) = saved
+
+    assert first is False and after_failure is None, "Failed warmup leaves the database not ready"
+    assert second is True and third is True, "Next warmup retries and succeeds"
+    assert attempts == ['config', 'init', 'init'], "Configuration printed once, initialization retried once"
+
+def main():
+    """Run all app import tests."""
+    return run_tests("🧪 App Import Testing", [
+        ("Side-Effect-Free Import", test_import_has_no_side_effects),
+        ("Warmup Retry", test_failed_warmup_is_retried)
+    ])
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test script to verify structured logging: JSON records, levels, the background queue
+handler and per-request correlation ids. No database is needed.
+"""
+
+import sys
+import os
+import io
+import json
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from local_database import run_tests
+
+def test_structured_records():
+    """Test that records are queued, written by the listener as JSON, and filtered by level."""
+    print("🧪 Testing Structured Records")
+    print("=" * 50)
+
+    from app_logging import configure_logging, flush_logging, get_logger, request_id
+    from config import config
+
+    stream = io.StringIO()
+    handler = configure_logging('INFO', 'json', stream)
+    try:
+        listener_before = handler.listener
+        logger = get_logger('test')
+        token = request_id.set('req-42')
+        try:
+            logger.debug("Hidden at INFO")
+            logger.info("Loaded %s rows", 3, extra={'table': 'inventory_items'})
+            try:
+                raise ValueError("bad row")
+            except ValueError:
+                logger.error("Import failed", exc_info=True)
+        finally:
+            request_id.reset(token)
+        logger.warning("Outside a request")
+        flush_logging()
+        records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    finally:
+        settings = config.get_logging_settings()
+        configure_logging(settings['level'], settings['format'])
+
+    info = records[0] if records else {}
+    assert listener_before is None, "No listener thread until the first record"
+    assert len(records) == 3, "Debug records dropped at INFO"
+    assert info.get('message') == "Loaded 3 rows", "Message formatted with its arguments"
+    assert info.get('level') == 'INFO' and info.get('logger') == 'inventory.test', "Level and logger recorded"
+    assert info.get('request_id') == 'req-42', "Request id attached"
+    assert info.get('table') == 'inventory_items', "Extra fields included"
+    assert 'ValueError: bad row' in records[1].get('exception', '') if len(records) > 1 else False, \
+        "Traceback included"
+    assert records[-1].get('request_id') == '-' if records else False, "Placeholder id outside a request"
+
+def test_request_ids():
+    """Test that each response carries a request id, keeping a well-formed caller-supplied one."""
+    print("🧪 Testing Request Correlation Ids")
+    print("=" * 50)
+
+    import app
+    from app_logging import new_request_id, request_id
+
+    saved = app.database_ready
+    # Skip warmup; /metrics doesn't touch the database
+    app.database_ready = True
+    try:
+        client = app.app.test_client()
+        supplied = client.get('/metrics', headers={'X-Request-ID': 'trace-abc.1'}).headers.get('X-Request-ID')
+        generated = client.get('/metrics').headers.get('X-Request-ID')
+        replaced = client.get('/metrics', headers={'X-Request-ID': 'not an id'}).headers.get('X-Request-ID')
+    finally:
+        app.database_ready = saved
+
+    assert supplied == 'trace-abc.1', "Supplied id echoed"
+    assert bool(generated) and len(generated) == 32, "Id generated when missing"
+    assert replaced not in (None, 'not an id'), "Malformed id replaced"
+    assert new_request_id('x' * 200) != 'x' * 200, "Overlong id replaced"
+    assert request_id.get() is None, "Id unbound after the request"
+
+def main():
+    """Run all logging tests."""
+    return run_tests("🧪 Structured Logging Testing", [
+        ("Structured Records", test_structured_records),
+        ("Request Ids", test_request_ids)
+    ])
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
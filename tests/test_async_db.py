@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the async database runner used by the /api/v2 handlers.
+No database is needed: the runner is exercised with plain coroutines and an unreachable host.
+"""
+
+import sys
+import os
+import time
+import asyncio
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from local_database import run_tests
+
+def test_background_loop():
+    """Test that coroutines run on one shared loop thread and can be awaited from other loops."""
+    print("🧪 Testing Async Database Loop")
+    print("=" * 50)
+
+    from async_db import AsyncDatabase
+
+    database = AsyncDatabase(lambda: 'host=unused')
+    try:
+        async def loop_thread():
+            await asyncio.sleep(0)
+            return threading.current_thread().name
+
+        async def slow(value):
+            await asyncio.sleep(0.2)
+            return value
+
+        async def fan_out():
+            started = time.monotonic()
+            results = await asyncio.gather(*(database.call(slow(i)) for i in range(5)))
+            return results, time.monotonic() - started
+
+        results, elapsed = asyncio.run(fan_out())
+        assert database.run(loop_thread(), timeout=5) == 'async-db', "Sync callers get the result"
+        assert asyncio.run(database.call(loop_thread())) == 'async-db', \
+            "Awaiting from another event loop works"
+        assert results == [0, 1, 2, 3, 4], "Gathered calls keep their order"
+        assert elapsed < 0.5, "Gathered calls run concurrently"
+    finally:
+        database.close()
+
+def test_pool_rebuild_and_close():
+    """Test that the pool is rebuilt with fresh credentials once stale, and closed with the loop."""
+    print("\n🧪 Testing Async Pool Rebuild")
+    print("=" * 50)
+
+    from async_db import AsyncDatabase
+
+    calls = []
+    def conninfo():
+        calls.append(time.time())
+        return 'host=/nonexistent dbname=unused connect_timeout=1'
+
+    database = AsyncDatabase(conninfo, min_size=0, max_size=2, refresh_after=3600)
+    first = database.run(database.get_pool(), timeout=5)
+    same = database.run(database.get_pool(), timeout=5)
+    builds_while_fresh = len(calls)
+    database.refresh_after = 0
+    time.sleep(0.01)
+    rebuilt = database.run(database.get_pool(), timeout=5)
+    stats = database.get_stats()
+    thread = database._thread
+    closed = database.close(timeout=1)
+
+    assert first is same and builds_while_fresh == 1, "Pool reused while fresh"
+    assert rebuilt is not first and len(calls) == 2, "Pool rebuilt once stale"
+    assert stats.get('pool_max') == 2, "Stats come from the current pool"
+    assert closed and not thread.is_alive(), "Close stops the loop thread"
+    assert database.get_stats() == {}, "Stats empty after close"
+
+def main():
+    """Run all async database tests."""
+    return run_tests("🧪 Async Database Testing", [
+        ("Background Loop", test_background_loop),
+        ("Pool Rebuild", test_pool_rebuild_and_close)
+    ])
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -97,6 +97,65 @@ def test_iframe_url_format():
     
     return True
 
+def test_pool_sizing():
+    """Test per-worker pool sizing from workers, threads and the Lakebase capacity tier. The
+    sync and async pools of one worker share its slice of the budget."""
+    print("\n🔌 Testing Connection Pool Sizing")
+    print("=" * 50)
+    
+    from config import Config
+    
+    test_cases = [
+        ({'server': {'workers': 4, 'threads': 8}, 'database': {'capacity': 'CU_1'}}, 8, 4),
+        ({'server': {'workers': 16, 'threads': 8}, 'database': {'capacity': 'CU_1'}}, 1, 2),
+        ({'server': {'workers': 16, 'threads': 8}, 'database': {'capacity': 'CU_4'}}, 8, 4),
+        ({'server': {'workers': 2, 'threads': 16}, 'database': {'max_connections': 20}}, 6, 4),
+        ({'server': {'workers': 2, 'threads': 4}, 'database': {'max_connections': 20, 'async_pool_max_size': 12}}, 1, 9),
+        ({'server': {'workers': 64, 'threads': 8}, 'database': {'capacity': 'unknown'}}, 1, 1)
+    ]
+    
+    all_passed = True
+    for settings, expected, expected_async in test_cases:
+        test_config = Config(yaml_file="nonexistent.yaml")
+        test_config.config = settings
+        pool_size = test_config.get_pool_max_size()
+        async_size = test_config.get_async_pool_max_size()
+        share = test_config.get_worker_connection_share()
+        passed = pool_size == expected and async_size == expected_async and (share < 2 or pool_size + async_size <= share)
+        all_passed = all_passed and passed
+        print(f"  {'✅' if passed else '❌'} {settings}: pool max {pool_size}, async max {async_size} "
+              f"(expected {expected}, {expected_async})")
+    
+    return all_passed
+
+def test_pool_settings():
+    """Test pool tuning settings, including the override of the computed pool size."""
+    print("\n🔌 Testing Connection Pool Settings")
+    print("=" * 50)
+    
+    from config import Config
+    
+    test_cases = [
+        ({'server': {'workers': 4, 'threads': 8}},
+         {'min_size': 2, 'max_size': 8, 'timeout': 30.0, 'max_idle': 600.0, 'max_lifetime': 3600.0}),
+        ({'server': {'workers': 4, 'threads': 8}, 'database': {'pool_max_size': 20, 'pool_min_size': 4, 'pool_timeout_seconds': 5,
+                                                                'pool_max_idle_seconds': 60, 'pool_max_lifetime_seconds': 900}},
+         {'min_size': 4, 'max_size': 8, 'timeout': 5.0, 'max_idle': 60.0, 'max_lifetime': 900.0}),
+        ({'server': {'workers': 1, 'threads': 1}, 'database': {'pool_min_size': 5}},
+         {'min_size': 1, 'max_size': 1, 'timeout': 30.0, 'max_idle': 600.0, 'max_lifetime': 3600.0})
+    ]
+    
+    all_passed = True
+    for settings, expected in test_cases:
+        test_config = Config(yaml_file="nonexistent.yaml")
+        test_config.config = settings
+        pool_settings = test_config.get_pool_settings()
+        passed = pool_settings == expected
+        all_passed = all_passed and passed
+        print(f"  {'✅' if passed else '❌'} {settings}: {pool_settings}")
+    
+    return all_passed
+
 def main():
     """Run all configuration tests."""
     print("🧪 Configuration and Iframe URL Testing")
@@ -104,7 +163,9 @@ def main():
     
     tests = [
         ("Configuration Loading", test_config_loading),
-        ("Iframe URL Format", test_iframe_url_format)
+        ("Iframe URL Format", test_iframe_url_format),
+        ("Connection Pool Sizing", test_pool_sizing),
+        ("Connection Pool Settings", test_pool_settings)
     ]
     
     results = []
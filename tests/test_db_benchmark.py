@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the data-access benchmark's statistics, generated uploads and
+baseline comparison. No database is needed.
+"""
+
+import sys
+import os
+import csv
+import io
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from local_database import run_tests
+
+def test_summary_and_dataset():
+    """Test latency statistics and that generated CSV uploads only reference generated rows."""
+    print("🧪 Testing Benchmark Statistics and Datasets")
+    print("=" * 50)
+
+    from db_benchmark import summarize, dataset_shape, generate_csv
+
+    stats = summarize([0.001 * n for n in range(1, 21)])
+    shape = dataset_shape(10000)
+    rows = list(csv.DictReader(io.StringIO(generate_csv(shape, 50))))
+
+    assert stats['median_ms'] == 10.5, "Median in milliseconds"
+    assert stats['p95_ms'] == 19.0, "p95 by nearest rank"
+    assert stats['min_ms'] == 1.0 and stats['runs'] == 20, "Minimum and run count"
+    assert shape['skus'] == 2500 and dataset_shape(10)['skus'] == 50, "SKUs scale with the dataset"
+    assert len(rows) == 50, "CSV has the requested rows"
+    assert all(1 <= int(row['sku_code'].split('-')[1]) <= shape['skus'] for row in rows), \
+        "CSV references generated SKUs"
+    assert all(1 <= int(row['warehouse_id']) <= shape['warehouses'] for row in rows), \
+        "CSV references generated warehouses"
+    assert generate_csv(shape, 50) == generate_csv(shape, 50), "CSV is deterministic"
+
+def test_baseline_comparison():
+    """Test that slowdowns beyond both the percentage and absolute thresholds, and failures of
+    benchmarks that have a baseline, regress."""
+    print("🧪 Testing Baseline Comparison")
+    print("=" * 50)
+
+    from db_benchmark import compare
+
+    def result(**medians):
+        return {'scales': {'1000': {'benchmarks': {name: {'median_ms': ms} for name, ms in medians.items()}}}}
+
+    baseline = result(get_inventory_items=10.0, get_low_stock_items=0.5, process_csv_file=100.0, removed=1.0)
+    current = result(get_inventory_items=13.0, get_low_stock_items=0.8, process_csv_file=110.0, added=5.0)
+    current['scales']['5000'] = {'benchmarks': {'get_inventory_items': {'median_ms': 99.0}}}
+    current['scales']['1000']['benchmarks']['failed'] = {'error': 'call failed'}
+    current['scales']['1000']['benchmarks']['removed'] = {'error': 'call failed'}
+
+    regressions, comparisons = compare(current, baseline, threshold=20, min_delta_ms=1.0)
+    names = [name for _, name, _, _ in regressions]
+
+    assert 'get_inventory_items' in names, "Slowdown over threshold and delta regresses"
+    assert 'get_low_stock_items' not in names, "Large relative but tiny absolute slowdown ignored"
+    assert 'process_csv_file' not in names, "Slowdown under threshold ignored"
+    assert ('1000', 'removed', 1.0, None) in regressions, "Failure after a baseline median regresses"
+    assert 'failed' not in names, "Failure without a baseline ignored"
+    assert len(regressions) == 2, "Only regressions flagged"
+    assert len(comparisons) == 4, "Only benchmarks with a baseline compared"
+    assert all(scale == '1000' for scale, _, _, _ in comparisons), "Scales missing from the baseline skipped"
+
+def main():
+    """Run all benchmark tests."""
+    return run_tests("🧪 Data-Access Benchmark Testing", [
+        ("Statistics and Datasets", test_summary_and_dataset),
+        ("Baseline Comparison", test_baseline_comparison)
+    ])
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
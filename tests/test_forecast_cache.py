@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the demand forecast LRU/TTL cache.
+"""
+
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from local_database import run_tests
+
+def test_hits_and_misses():
+    """Test that cached predictions are returned and counted."""
+    print("🧪 Testing Forecast Cache Hits and Misses")
+    print("=" * 50)
+
+    from forecast_cache import ForecastCache
+
+    cache = ForecastCache(max_size=10, ttl_seconds=60)
+    key = (1, 2, 3, 7)
+
+    assert cache.get(key) is None, "Empty cache misses"
+    cache.put(key, 42.5)
+    assert cache.get(key) == 42.5, "Stored prediction is returned"
+
+    stats = cache.stats()
+    assert stats['hits'] == 1 and stats['misses'] == 1, "One hit and one miss counted"
+    assert stats['hit_rate'] == 0.5, "Hit rate is 0.5"
+
+def test_lru_eviction():
+    """Test that the least recently used entry is evicted when the cache is full."""
+    print("\n🧪 Testing Forecast Cache LRU Eviction")
+    print("=" * 50)
+
+    from forecast_cache import ForecastCache
+
+    cache = ForecastCache(max_size=2, ttl_seconds=60)
+    cache.put('a', 1.0)
+    cache.put('b', 2.0)
+    cache.get('a')  # 'b' is now least recently used
+    cache.put('c', 3.0)
+
+    assert cache.get('a') == 1.0, "Recently used entry kept"
+    assert cache.get('b') is None, "Least recently used entry evicted"
+    assert cache.get('c') == 3.0, "Newest entry kept"
+    assert cache.stats()['evictions'] == 1, "Eviction counted"
+    assert len(cache) == 2, "Size bounded"
+
+def test_ttl_expiry():
+    """Test that entries expire after the time-to-live."""
+    print("\n🧪 Testing Forecast Cache TTL Expiry")
+    print("=" * 50)
+
+    from forecast_cache import ForecastCache
+
+    cache = ForecastCache(max_size=10, ttl_seconds=0.05)
+    cache.put('key', 5.0)
+    fresh = cache.get('key') == 5.0
+    time.sleep(0.1)
+    expired = cache.get('key') is None
+
+    assert fresh, "Entry returned before expiry"
+    assert expired, "Entry dropped after expiry"
+    assert cache.stats()['expirations'] == 1, "Expiration counted"
+
+def main():
+    """Run all forecast cache tests."""
+    return run_tests("🧪 Forecast Cache Testing", [
+        ("Hits and Misses", test_hits_and_misses),
+        ("LRU Eviction", test_lru_eviction),
+        ("TTL Expiry", test_ttl_expiry)
+    ])
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Test script to verify that forecast payloads are built without pandas and match the
+dataframe_split payload the pandas version produced. No database or endpoint is needed.
+"""
+
+import sys
+import os
+import json
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from local_database import run_tests
+
+ROWS = [(1, 2, 3, 7), (1, 2, 3, 8), (12, 5, 40123, 12)]
+
+def test_payload_shape():
+    """Test the payload from tuples and from numpy arrays of different dtypes."""
+    print("🧪 Testing Forecast Payload Shape")
+    print("=" * 50)
+
+    from app import build_forecast_payload
+
+    payload = build_forecast_payload(ROWS)
+    split = payload['dataframe_split']
+    from_ints = build_forecast_payload(np.array(ROWS, dtype=np.int32))
+    from_floats = build_forecast_payload(np.array(ROWS, dtype=np.float32))
+    empty = build_forecast_payload([])
+
+    assert split['columns'] == ['warehouse_id', 'category_id', 'sku_id', 'month'], \
+        "Feature columns in model order"
+    assert split['data'] == [[1.0, 2.0, 3.0, 7.0], [1.0, 2.0, 3.0, 8.0], [12.0, 5.0, 40123.0, 12.0]], \
+        "One row per input row"
+    assert all(type(value) is float for row in split['data'] for value in row), "Values are plain floats"
+    assert from_ints == payload, "Integer array gives the same payload"
+    assert from_floats == payload, "Float array gives the same payload"
+    assert all(type(value) is float for row in from_ints['dataframe_split']['data'] for value in row), \
+        "Array values are plain floats"
+    assert empty['dataframe_split']['data'] == [], "Empty batch"
+    assert json.loads(json.dumps(payload)) == payload, "JSON serializable"
+
+def test_matches_pandas_payload():
+    """Test parity with the payload built through a pandas DataFrame before; skipped without pandas."""
+    print("🧪 Testing Parity with the pandas Payload")
+    print("=" * 50)
+
+    try:
+        import pandas as pd
+    except ImportError:
+        print("  ⚠️  pandas not installed, skipping parity test")
+        return
+
+    from app import build_forecast_payload
+
+    rng = np.random.default_rng(3)
+    rows = [tuple(int(v) for v in row) for row in rng.integers(1, 5000, size=(500, 4))]
+    frame = pd.DataFrame([
+        {"warehouse_id": float(w), "category_id": float(c), "sku_id": float(s), "month": float(m)}
+        for w, c, s, m in rows
+    ])
+    expected = {"dataframe_split": {"columns": frame.columns.tolist(), "data": frame.values.tolist()}}
+
+    assert build_forecast_payload(rows) == expected, "Same payload as pandas"
+    assert json.dumps(build_forecast_payload(np.array(rows))) == json.dumps(expected), "Same JSON as pandas"
+
+def main():
+    """Run all forecast payload tests."""
+    return run_tests("🧪 Forecast Payload Testing", [
+        ("Payload Shape", test_payload_shape),
+        ("pandas Parity", test_matches_pandas_payload)
+    ])
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test script to verify demand forecast precomputation and batch entry validation.
+Precomputation runs against a throwaway local PostgreSQL, scoring with an in-process model
+whose prediction is a formula of its inputs; it skips itself when no PostgreSQL binaries
+are available.
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from local_database import local_app_database, execute, seed_reference_data, run_tests
+
+class FormulaModel:
+    """Stands in for the local model: predicts sku_id * 10 + month and counts scored rows."""
+
+    def __init__(self):
+        self.batches = []
+
+    def predict_payload(self, payload):
+        data = payload['dataframe_split']['data']
+        self.batches.append(len(data))
+        return [sku_id * 10 + month for _, _, sku_id, month in data]
+
+def test_normalize_forecast_entries():
+    """Test that batch entries are converted to integers with defaults, and bad entries reported."""
+    print("🧪 Testing Forecast Entry Validation")
+    print("=" * 50)
+
+    from app import normalize_forecast_entries
+
+    entries, errors = normalize_forecast_entries([
+        {'warehouse_id': '1', 'category_id': 2, 'sku_id': 3, 'current_quantity': '4', 'minimum_stock': '10'},
+        {'warehouse_id': 1, 'category_id': 2, 'sku_id': 5, 'current_quantity': None, 'new_quantity': 6},
+        {'warehouse_id': 1, 'category_id': 2, 'sku_id': 7, 'minimum_stock': 0}
+    ])
+    _, bad = normalize_forecast_entries([
+        {'warehouse_id': 1, 'category_id': 2},
+        {'warehouse_id': 1, 'category_id': 2, 'sku_id': 'x'},
+        [1, 2, 3],
+        {'warehouse_id': 1, 'category_id': 2, 'sku_id': 3, 'current_quantity': 'many'}
+    ])
+
+    assert (entries[0] == {
+            'warehouse_id': 1, 'category_id': 2, 'sku_id': 3,
+            'current_quantity': 4, 'minimum_stock': 10, 'new_quantity': 0}), "Strings converted to integers"
+    assert entries[1]['current_quantity'] == 0 and entries[1]['new_quantity'] == 6, \
+        "Missing quantities default to 0"
+    assert entries[1]['minimum_stock'] is None, "Missing minimum stock stays None"
+    assert entries[2]['minimum_stock'] == 0, "Zero minimum stock kept"
+    assert [error.split(':')[0] for error in bad] == ['Entry 1', 'Entry 2', 'Entry 3', 'Entry 4'], \
+        "Every bad entry reported by number"
+
+def test_precompute_demand_forecasts():
+    """Test that every inventory combination is scored in batches for the next three months,
+    upserted into the demand forecast table and then served from it."""
+    print("🧪 Testing Forecast Precomputation")
+    print("=" * 50)
+
+    with local_app_database() as app:
+        if app is None:
+            return
+        schema = app.get_schema_name()
+        seed_reference_data(app)
+        # Two rows of one combination, and a row without a warehouse that is skipped
+        execute(app, f"""INSERT INTO {schema}.inventory_items (sku_id, warehouse_id, quantity, unit_price)
+                         VALUES (1, 1, 5, 10), (1, 1, 5, 10), (1, 2, 5, 10), (2, 2, 5, 20), (2, NULL, 5, 20)""")
+
+        saved_model = app.local_model
+        model = FormulaModel()
+        app.local_model = model
+        app.forecast_cache.put((1, 1, 1, 1), -1.0)
+        try:
+            success, summary = app.precompute_demand_forecasts(batch_size=4)
+            stale_entry_cleared = len(app.forecast_cache) == 0
+            rerun, _ = app.precompute_demand_forecasts(batch_size=100)
+        finally:
+            app.local_model = saved_model
+        stored = execute(app, f"""SELECT warehouse_id, category_id, sku_id, forecast_month, predicted_demand
+                                  FROM {schema}.inventory_demand_forecast""")
+        months = app.get_forecast_months()
+        keys = [(w, 1, s, m) for w, s in ((1, 1), (2, 1), (2, 2)) for m in months]
+        served = app.get_precomputed_predictions(keys)
+        app.forecast_cache.clear()
+
+        assert success and rerun, "Precomputation succeeds"
+        assert summary.get('combinations') == 3 and summary.get('predictions') == 9, \
+            "Distinct combinations scored"
+        assert summary.get('requests') == 3 and model.batches[:3] == [4, 4, 1], "Rows split into batches"
+        assert len(stored) == 9, "Re-running upserts instead of duplicating"
+        assert sorted({row[3] for row in stored}) == sorted(months), "Next three months stored"
+        assert all(row[4] == row[2] * 10 + row[3] for row in stored), "Predictions stored per key"
+        assert stale_entry_cleared, "Stale cached predictions dropped"
+        assert served == {key: float(key[2] * 10 + key[3]) for key in keys}, "Stored predictions served back"
+
+def main():
+    """Run all forecast precomputation tests."""
+    return run_tests("🧪 Forecast Precomputation Testing", [
+        ("Entry Validation", test_normalize_forecast_entries),
+        ("Precomputation", test_precompute_demand_forecasts)
+    ])
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
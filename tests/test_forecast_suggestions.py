@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the vectorized reorder arithmetic of demand forecast suggestions.
+Predictions are seeded into the forecast cache, so no database or serving endpoint is needed.
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from local_database import run_tests
+
+def entry(sku_id, current_quantity, minimum_stock, new_quantity=0):
+    return {'warehouse_id': 1, 'category_id': 2, 'sku_id': sku_id, 'current_quantity': current_quantity,
+            'minimum_stock': minimum_stock, 'new_quantity': new_quantity}
+
+class ForecastStubs:
+    """Seed monthly predictions into the cache and keep lookups away from the database and endpoint."""
+
+    def __init__(self, app, monthly, fetch_error=None):
+        self.app = app
+        self.monthly = monthly
+        self.fetch_error = fetch_error
+
+    def __enter__(self):
+        app = self.app
+        self.saved = (app.get_precomputed_predictions, app.is_forecast_model_available, app.fetch_predictions)
+        app.forecast_cache.clear()
+        for sku_id, prediction in self.monthly.items():
+            for month in app.get_forecast_months():
+                app.forecast_cache.put((1, 2, sku_id, month), prediction)
+        app.get_precomputed_predictions = lambda keys: {}
+        app.is_forecast_model_available = lambda: False
+        if self.fetch_error is not None:
+            def failing_fetch(keys, allow_remote=True):
+                raise self.fetch_error
+            app.fetch_predictions = failing_fetch
+        return app
+
+    def __exit__(self, *exc_info):
+        self.app.get_precomputed_predictions, self.app.is_forecast_model_available, self.app.fetch_predictions = self.saved
+        self.app.forecast_cache.clear()
+
+def test_forecast_arithmetic():
+    """Test suggested quantities, safety stock and reasoning for each stocking situation."""
+    print("🧪 Testing Forecast Suggestion Arithmetic")
+    print("=" * 50)
+
+    import app
+
+    entries = [
+        entry(101, 10, 5),          # insufficient: forecast 90 + safety 9
+        entry(102, 200, 0, 5),      # well stocked
+        entry(103, 34, None),       # adequate: small buffer
+        entry(104, 2, 10, 1),       # no forecast, below minimum
+        entry(105, 50, 10),         # no forecast, above minimum
+        entry(106, 0, 0)            # fractional forecast is truncated
+    ]
+    with ForecastStubs(app, {101: 30.0, 102: 10.0, 103: 10.0, 106: 10.6}):
+        results = app.get_demand_forecast_suggestions(entries)
+        singles = [app.get_demand_forecast_suggestion(1, 2, e['sku_id'], e['current_quantity'],
+                                                      e['minimum_stock'], e['new_quantity']) for e in entries]
+    insufficient, well_stocked, adequate, below_minimum, above_minimum, fractional = results
+
+    assert len(results) == len(entries), "One suggestion per entry"
+    assert app.get_demand_forecast_suggestions([]) == [], "Empty batch"
+    assert ((insufficient['forecast_90_days'], insufficient['safety_stock'], insufficient['recommended_total'],
+            insufficient['suggested_quantity']) == (90, 9, 99, 89)), "Insufficient stock covers the gap"
+    assert "Suggest adding 89 more items" in insufficient['reasoning'], "Insufficient reasoning"
+    assert well_stocked['suggested_quantity'] == 5 and well_stocked['current_total_available'] == 205, \
+        "Well stocked keeps the new quantity"
+    assert (adequate['recommended_total'], adequate['safety_stock'], adequate['suggested_quantity']) == (33, 3, 1), \
+        "Adequate stock adds a buffer"
+    assert below_minimum['suggested_quantity'] == 8 and below_minimum['forecast_90_days'] == 0, \
+        "No forecast falls back to the minimum"
+    assert (below_minimum['reasoning'].startswith("Model endpoint not configured")
+            and "Suggest adding 7 more items" in below_minimum['reasoning']), "Fallback reasoning"
+    assert above_minimum['suggested_quantity'] == 0 and above_minimum['recommended_total'] == 10, \
+        "No forecast above minimum adds nothing"
+    assert (fractional['forecast_90_days'], fractional['safety_stock'], fractional['suggested_quantity']) == (31, 3, 34), \
+        "Fractional forecast truncated"
+    assert all(type(r[k]) is int for r in results for k in r if k != 'reasoning'), "Plain integers returned"
+    assert singles == results, "Single suggestions match the batch"
+
+def test_forecast_error_fallback():
+    """Test the minimum-stock fallback when predictions cannot be fetched."""
+    print("🧪 Testing Forecast Error Fallback")
+    print("=" * 50)
+
+    import app
+
+    with ForecastStubs(app, {}, fetch_error=RuntimeError("endpoint down")):
+        below, above = app.get_demand_forecast_suggestions([entry(201, 2, 10), entry(202, 20, 10, 3)])
+
+    assert below['suggested_quantity'] == 8, "Below minimum tops up to it"
+    assert above['suggested_quantity'] == 4 and above['recommended_total'] == 24, "Above minimum adds one"
+    assert below['reasoning'].startswith("Error retrieving AI forecast: endpoint down"), "Error explained"
+    assert below['safety_stock'] == 10 and below['forecast_90_days'] == 0, "Minimum used as safety stock"
+
+def main():
+    """Run all forecast suggestion tests."""
+    return run_tests("🧪 Forecast Suggestion Testing", [
+        ("Forecast Arithmetic", test_forecast_arithmetic),
+        ("Error Fallback", test_forecast_error_fallback)
+    ])
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
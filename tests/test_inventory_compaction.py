@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Test script to verify inventory item compaction against a throwaway local PostgreSQL.
+Skips itself when no PostgreSQL binaries are available.
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from local_database import local_app_database, execute, seed_reference_data, run_tests
+
+def test_compaction_merges_pairs():
+    """Test that duplicate rows per (SKU, warehouse) merge into one with the same totals, and
+    that a pair whose combined locations don't fit the location column is left and reported."""
+    print("🧪 Testing Inventory Item Compaction")
+    print("=" * 50)
+
+    with local_app_database() as app:
+        if app is None:
+            return
+        schema = app.get_schema_name()
+        seed_reference_data(app)
+        # Eight rows with distinct 20-character locations: the merged list exceeds varchar(100)
+        execute(app, f"""INSERT INTO {schema}.inventory_items
+                           (sku_id, warehouse_id, supplier_id, quantity, unit_price, location, minimum_stock)
+                         SELECT 1, 1, 1, 10, 10.0, 'Aisle-' || lpad(g::text, 14, '0'), g
+                         FROM generate_series(1, 8) g""")
+        execute(app, f"""INSERT INTO {schema}.inventory_items (sku_id, warehouse_id, quantity, unit_price, location)
+                         VALUES (2, 2, 5, 10.0, 'B-1'), (2, 2, 15, 30.0, 'B-2, B-1'), (2, 1, 7, 20.0, 'C-1')""")
+
+        success, report = app.compact_inventory_items(batch_size=1)
+        rows = execute(app, f"""SELECT sku_id, warehouse_id, quantity, unit_price, location, minimum_stock
+                                FROM {schema}.inventory_items ORDER BY sku_id, warehouse_id""")
+        by_pair = {(row[0], row[1]): row for row in rows}
+        long_rows = [row for row in rows if row[:2] == (1, 1)]
+        short_pair = by_pair.get((2, 2))
+        second_run = app.compact_inventory_items()
+
+        assert success, "Compaction succeeds"
+        assert len(rows) == 10, "One row left per merged pair"
+        assert report.get('rows_reclaimed') == 1 and report.get('pairs_merged') == 1, \
+            "Rows reclaimed reported"
+        assert report.get('pairs_skipped') == [
+            {'sku_id': 1, 'warehouse_id': 1, 'row_count': 8, 'location_length': 174}], "Oversized pair reported"
+        assert sorted(row[4] for row in long_rows) == ['Aisle-' + str(g).zfill(14) for g in range(1, 9)], \
+            "Oversized pair's locations kept whole"
+        assert sum(row[2] for row in long_rows) == 80 and short_pair[2] == 20, "Quantity total kept"
+        assert short_pair is not None and abs(short_pair[3] - 25.0) < 1e-9, "Unit price weighted by quantity"
+        assert short_pair is not None and short_pair[4] == 'B-1, B-2', "Distinct locations merged"
+        assert by_pair.get((2, 1), (None,) * 6)[4] == 'C-1', "Single-row pair untouched"
+        assert second_run[0] and second_run[1]['rows_reclaimed'] == 0, "Nothing left to merge"
+        assert len(second_run[1]['pairs_skipped']) == 1, "Oversized pair still reported"
+
+def main():
+    """Run all compaction tests."""
+    return run_tests("🧪 Inventory Compaction Testing", [
+        ("Compaction", test_compaction_merges_pairs)
+    ])
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Test script to verify in-process scoring of the exported demand forecasting model.
+The parity test trains a small RandomForest + OneHotEncoder like notebook 2.2 and compares
+against the pyfunc's predictions, including its unseen-category fallbacks; it is skipped
+when scikit-learn is not installed.
+"""
+
+import sys
+import os
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from local_database import run_tests
+
+FEATURE_COLS = ['warehouse_id', 'category_id', 'sku_id', 'month']
+
+def make_training_data(rows=3000, seed=7):
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([
+        rng.integers(1, 11, rows),
+        rng.integers(1, 6, rows),
+        rng.integers(1, 41, rows),
+        rng.integers(1, 13, rows)
+    ]).astype(float)
+    y = X[:, 0] * 3 + X[:, 1] * 5 + np.sin(X[:, 3]) * 10 + (X[:, 2] % 7) + rng.normal(0, 2, rows)
+    return X, y
+
+def test_parity_with_pyfunc():
+    """Test that local scoring matches the notebook's RandomForest + OneHotEncoder pyfunc."""
+    print("🧪 Testing Local Model Parity")
+    print("=" * 50)
+
+    try:
+        from sklearn.ensemble import RandomForestRegressor
+        from sklearn.preprocessing import OneHotEncoder
+    except ImportError:
+        print("  ⚠️  scikit-learn not installed, skipping parity test")
+        return
+
+    from local_model import export_model, build_fallback_tables, LocalForecastModel
+
+    X, y = make_training_data()
+    encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
+    model = RandomForestRegressor(n_estimators=25, random_state=42).fit(encoder.fit_transform(X), y)
+    fallback = build_fallback_tables(X[:, 0], X[:, 1], X[:, 3], y)
+
+    # Known combinations, an unseen SKU, an unseen month and an unseen warehouse
+    X_score = np.vstack([X[:500], [[3, 2, 999, 5], [3, 2, 7, 13], [99, 1, 1, 1]]])
+
+    # The pyfunc scores the forest, then uses training means for rows with unseen values
+    expected = model.predict(encoder.transform(X_score))
+    expected[-3] = y[(X[:, 0] == 3) & (X[:, 1] == 2) & (X[:, 3] == 5)].mean()
+    expected[-2] = y[(X[:, 0] == 3) & (X[:, 1] == 2)].mean()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'model.npz')
+        export_model(model, encoder, FEATURE_COLS, path, fallback)
+        local = LocalForecastModel.load(path)
+        actual = local.predict(X_score)
+        payload = {'dataframe_split': {'columns': FEATURE_COLS, 'data': X_score[:5].tolist()}}
+        from_payload = local.predict_payload(payload)
+
+    assert np.allclose(actual[:500], expected[:500], rtol=1e-9, atol=1e-9), "Predictions match the pyfunc"
+    assert np.isclose(actual[-3], expected[-3], rtol=1e-6), \
+        "Unseen SKU uses the (warehouse, category, month) mean"
+    assert np.isclose(actual[-2], expected[-2], rtol=1e-6), "Unseen month uses the (warehouse, category) mean"
+    assert np.isclose(actual[-1], expected[-1]), "Unseen warehouse keeps the forest prediction"
+    assert np.allclose(from_payload, expected[:5]), "dataframe_split payload scores the same"
+
+def test_handmade_tree():
+    """Test encoding and tree traversal on a hand-built one-tree model (no scikit-learn needed)."""
+    print("\n🧪 Testing Local Model Tree Traversal")
+    print("=" * 50)
+
+    from local_model import LocalForecastModel, FORMAT_VERSION
+
+    # One tree: split on "warehouse_id == 2" (one-hot column 1), then on "month == 12" (column 4)
+    arrays = {
+        'format_version': np.array(FORMAT_VERSION),
+        'feature_cols': np.array(FEATURE_COLS),
+        'tree_offsets': np.array([0, 5]),
+        'children_left': np.array([1, -1, 3, -1, -1]),
+        'children_right': np.array([2, -1, 4, -1, -1]),
+        'feature': np.array([1, -2, 4, -2, -2]),
+        'threshold': np.array([0.5, -2.0, 0.5, -2.0, -2.0]),
+        'value': np.array([0.0, 10.0, 0.0, 20.0, 30.0]),
+        'categories_0': np.array([1.0, 2.0]),
+        'categories_1': np.array([1.0]),
+        'categories_2': np.array([1.0]),
+        'categories_3': np.array([12.0])
+    }
+    model = LocalForecastModel(arrays)
+    predictions = model.predict([[1, 1, 1, 12], [2, 1, 1, 1], [2, 1, 1, 12], [7, 1, 1, 12]])
+
+    assert predictions[0] == 10.0, "Left branch leaf"
+    assert predictions[1] == 20.0, "Right-left leaf"
+    assert predictions[2] == 30.0, "Right-right leaf"
+    assert predictions[3] == 10.0, "Unseen warehouse encodes as zeros"
+
+def test_fallback_tables():
+    """Test that fallback tables are compact, sorted and looked up per key."""
+    print("\n🧪 Testing Local Model Fallback Tables")
+    print("=" * 50)
+
+    from local_model import build_fallback_tables, lookup_fallback, fallback_key
+
+    tables = build_fallback_tables([2, 1, 1, 1], [5, 3, 3, 3], [7, 1, 1, 2], [10, 4, 6, 20])
+    month_means = lookup_fallback(tables['fallback_month_keys'], tables['fallback_month_means'],
+                                  fallback_key([1, 2, 1], [3, 5, 3], [1, 7, 9]))
+    category_means = lookup_fallback(tables['fallback_category_keys'], tables['fallback_category_means'],
+                                     fallback_key([1, 4], [3, 4], 0))
+
+    assert (tables['fallback_month_keys'].dtype == np.int64
+            and np.all(np.diff(tables['fallback_month_keys']) > 0)), "Keys are sorted int64"
+    assert tables['fallback_month_means'].dtype == np.float32, "Means are float32"
+    assert month_means[:2].tolist() == [5.0, 10.0], "Month means looked up"
+    assert np.isnan(month_means[2]), "Missing month gives NaN"
+    assert category_means[0] == 10.0 and np.isnan(category_means[1]), "Category mean covers every month"
+
+def main():
+    """Run all local model tests."""
+    return run_tests("🧪 Local Forecast Model Testing", [
+        ("Parity With Pyfunc", test_parity_with_pyfunc),
+        ("Tree Traversal", test_handmade_tree),
+        ("Fallback Tables", test_fallback_tables)
+    ])
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the in-process metrics registry, its Prometheus text output and the
+model serving and forecast metrics the app registers in it.
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from local_database import run_tests
+
+def test_metric_types():
+    """Test counters, gauges, callback metrics and histograms."""
+    print("🧪 Testing Metric Types")
+    print("=" * 50)
+
+    from metrics import Registry
+
+    registry = Registry()
+    requests = registry.counter('test_requests_total', 'Requests', ['route'])
+    requests.inc(route='/a')
+    requests.inc(2, route='/a')
+    rate = registry.gauge('test_rate', 'Rate')
+    rate.set(12.5)
+    rate.set(7)
+    registry.gauge('test_pool_size', 'Pool size', ['pool'], callback=lambda: [({'pool': 'primary'}, 4)])
+    latency = registry.histogram('test_latency_seconds', 'Latency', ['query'], buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, query='q')
+    with latency.time(query='timed'):
+        pass
+
+    text = registry.render()
+    lines = text.splitlines()
+    assert requests.value(route='/a') == 3 and requests.value(route='/b') == 0, \
+        "Counter accumulates per label set"
+    assert rate.value() == 7, "Gauge keeps the last value"
+    assert registry.counter('test_requests_total', 'Requests', ['route']) is requests, \
+        "Same name returns the same metric"
+    assert '# TYPE test_latency_seconds histogram' in lines and '# HELP test_rate Rate' in lines, \
+        "HELP and TYPE lines rendered"
+    assert 'test_requests_total{route="/a"} 3' in lines, "Counter sample rendered"
+    assert 'test_pool_size{pool="primary"} 4' in lines, "Callback sampled at render time"
+    assert ('test_latency_seconds_bucket{query="q",le="0.1"} 2' in lines
+            and 'test_latency_seconds_bucket{query="q",le="1"} 3' in lines
+            and 'test_latency_seconds_bucket{query="q",le="+Inf"} 4' in lines), \
+        "Histogram buckets are cumulative"
+    assert ('test_latency_seconds_count{query="q"} 4' in lines
+            and abs(latency.value(query='q')['sum'] - 3.65) < 1e-9), "Histogram sum and count"
+    assert latency.value(query='timed')['count'] == 1, "Timer observes once"
+
+def test_label_escaping():
+    """Test that label values are escaped and kind clashes are rejected."""
+    print("\n🧪 Testing Label Escaping")
+    print("=" * 50)
+
+    from metrics import Registry, format_labels
+
+    registry = Registry()
+    registry.counter('test_total', 'Test')
+    try:
+        registry.gauge('test_total', 'Test')
+        clash_rejected = False
+    except ValueError:
+        clash_rejected = True
+
+    assert format_labels({'route': 'a"b\\c\nd'}) == '{route="a\\"b\\\\c\\nd"}', \
+        "Quotes, backslashes and newlines escaped"
+    assert format_labels({}) == '', "Empty label set renders nothing"
+    assert clash_rejected, "Registering a name with another kind fails"
+
+def test_forecast_metrics():
+    """Test that serving, breaker, forecast cache and coalescing metrics are read at scrape time."""
+    print("\n🧪 Testing Forecast Metrics")
+    print("=" * 50)
+
+    import app
+
+    app.forecast_cache.clear()
+    app.forecast_cache.put((1, 1, 1, 1), 5.0)
+    app.forecast_cache.get((1, 1, 1, 1))
+    app.forecast_cache.get((1, 1, 1, 2))
+    app.forecast_flights.do_many([('metrics', 1)], lambda keys: {key: 1.0 for key in keys})
+    breaker_state = app.serving_client.breaker.state
+    cache, flights = app.forecast_cache.stats(), app.forecast_flights.stats()
+    text = app.registry.render()
+    app.forecast_cache.clear()
+    lines = set(text.splitlines())
+
+    assert cache['hits'] >= 1 and cache['misses'] >= 1 and flights['leader_calls'] >= 1, "Lookups recorded"
+    assert f'inventory_forecast_cache_lookups_total{{result="hit"}} {cache["hits"]}' in lines, "Cache hits exported"
+    assert f'inventory_forecast_cache_lookups_total{{result="miss"}} {cache["misses"]}' in lines, \
+        "Cache misses exported"
+    assert f'inventory_model_serving_circuit_state{{state="{breaker_state}"}} 1' in lines, "Breaker state exported"
+    assert f'inventory_forecast_flight_leader_calls_total {flights["leader_calls"]}' in lines, \
+        "Single-flight calls exported"
+    for name in ('inventory_model_serving_circuit_opened_total', 'inventory_model_serving_retries_total',
+                 'inventory_model_serving_short_circuits_total', 'inventory_forecast_coalesced_total',
+                 'inventory_model_serving_request_duration_seconds'):
+        assert f'# TYPE {name} ' in text, f"{name} registered"
+
+def main():
+    """Run all metrics tests."""
+    return run_tests("🧪 Metrics Testing", [
+        ("Metric Types", test_metric_types),
+        ("Label Escaping", test_label_escaping),
+        ("Forecast Metrics", test_forecast_metrics)
+    ])
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the local model serving stub used by the forecast benchmark.
+"""
+
+import sys
+import os
+import time
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from local_database import run_tests
+
+PAYLOAD = {'dataframe_split': {'columns': ['month', 'warehouse_id', 'category_id', 'sku_id'],
+                               'data': [[1.0, 2.0, 3.0, 4.0], [2.0, 2.0, 3.0, 4.0]]}}
+
+def test_stub_protocol():
+    """Test that the stub answers dataframe_split payloads with one prediction per row."""
+    print("🧪 Testing Model Serving Stub Protocol")
+    print("=" * 50)
+
+    from model_serving_stub import start_stub, predict
+
+    server = start_stub(latency_ms=0)
+    try:
+        response = requests.post(server.url, json=PAYLOAD, timeout=5)
+        bad_request = requests.post(server.url, json={'inputs': []}, timeout=5)
+        stats = requests.get(f"{server.base_url}/stub/stats", timeout=5).json()
+        assert response.status_code == 200, "Invocation succeeds"
+        assert response.json()['predictions'] == [predict([2, 3, 4, 1]), predict([2, 3, 4, 2])], \
+            "Columns are matched by name"
+        assert bad_request.status_code == 400, "Invalid payload rejected"
+        assert stats['requests'] == 1 and stats['rows'] == 2, "Requests and rows counted"
+    finally:
+        server.shutdown()
+
+def test_stub_injection():
+    """Test injected latency and errors, and that the serving client's breaker reacts to them."""
+    print("\n🧪 Testing Model Serving Stub Fault Injection")
+    print("=" * 50)
+
+    from model_serving_stub import start_stub
+    from serving_client import ModelServingClient, CircuitBreaker, ModelServingError
+
+    server = start_stub(latency_ms=100)
+    client = ModelServingClient(lambda: server.url, lambda: 'token', max_retries=0,
+                                breaker=CircuitBreaker(failure_threshold=2, reset_timeout=30))
+    try:
+        started = time.monotonic()
+        client.predict(PAYLOAD)
+        delayed = time.monotonic() - started >= 0.1
+
+        settings = requests.post(f"{server.base_url}/stub/config",
+                                 json={'latency_ms': 0, 'error_rate': 1.0, 'error_status': 500}, timeout=5).json()
+        failures = 0
+        for _ in range(3):
+            try:
+                client.predict(PAYLOAD)
+            except ModelServingError:
+                failures += 1
+
+        stats = requests.get(f"{server.base_url}/stub/stats", timeout=5).json()
+        assert delayed, "Latency injected"
+        assert settings['error_rate'] == 1.0 and settings['error_status'] == 500, \
+            "Settings updated at runtime"
+        assert failures == 3, "Injected errors fail the call"
+        assert client.breaker.state == 'open' and stats['errors'] == 2, \
+            "Circuit opens and stops calling the stub"
+    finally:
+        server.shutdown()
+
+def main():
+    """Run all model serving stub tests."""
+    return run_tests("🧪 Model Serving Stub Testing", [
+        ("Protocol", test_stub_protocol),
+        ("Fault Injection", test_stub_injection)
+    ])
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
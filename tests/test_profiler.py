@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the opt-in request profiler: stack sampling, time categories and
+token gating. Uses a bare Flask app, so no database is needed.
+"""
+
+import sys
+import os
+import json
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from local_database import run_tests
+
+def busy_wait(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+def test_sampling_profiler():
+    """Test that samples land on the running function and are categorized."""
+    print("🧪 Testing Sampling Profiler")
+    print("=" * 50)
+
+    from profiler import SamplingProfiler, classify
+
+    profiler = SamplingProfiler(interval=0.001).start()
+    busy_wait(0.1)
+    profiler.stop()
+    report = profiler.report()
+    collapsed = profiler.collapsed().splitlines()
+
+    assert report['samples'] > 10, "Samples collected"
+    assert report['top_functions'][0]['function'] == 'test_profiler:busy_wait', \
+        "Hottest function is the busy loop"
+    assert report['breakdown']['app']['percent'] > 90, "Busy loop counted as app time"
+    assert collapsed[0].rsplit(' ', 1)[0].endswith('test_profiler:busy_wait') and collapsed[0].rsplit(' ', 1)[1].isdigit(), \
+        "Collapsed stacks end in the leaf with a count"
+    assert classify(['/x/site-packages/psycopg/cursor.py', '/app/app.py']) == 'db', \
+        "Driver frames are db time"
+    assert classify(['/usr/lib/python3/json/encoder.py', '/x/site-packages/jinja2/environment.py']) == 'serialization', \
+        "Innermost category wins"
+    assert classify(['/x/site-packages/urllib3/connectionpool.py']) == 'http', \
+        "HTTP client frames are http time"
+
+def test_token_gating():
+    """Test that only requests with the admin token are profiled."""
+    print("\n🧪 Testing Profiler Token Gating")
+    print("=" * 50)
+
+    from flask import Flask, jsonify
+    from profiler import install_request_profiler
+
+    flask_app = Flask(__name__)
+
+    @flask_app.route('/slow')
+    def slow():
+        busy_wait(0.02)
+        return jsonify({'ok': True})
+
+    install_request_profiler(flask_app, 'admin-token')
+    client = flask_app.test_client()
+
+    plain = client.get('/slow')
+    wrong = client.get('/slow', headers={'X-Profile-Token': 'nope'})
+    sampled = client.get('/slow?_profile=admin-token&_profile_format=json')
+    table = client.get('/slow', headers={'X-Profile-Token': 'admin-token'})
+    deterministic = client.get('/slow?_profile=admin-token&_profile_mode=cprofile')
+    report = json.loads(sampled.get_data(as_text=True))
+
+    assert plain.get_json() == {'ok': True}, "Unprofiled request unchanged"
+    assert wrong.get_json() == {'ok': True}, "Wrong token ignored"
+    assert set(report['breakdown']) == {'db', 'template', 'serialization', 'http', 'app'}, \
+        "JSON report with breakdown"
+    assert 'admin-token' not in sampled.get_data(as_text=True), "Token kept out of the report"
+    assert table.get_data(as_text=True).startswith('Profile of GET /slow -> 200'), "Text report by header"
+    assert 'Ordered by: cumulative time' in deterministic.get_data(as_text=True), "cProfile stats table"
+
+def main():
+    """Run all profiler tests."""
+    return run_tests("🧪 Request Profiler Testing", [
+        ("Sampling Profiler", test_sampling_profiler),
+        ("Token Gating", test_token_gating)
+    ])
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
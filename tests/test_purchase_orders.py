@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Test script to verify batch replenishment: order ids, grouping by supplier and the CSV
+download. The database parts run against a throwaway local PostgreSQL and skip themselves
+when none is available.
+"""
+
+import sys
+import os
+import csv
+import io
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from local_database import local_app_database, execute, run_tests
+
+def test_order_identifiers():
+    """Test that order ids fit the column and don't repeat within a day."""
+    print("🧪 Testing Order Identifiers")
+    print("=" * 50)
+
+    import app
+
+    order_date = datetime(2026, 3, 14, 9, 30)
+    identifiers = [app.generate_order_identifiers(order_date) for _ in range(20000)]
+    order_ids = [entry['order_id'] for entry in identifiers]
+
+    assert all(order_id.startswith('ORD-20260314-') for order_id in order_ids), "Ids carry the order date"
+    assert max(len(order_id) for order_id in order_ids) <= 30, "Ids fit order_id varchar(30)"
+    assert len(set(order_ids)) == len(order_ids), "No repeated ids in 20,000 orders"
+    assert all(3 <= entry['eta_days'] <= 7 for entry in identifiers), "ETA within 3-7 days"
+
+def seed_low_stock(app):
+    schema = app.get_schema_name()
+    execute(app, f"INSERT INTO {schema}.inventory_category (category_name) VALUES ('Tools')")
+    execute(app, f"INSERT INTO {schema}.inventory_warehouse (warehouse_name) VALUES ('North'), ('South')")
+    execute(app, f"INSERT INTO {schema}.inventory_supplier (supplier_name) VALUES ('Acme'), ('Bolt Co')")
+    execute(app, f"""INSERT INTO {schema}.inventory_sku (sku_code, item_name, category_id, unit_price)
+                     VALUES ('HAM-1', 'Hammer', 1, 10), ('SAW-1', 'Saw', 1, 20), ('DRL-1', 'Drill', 1, 50)""")
+    # Hammer and saw are below minimum at Acme, the drill at Bolt Co; the saw in South is stocked
+    # and the saw without a warehouse is low but has nowhere to be delivered
+    execute(app, f"""INSERT INTO {schema}.inventory_items
+                       (sku_id, warehouse_id, supplier_id, quantity, unit_price, minimum_stock)
+                     VALUES (1, 1, 1, 2, 10.0, 10), (1, 1, 1, 2, 12.0, 10),
+                            (2, 1, 1, 5, 20.0, 5),
+                            (3, 2, 2, 1, 50.0, 4),
+                            (2, 2, 1, 50, 20.0, 5),
+                            (2, NULL, 1, 1, 20.0, 5)""")
+    app.backfill_stock_movements()
+
+def test_generate_purchase_orders():
+    """Test that low-stock lines are grouped into one order per supplier, twice on the same day,
+    and that the batch downloads as CSV."""
+    print("🧪 Testing Purchase Order Generation")
+    print("=" * 50)
+
+    with local_app_database() as app:
+        if app is None:
+            return
+        seed_low_stock(app)
+        success, batch = app.generate_purchase_orders()
+        second_success, second_batch = app.generate_purchase_orders()
+
+        low_stock_pairs = {(row[16], row[13]) for row in app.get_low_stock_items()}
+        orders = {order['supplier_name']: order for order in batch.get('orders', [])}
+        acme = orders.get('Acme', {'lines': []})
+        hammer = next((line for line in acme['lines'] if line['sku_code'] == 'HAM-1'), {})
+        stored_ids = [row[0] for row in execute(app, f"SELECT order_id FROM {app.get_schema_name()}.inventory_purchase_order")]
+
+        client = app.app.test_client()
+        saved = app.database_ready
+        app.database_ready = True
+        try:
+            response = client.get(f"/purchase-orders/{batch.get('batch_id')}/download")
+        finally:
+            app.database_ready = saved
+        rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+
+        assert success and batch.get('order_count') == 2 and batch.get('line_count') == 3, "Batch generated"
+        assert batch.get('unassigned_lines') == [{'sku_id': 2, 'sku_code': 'SAW-1', 'item_name': 'Saw', 'on_hand': 1,
+                                                  'minimum_stock': 5, 'quantity': 4}], \
+            "Pair without a warehouse reported, not ordered"
+        assert low_stock_pairs == {(1, 1), (2, 1), (3, 2), (2, None)}, "Low-stock page lists the same pairs"
+        assert set(orders) == {'Acme', 'Bolt Co'} and len(acme['lines']) == 2, "One order per supplier"
+        assert hammer.get('quantity') == 6, "Reorder quantity is the shortage"
+        assert (any(line['sku_code'] == 'SAW-1' and line['quantity'] == 5
+                for line in acme['lines'])), "At-minimum pair reorders one minimum"
+        assert hammer.get('unit_price') == 11.0, "Line priced at the weighted unit price"
+        assert acme.get('total_value') == round(sum(line['line_value'] for line in acme['lines']), 2), \
+            "Order total sums its lines"
+        assert second_success and second_batch.get('order_count') == 2, \
+            "Second batch on the same day succeeds"
+        assert len(stored_ids) == 4 and len(set(stored_ids)) == 4, "Order ids unique across batches"
+        assert response.status_code == 200 and response.mimetype == 'text/csv', "CSV download served"
+        assert rows[0] == app.PURCHASE_ORDER_CSV_COLUMNS if rows else False, "CSV header matches the columns"
+        assert len(rows) == 4, "CSV has one row per line"
+        assert all(row[0] == batch.get('batch_id') for row in rows[1:]), "CSV rows belong to the batch"
+
+def main():
+    """Run all purchase order tests."""
+    return run_tests("🧪 Purchase Order Testing", [
+        ("Order Identifiers", test_order_identifiers),
+        ("Purchase Order Generation", test_generate_purchase_orders)
+    ])
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
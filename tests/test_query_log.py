@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the slow-query log helpers: parameter redaction, read-only detection,
+sampling, EXPLAIN rate limiting and logical query names.
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from local_database import run_tests
+
+def test_redaction_and_statement_kinds():
+    """Test that parameter values never reach the log and only reads are explained."""
+    print("🧪 Testing Parameter Redaction")
+    print("=" * 50)
+
+    from query_log import redact_params, is_read_only
+
+    assert redact_params(('secret@example.com', 42, None, [1, 2])) == ['str(18)', 'int', 'NoneType', 'list[2]'], \
+        "Positional params reduced to types"
+    assert redact_params({'sku_id': 7, 'note': 'abc'}) == {'sku_id': 'int', 'note': 'str(3)'}, \
+        "Named params reduced to types"
+    assert redact_params(None) is None, "No params stays None"
+    assert is_read_only("  select * from t"), "SELECT is read-only"
+    assert is_read_only("WITH a AS (SELECT 1) SELECT * FROM a"), "CTE read is read-only"
+    assert not is_read_only("WITH n AS (INSERT INTO t VALUES (1) RETURNING id) SELECT * FROM n"), \
+        "Writing CTE is not"
+    assert not is_read_only("SELECT * FROM t FOR UPDATE"), "Locking read is not"
+    assert not is_read_only("UPDATE t SET a = 1"), "UPDATE is not"
+
+def test_slow_query_log():
+    """Test sampling, EXPLAIN rate limiting, history and logical names."""
+    print("\n🧪 Testing Slow Query Log")
+    print("=" * 50)
+
+    from query_log import SlowQueryLog, query_name, current_query
+
+    log = SlowQueryLog(threshold_ms=100, sample_rate=0.0, explain=True, explain_interval=300, history=2)
+    never_sampled = not any(log.should_time() for _ in range(100))
+    log.configure(threshold_ms=100, sample_rate=1.0, explain=True, explain_interval=300)
+    always_sampled = all(log.should_time() for _ in range(100))
+
+    first_explain = log.should_explain('get_inventory_items', 'SELECT 1')
+    repeat_explain = log.should_explain('get_inventory_items', 'SELECT 1')
+    other_explain = log.should_explain('get_low_stock_items', 'SELECT 2')
+    write_explain = log.should_explain('add_sku', 'INSERT INTO t VALUES (1)')
+
+    for i in range(3):
+        log.record(f'query_{i}', 'SELECT  *\n  FROM t', 150.0 + i, 5, (f'value {i}',))
+    recent = log.recent()
+
+    with query_name('get_skus'):
+        inside = current_query.get()
+    outside = current_query.get()
+
+    assert never_sampled, "Sample rate 0 times nothing"
+    assert always_sampled, "Sample rate 1 times everything"
+    assert first_explain, "First slow read is explained"
+    assert not repeat_explain, "Same query not re-explained within the interval"
+    assert other_explain, "Other queries explained independently"
+    assert not write_explain, "Writes never explained"
+    assert [entry['query'] for entry in recent] == ['query_2', 'query_1'], "History bounded and newest first"
+    assert recent[0]['statement'] == 'SELECT * FROM t', "Statement whitespace collapsed"
+    assert recent[0]['params'] == ['str(7)'], "Logged params redacted"
+    assert inside == 'get_skus' and outside is None, "Logical name scoped to the block"
+
+def main():
+    """Run all slow query log tests."""
+    return run_tests("🧪 Slow Query Log Testing", [
+        ("Redaction", test_redaction_and_statement_kinds),
+        ("Slow Query Log", test_slow_query_log)
+    ])
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test script to verify read-replica routing, read-your-writes pinning and retiring pools with
+stale tokens. Runs inside Flask request contexts with stand-in pools, so no database is needed.
+"""
+
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from local_database import run_tests
+
+def test_read_your_writes():
+    """Test which requests must read from the primary, and that writes pin the session."""
+    print("🧪 Testing Read-Your-Writes Routing")
+    print("=" * 50)
+
+    import app
+    from config import config
+
+    database_settings = config.config.setdefault('database', {})
+    saved = dict(database_settings)
+    database_settings.update(read_host='replica.example', read_your_writes_seconds=5)
+    try:
+        flask_app = app.app
+        with flask_app.test_request_context('/api/items'):
+            get_uses_replica = not app.reads_need_primary()
+
+        with flask_app.test_request_context('/categories/add', method='POST'):
+            post_uses_primary = app.reads_need_primary()
+            flask_app.process_response(flask_app.response_class('', status=302))
+            pinned_until = app.session.get('read_primary_until', 0)
+
+        with flask_app.test_request_context('/categories/add', method='POST'):
+            flask_app.process_response(flask_app.response_class('', status=400))
+            failed_write_pins = 'read_primary_until' in app.session
+
+        with flask_app.test_request_context('/categories'):
+            app.session['read_primary_until'] = time.time() + 5
+            pinned_get_uses_primary = app.reads_need_primary()
+            app.session['read_primary_until'] = time.time() - 1
+            expired_pin_uses_replica = not app.reads_need_primary()
+
+        assert get_uses_replica, "GET reads go to the replica"
+        assert post_uses_primary, "Reads during a write request go to the primary"
+        assert 4 < pinned_until - time.time() <= 5, "Successful write pins the session"
+        assert not failed_write_pins, "Failed write does not pin"
+        assert pinned_get_uses_primary, "Pinned session reads from the primary"
+        assert expired_pin_uses_replica, "Pin expires after the window"
+        assert not app.reads_need_primary(), "No pinning outside a request"
+    finally:
+        database_settings.clear()
+        database_settings.update(saved)
+
+class StandInPool:
+    """Records close() calls in place of a ConnectionPool."""
+
+    def __init__(self):
+        self.closed = 0
+
+    def close(self, timeout=None):
+        self.closed += 1
+
+def test_retire_stale_pools():
+    """Test that stale pools are dropped once, closed only by the process that opened them."""
+    print("🧪 Testing Stale Pool Retirement")
+    print("=" * 50)
+
+    import app
+
+    names = ('connection_pool', 'connection_pool_pid', 'connection_pool_token',
+             'read_pool', 'read_pool_pid', 'read_pool_token', 'postgres_password', 'last_password_refresh')
+    saved = {name: getattr(app, name) for name in names}
+    try:
+        app.postgres_password, app.last_password_refresh = 'token', time.time()
+        current = StandInPool()
+        app.connection_pool, app.connection_pool_pid = current, os.getpid()
+        app.connection_pool_token = app.last_password_refresh
+        app.retire_stale_pools()
+        current_kept = app.connection_pool is current and current.closed == 0
+
+        owned = StandInPool()
+        app.connection_pool, app.connection_pool_token = owned, app.last_password_refresh - 1
+        app.retire_stale_pools()
+        app.retire_stale_pools()
+        owned_closed_once = app.connection_pool is None and owned.closed == 1
+
+        inherited = StandInPool()
+        app.read_pool, app.read_pool_pid = inherited, os.getpid() + 1
+        app.read_pool_token = app.last_password_refresh - 1
+        app.retire_stale_pools(replica=True)
+        inherited_dropped = app.read_pool is None and inherited.closed == 0
+    finally:
+        for name, value in saved.items():
+            setattr(app, name, value)
+
+    assert current_kept, "Pool with the current token kept"
+    assert owned_closed_once, "Stale pool closed once and dropped"
+    assert inherited_dropped, "Pool inherited through fork dropped without closing"
+
+def main():
+    """Run all read routing tests."""
+    return run_tests("🧪 Read Replica Routing Testing", [
+        ("Read-Your-Writes", test_read_your_writes),
+        ("Stale Pool Retirement", test_retire_stale_pools)
+    ])
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
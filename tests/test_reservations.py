@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Test script to verify stock reservations: request validation, and that released or expired
+reservations return their quantity to the allocation buckets. The bucket tests run against a
+throwaway local PostgreSQL and skip themselves when no PostgreSQL binaries are available.
+"""
+
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from local_database import local_app_database, execute, seed_reference_data, run_tests
+
+def test_reservation_validation():
+    """Test that malformed quantities and TTLs are rejected before touching the database."""
+    print("🧪 Testing Reservation Validation")
+    print("=" * 50)
+
+    import app
+
+    _, bad_ttl = app.reserve_stock(1, 1, 5, ttl_seconds='abc')
+    _, negative_ttl = app.reserve_stock(1, 1, 5, ttl_seconds=-60)
+    _, both = app.reserve_stock(1, 1, 0, ttl_seconds=0)
+
+    saved = app.database_ready
+    # Skip warmup; invalid requests are rejected before any query
+    app.database_ready = True
+    try:
+        client = app.app.test_client()
+        response = client.post('/api/reservations', json={
+            'sku_id': 1, 'warehouse_id': 1, 'quantity': 5, 'ttl_seconds': 'abc'
+        })
+    finally:
+        app.database_ready = saved
+
+    assert bad_ttl.get('errors') == ['ttl_seconds must be an integer'], "Non-integer TTL rejected"
+    assert negative_ttl.get('errors') == ['ttl_seconds must be greater than 0'], "Negative TTL rejected"
+    assert len(both.get('errors', [])) == 2, "All problems reported together"
+    assert response.status_code == 400, "API answers 400 for a bad TTL"
+    assert response.get_json().get('errors') == ['ttl_seconds must be an integer'], "API lists the errors"
+
+def test_reservations_refund_buckets():
+    """Test that reservations made while rebuilding the buckets, or whose bucket was rebuilt
+    away, return their quantity on release, and that expiry only refunds existing buckets."""
+    print("🧪 Testing Reservation Bucket Refunds")
+    print("=" * 50)
+
+    with local_app_database() as app:
+        if app is None:
+            return
+        schema = app.get_schema_name()
+        seed_reference_data(app)
+        app.add_inventory_item(1, 16, 10.0, warehouse_id=1)
+
+        def bucket_total():
+            return execute(app, f"SELECT COALESCE(SUM(available), 0) FROM {schema}.inventory_allocation_bucket")[0][0]
+
+        # No buckets yet: this reservation is made by the rebuild
+        _, first = app.reserve_stock(1, 1, 4)
+        first_bucket = execute(app, f"""SELECT bucket_id FROM {schema}.inventory_reservation
+                                        WHERE reservation_id = %s""", (first['reservation_id'],))[0][0]
+        after_rebuild = bucket_total()
+        released_first = app.release_reservation(first['reservation_id'])
+        after_release = bucket_total()
+
+        # Claimed from a bucket, then a request no single bucket covers rebuilds them all
+        _, claimed = app.reserve_stock(1, 1, 1)
+        _, expiring = app.reserve_stock(1, 1, 1, ttl_seconds=60)
+        _, large = app.reserve_stock(1, 1, 10)
+        after_large = bucket_total()
+        released_claimed = app.release_reservation(claimed['reservation_id'])
+        after_stale_release = bucket_total()
+        execute(app, f"""UPDATE {schema}.inventory_reservation SET expires_at = CURRENT_TIMESTAMP - INTERVAL '1 second'
+                         WHERE reservation_id = %s""", (expiring['reservation_id'],))
+        _, expired = app.expire_reservations()
+        after_expiry = bucket_total()
+
+        assert first_bucket is not None, "Rebuild reservation assigned a bucket"
+        assert after_rebuild == 12, "Rebuild leaves the remainder in buckets"
+        assert released_first and after_release == 16, "Released rebuild reservation refunded"
+        assert large.get('reservation_id') is not None and after_large == 4, \
+            "Large reservation made by a rebuild"
+        assert released_claimed and after_stale_release == 5, "Release after a rebuild refunded"
+        assert expired == 1 and after_expiry == 5, "Expiry after a rebuild left to the next recount"
+
+def test_expired_reservation_not_counted_twice():
+    """Test that a reservation which expires before a rebuild is not refunded on top of the
+    rebuild's recount, which would promise more stock than is on hand."""
+    print("🧪 Testing Expiry Across a Rebuild")
+    print("=" * 50)
+
+    with local_app_database() as app:
+        if app is None:
+            return
+        schema = app.get_schema_name()
+        seed_reference_data(app)
+        app.add_inventory_item(1, 10, 10.0, warehouse_id=1)
+        item_id = execute(app, f"SELECT id FROM {schema}.inventory_items")[0][0]
+
+        _, short = app.reserve_stock(1, 1, 6, ttl_seconds=1)
+        time.sleep(1.5)
+        released_overdue = app.release_reservation(short['reservation_id'])
+        app.update_inventory_item(item_id, 1, 9, 10.0, warehouse_id=1)
+        _, rebuilt = app.reserve_stock(1, 1, 9)
+        short_status = execute(app, f"""SELECT status FROM {schema}.inventory_reservation
+                                        WHERE reservation_id = %s""", (short['reservation_id'],))[0][0]
+        buckets_before = execute(app, f"SELECT available FROM {schema}.inventory_allocation_bucket ORDER BY bucket_id")
+        _, expired = app.expire_reservations()
+        buckets_after = execute(app, f"SELECT available FROM {schema}.inventory_allocation_bucket ORDER BY bucket_id")
+        oversold, _ = app.reserve_stock(1, 1, 6)
+        atp_query = f"""SELECT on_hand, reserved, available_to_promise
+                        FROM {schema}.inventory_available_to_promise WHERE sku_id = 1 AND warehouse_id = 1"""
+        atp = execute(app, atp_query)
+        # On-hand comes from the stock ledger, not from summing inventory_items
+        execute(app, f"UPDATE {schema}.inventory_items SET quantity = quantity + 1000")
+        atp_from_ledger = execute(app, atp_query)
+
+        assert not released_overdue, "Overdue reservation cannot be released"
+        assert rebuilt.get('reservation_id') is not None, "Reservation for all the new stock succeeds"
+        assert short_status == 'EXPIRED', "Rebuild expires the overdue reservation"
+        assert expired == 0 and buckets_after == buckets_before == [(0,)], "Sweeper has nothing left to refund"
+        assert not oversold, "No stock promised beyond what is on hand"
+        assert atp == [(9, 9, 0)], "Available-to-promise never negative"
+        assert atp_from_ledger == atp, "View reads on-hand stock from the ledger"
+
+def main():
+    """Run all reservation tests."""
+    return run_tests("🧪 Stock Reservation Testing", [
+        ("Validation", test_reservation_validation),
+        ("Bucket Refunds", test_reservations_refund_buckets),
+        ("Expiry Across a Rebuild", test_expired_reservation_not_counted_twice)
+    ])
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the model serving client: retries, latency budget and circuit breaker.
+Runs against a local stub endpoint, so no Databricks workspace is needed.
+"""
+
+import sys
+import os
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from local_database import run_tests
+
+class StubEndpoint(BaseHTTPRequestHandler):
+    """Serving endpoint stub; the server's `responses` list scripts the status of each call."""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        status, delay = self.server.responses.pop(0) if self.server.responses else (200, 0)
+        self.server.calls += 1
+        time.sleep(delay)
+        rows = body['dataframe_split']['data']
+        content = json.dumps({'predictions': [1.0] * len(rows)} if status == 200 else {'error': 'stub'}).encode()
+        try:
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up on a slow response
+            pass
+
+    def log_message(self, *args):
+        pass
+
+def start_stub(responses):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubEndpoint)
+    server.responses = list(responses)
+    server.calls = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def make_client(server, **kwargs):
+    from serving_client import ModelServingClient
+    url = f"http://127.0.0.1:{server.server_port}/serving-endpoints/test/invocations"
+    return ModelServingClient(lambda: url, lambda: 'token', backoff_base=0.01, **kwargs)
+
+PAYLOAD = {'dataframe_split': {'columns': ['warehouse_id', 'category_id', 'sku_id', 'month'],
+                               'data': [[1.0, 1.0, 1.0, 1.0], [1.0, 1.0, 1.0, 2.0]]}}
+
+def test_retry_then_success():
+    """Test that a transient 503 is retried and the call succeeds."""
+    print("🧪 Testing Serving Client Retries")
+    print("=" * 50)
+
+    server = start_stub([(503, 0)])
+    client = make_client(server, max_retries=2)
+    try:
+        predictions = client.predict(PAYLOAD)
+        stats = client.stats()
+        assert predictions == [1.0, 1.0], "Predictions returned"
+        assert stats['retries'] == 1, "One retry recorded"
+        assert stats['latency_ms']['count'] == 2, "Latency samples recorded"
+        assert stats['circuit_breaker']['state'] == 'closed', "Breaker stays closed"
+    finally:
+        server.shutdown()
+
+def test_latency_budget():
+    """Test that a slow endpoint is abandoned once the latency budget is spent."""
+    print("\n🧪 Testing Serving Client Latency Budget")
+    print("=" * 50)
+
+    from serving_client import ModelServingError
+
+    server = start_stub([(200, 1.0)])
+    client = make_client(server, max_retries=0, latency_budget=0.2)
+    started = time.monotonic()
+    try:
+        client.predict(PAYLOAD)
+        raised = False
+    except ModelServingError:
+        raised = True
+    elapsed = time.monotonic() - started
+    server.shutdown()
+    assert raised, "Slow call raises ModelServingError"
+    assert elapsed < 0.6, "Call returns within the budget"
+
+def test_circuit_breaker():
+    """Test that repeated failures open the circuit and a later trial closes it."""
+    print("\n🧪 Testing Serving Client Circuit Breaker")
+    print("=" * 50)
+
+    from serving_client import CircuitBreaker, CircuitOpenError
+
+    server = start_stub([(500, 0), (500, 0)])
+    client = make_client(server, max_retries=0, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=0.2))
+    try:
+        for _ in range(2):
+            try:
+                client.predict(PAYLOAD)
+            except Exception:
+                pass
+        opened = client.breaker.state == 'open'
+
+        calls_before = server.calls
+        try:
+            client.predict(PAYLOAD)
+            short_circuited = False
+        except CircuitOpenError:
+            short_circuited = server.calls == calls_before
+
+        time.sleep(0.25)
+        recovered = client.predict(PAYLOAD) == [1.0, 1.0]
+        assert opened, "Circuit opens after consecutive failures"
+        assert short_circuited, "Open circuit rejects without calling the endpoint"
+        assert recovered, "Half-open trial succeeds"
+        assert client.breaker.state == 'closed', "Circuit closes after successful trial"
+        assert client.stats()['short_circuits'] == 1, "Short circuit counted"
+    finally:
+        server.shutdown()
+
+def test_rejected_requests():
+    """Test that 401/403 count against the circuit and other 4xx neither count nor reset the streak."""
+    print("\n🧪 Testing Serving Client Rejected Requests")
+    print("=" * 50)
+
+    from serving_client import CircuitBreaker, ModelServingError
+
+    server = start_stub([(500, 0), (400, 0), (403, 0), (401, 0)])
+    client = make_client(server, max_retries=0, breaker=CircuitBreaker(failure_threshold=3, reset_timeout=60))
+    try:
+        statuses = []
+        for _ in range(4):
+            try:
+                client.predict(PAYLOAD)
+            except ModelServingError as e:
+                statuses.append(str(e).split(':')[0])
+        breaker = client.breaker.snapshot()
+        assert statuses == ["Model endpoint returned status 500", "Model endpoint returned status 400",
+                            "Model endpoint returned status 403", "Model endpoint returned status 401"], \
+            "Every failure raised"
+        assert breaker['state'] == 'open' and breaker['consecutive_failures'] == 3, \
+            "500, 403 and 401 open the circuit; 400 does not reset the streak"
+        assert client.stats()['failures'] == 4, "Each failed call counted"
+        assert client.stats()['latency_ms']['count'] == 4, "Latency observed per call"
+    finally:
+        server.shutdown()
+
+def test_half_open_trial_without_call():
+    """Test that a half-open trial failing before the HTTP call doesn't leave the circuit stuck."""
+    print("\n🧪 Testing Half-Open Trial Without an Endpoint Call")
+    print("=" * 50)
+
+    from serving_client import CircuitBreaker, ModelServingClient, ModelServingError
+
+    server = start_stub([])
+    url = f"http://127.0.0.1:{server.server_port}/serving-endpoints/test/invocations"
+    settings = {'url': url, 'token_fails': True}
+
+    def token_provider():
+        if settings['token_fails']:
+            raise Exception("Failed to refresh OAuth token")
+        return 'token'
+
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.1)
+    client = ModelServingClient(lambda: settings['url'], token_provider, max_retries=0, breaker=breaker)
+    try:
+        token_errors = 0
+        for _ in range(2):
+            try:
+                client.predict(PAYLOAD)
+            except ModelServingError:
+                token_errors += 1
+        opened_by_token_failures = breaker.state == 'open'
+
+        # The half-open trial fails on the token again: the circuit re-opens instead of sticking
+        time.sleep(0.15)
+        try:
+            client.predict(PAYLOAD)
+        except ModelServingError:
+            pass
+        reopened = breaker.state == 'open'
+
+        # A trial that finds no endpoint configured gives the trial back
+        time.sleep(0.15)
+        settings['url'] = None
+        try:
+            client.predict(PAYLOAD)
+        except ModelServingError:
+            pass
+        trial_released = breaker.allow_request()
+        breaker.release_trial()
+
+        settings.update(url=url, token_fails=False)
+        recovered = client.predict(PAYLOAD) == [1.0, 1.0]
+        assert token_errors == 2, "Token failures raise ModelServingError"
+        assert opened_by_token_failures, "Token failures open the circuit"
+        assert reopened, "Failed half-open trial re-opens the circuit"
+        assert trial_released, "Unconfigured endpoint releases the trial"
+        assert recovered and breaker.state == 'closed', "Circuit closes once the token works again"
+        assert server.calls == 1, "Endpoint never called without a token"
+    finally:
+        server.shutdown()
+
+def main():
+    """Run all serving client tests."""
+    return run_tests("🧪 Model Serving Client Testing", [
+        ("Retries", test_retry_then_success),
+        ("Latency Budget", test_latency_budget),
+        ("Circuit Breaker", test_circuit_breaker),
+        ("Rejected Requests", test_rejected_requests),
+        ("Half-Open Trial Without Call", test_half_open_trial_without_call)
+    ])
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
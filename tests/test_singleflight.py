@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test script to verify single-flight coalescing of concurrent forecast requests.
+"""
+
+import sys
+import os
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from local_database import run_tests
+
+def run_concurrently(target, count):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+def test_identical_requests_share_one_call():
+    """Test that concurrent callers for the same key trigger one call and share its result."""
+    print("🧪 Testing Single-Flight Coalescing")
+    print("=" * 50)
+
+    from singleflight import SingleFlight
+
+    flights = SingleFlight()
+    calls = []
+    results = []
+    key = (1, 2, 3, (10, 11, 12))
+
+    def slow_forecast():
+        calls.append(1)
+        time.sleep(0.2)
+        return [4.0, 5.0, 6.0]
+
+    run_concurrently(lambda: results.append(flights.do(key, slow_forecast)), 10)
+
+    stats = flights.stats()
+    assert len(calls) == 1, "Model called once"
+    assert results == [[4.0, 5.0, 6.0]] * 10, "Every caller got the result"
+    assert stats['coalesced'] == 9, "Nine callers coalesced"
+    assert stats['in_flight'] == 0, "Nothing left in flight"
+
+def test_errors_are_shared():
+    """Test that a failed call raises the same error for every waiting caller."""
+    print("\n🧪 Testing Single-Flight Error Sharing")
+    print("=" * 50)
+
+    from singleflight import SingleFlight
+
+    flights = SingleFlight()
+    errors = []
+
+    def failing_forecast():
+        time.sleep(0.1)
+        raise RuntimeError("endpoint unavailable")
+
+    def caller():
+        try:
+            flights.do('key', failing_forecast)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    run_concurrently(caller, 5)
+
+    retried = flights.do('key', lambda: 'recovered')
+    assert errors == ["endpoint unavailable"] * 5, "Every caller saw the error"
+    assert retried == 'recovered', "Failed call is not cached"
+
+def test_overlapping_batches():
+    """Test that a batch only computes the keys not already in flight."""
+    print("\n🧪 Testing Single-Flight Overlapping Batches")
+    print("=" * 50)
+
+    from singleflight import SingleFlight
+
+    flights = SingleFlight()
+    computed = []
+    started = threading.Event()
+    results = {}
+
+    def compute(keys):
+        computed.append(sorted(keys))
+        started.set()
+        time.sleep(0.2)
+        return {key: key * 10 for key in keys}
+
+    first = threading.Thread(target=lambda: results.update(first=flights.do_many([1, 2], compute)))
+    first.start()
+    started.wait()
+    results['second'] = flights.do_many([2, 3], compute)
+    first.join()
+
+    assert computed == [[1, 2], [3]], "Shared key computed once"
+    assert results['first'] == {1: 10, 2: 20}, "First batch resolved"
+    assert results['second'] == {2: 20, 3: 30}, "Second batch resolved"
+
+def main():
+    """Run all single-flight tests."""
+    return run_tests("🧪 Single-Flight Coalescing Testing", [
+        ("Identical Requests", test_identical_requests_share_one_call),
+        ("Error Sharing", test_errors_are_shared),
+        ("Overlapping Batches", test_overlapping_batches)
+    ])
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the stock movement ledger: movements written alongside inventory
+changes, opening-balance backfill, snapshot compaction and the inventory reads built on them.
+Runs against a throwaway local PostgreSQL and skips itself when no PostgreSQL binaries are
+available.
+"""
+
+import sys
+import os
+import time
+import threading
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from local_database import local_app_database, execute, seed_reference_data, run_tests
+
+def test_ledger_writes():
+    """Test that adds, bulk uploads, edits and deletes each append the matching movements."""
+    print("🧪 Testing Ledger Writes")
+    print("=" * 50)
+
+    with local_app_database() as app:
+        if app is None:
+            return
+        schema = app.get_schema_name()
+        seed_reference_data(app)
+
+        added = app.add_inventory_item(1, 10, 10.0, warehouse_id=1, location='A-1')
+        bulk_added, _ = app.add_inventory_items_bulk([
+            (1, 1, None, 5, 10.0, 'A-2', None, None, None),
+            (2, 2, None, 7, 20.0, 'B-1', None, None, None)
+        ])
+        item_id = execute(app, f"SELECT id FROM {schema}.inventory_items WHERE location = 'A-1'")[0][0]
+        updated = app.update_inventory_item(item_id, 1, 4, 10.0, warehouse_id=1, location='A-1')
+        moved = app.update_inventory_item(item_id, 1, 4, 10.0, warehouse_id=2, location='A-1')
+        deleted_id = execute(app, f"SELECT id FROM {schema}.inventory_items WHERE location = 'B-1'")[0][0]
+        deleted = app.delete_inventory_item(deleted_id)
+
+        movements = execute(app, f"""SELECT sku_id, warehouse_id, movement_type, quantity, reference
+                                     FROM {schema}.inventory_stock_movement ORDER BY movement_id""")
+        item_ref = f"item:{item_id}"
+
+        assert added and bulk_added and updated and moved and deleted, "All writes succeed"
+        assert movements[0] == (1, 1, 'RECEIPT', 10, item_ref), "Add records a receipt"
+        assert movements[1:3] == [(1, 1, 'RECEIPT', 5, 'csv_upload'), (2, 2, 'RECEIPT', 7, 'csv_upload')], \
+            "Bulk upload records a receipt per row"
+        assert movements[3] == (1, 1, 'ADJUSTMENT', -6, item_ref), "Edit records the net change"
+        assert sorted(movements[4:6]) == [(1, 1, 'ADJUSTMENT', -4, item_ref), (1, 2, 'ADJUSTMENT', 4, item_ref)], \
+            "Warehouse change moves the quantity"
+        assert movements[6] == (2, 2, 'ADJUSTMENT', -7, f"item:{deleted_id}"), \
+            "Delete writes off the quantity"
+        assert len(movements) == 7, "Nothing else recorded"
+        assert app.get_current_stock(1, 1) == 5 and app.get_current_stock(1, 2) == 4 and app.get_current_stock(2, 2) == 0, \
+            "Ledger matches the items"
+
+def test_backfill_and_compaction():
+    """Test opening-balance backfill, compaction into snapshots and inventory reads on top of them."""
+    print("🧪 Testing Backfill and Compaction")
+    print("=" * 50)
+
+    with local_app_database() as app:
+        if app is None:
+            return
+        schema = app.get_schema_name()
+        seed_reference_data(app)
+        # Items that predate the ledger
+        execute(app, f"""INSERT INTO {schema}.inventory_items (sku_id, warehouse_id, quantity, unit_price, minimum_stock)
+                         VALUES (1, 1, 10, 10.0, 5), (1, 1, 6, 10.0, 20), (2, 2, 3, 20.0, 5), (2, 1, 0, 20.0, NULL)""")
+
+        backfilled = app.backfill_stock_movements()
+        opening = execute(app, f"SELECT COUNT(*), SUM(quantity) FROM {schema}.inventory_stock_movement")[0]
+        app.backfill_stock_movements()
+        after_second_backfill = execute(app, f"SELECT COUNT(*) FROM {schema}.inventory_stock_movement")[0][0]
+
+        compacted, report = app.compact_stock_ledger(settle_seconds=0)
+        snapshots = dict(((sku, warehouse), quantity) for sku, warehouse, quantity in execute(
+            app, f"SELECT sku_id, warehouse_id, quantity FROM {schema}.inventory_stock_snapshot"))
+        # Movements after the high-water mark stay in the tail
+        app.add_inventory_item(2, 4, 20.0, warehouse_id=2)
+        recompacted, recent = app.compact_stock_ledger(settle_seconds=300)
+        snapshot_after_tail = execute(app, f"""SELECT quantity FROM {schema}.inventory_stock_snapshot
+                                               WHERE sku_id = 2 AND warehouse_id = 2""")[0][0]
+
+        inventory = {(row[16], row[13]): row for row in app.get_inventory_items()}
+        low_stock = [(row[16], row[13]) for row in app.get_low_stock_items()]
+        # Inventory quantities must come from the ledger, not from summing inventory_items
+        execute(app, f"UPDATE {schema}.inventory_items SET quantity = quantity + 1000")
+        from_ledger = {(row[16], row[13]): row[6] for row in app.get_inventory_items()}
+
+        assert backfilled and opening == (3, 19), "Opening balances seeded for non-zero rows"
+        assert after_second_backfill == 3, "Backfill only runs on an empty ledger"
+        assert compacted and report['pairs_compacted'] == 2, "Compaction snapshots every pair"
+        assert snapshots == {(1, 1): 16, (2, 2): 3}, "Snapshot quantities"
+        assert recompacted and recent['pairs_compacted'] == 0 and snapshot_after_tail == 3, \
+            "Unsettled movements left in the tail"
+        assert app.get_current_stock(2, 2) == 7, "Current stock is snapshot plus tail"
+        assert inventory[(1, 1)][6] == 16 and inventory[(2, 2)][6] == 7, "Inventory quantity per pair"
+        assert inventory[(2, 1)][6] == 0, "Pair without movements reads zero"
+        assert inventory[(1, 1)][9] == 20 and inventory[(1, 1)][7] == 10.0, "Attributes aggregated per pair"
+        assert low_stock == [(1, 1)], "Low stock uses ledger quantities"
+        assert from_ledger == {(1, 1): 16, (2, 2): 7, (2, 1): 0}, "Quantities read from the ledger"
+
+def test_concurrent_edits_keep_ledger_in_step():
+    """Test that an edit or delete waiting on another transaction's edit of the same row takes
+    its ledger delta from the committed row, not from the version it first saw."""
+    print("🧪 Testing Concurrent Edits")
+    print("=" * 50)
+
+    with local_app_database() as app:
+        if app is None:
+            return
+        schema = app.get_schema_name()
+        seed_reference_data(app)
+        app.add_inventory_item(1, 10, 10.0, warehouse_id=1, location='A-1')
+        app.add_inventory_item(2, 10, 20.0, warehouse_id=1, location='B-1')
+        first_id, second_id = [row[0] for row in execute(app, f"SELECT id FROM {schema}.inventory_items ORDER BY id")]
+
+        def edit_while_locked(item_id, sku_id, write):
+            # Another session edits the row (and records its movement) and commits while `write` waits on it
+            results = []
+            with app.get_connection() as conn:
+                conn.execute(f"UPDATE {schema}.inventory_items SET quantity = 20 WHERE id = %s", (item_id,))
+                conn.execute(f"""INSERT INTO {schema}.inventory_stock_movement (sku_id, warehouse_id, movement_type, quantity)
+                                 VALUES (%s, 1, 'ADJUSTMENT', 10)""", (sku_id,))
+                waiting = threading.Thread(target=lambda: results.append(write()))
+                waiting.start()
+                time.sleep(0.5)
+                conn.commit()
+            waiting.join(timeout=10)
+            return results == [True]
+
+        edited = edit_while_locked(first_id, 1, lambda: app.update_inventory_item(first_id, 1, 5, 10.0, warehouse_id=1))
+        deleted = edit_while_locked(second_id, 2, lambda: app.delete_inventory_item(second_id))
+
+        assert edited and deleted, "Waiting writes succeed"
+        assert app.get_current_stock(1, 1) == 5, "Edit delta taken from the committed row"
+        assert app.get_current_stock(2, 1) == 0, "Delete writes off the committed quantity"
+
+def main():
+    """Run all stock ledger tests."""
+    return run_tests("🧪 Stock Ledger Testing", [
+        ("Ledger Writes", test_ledger_writes),
+        ("Backfill and Compaction", test_backfill_and_compaction),
+        ("Concurrent Edits", test_concurrent_edits_keep_ledger_in_step)
+    ])
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test script to verify multi-line stock transfers: line validation, and the set-based
+transfer statement against a throwaway local PostgreSQL (skipped when no PostgreSQL
+binaries are available).
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from local_database import local_app_database, execute, seed_reference_data, run_tests
+
+def test_validate_transfer_lines():
+    """Test that dict and array lines are normalized and bad lines are reported by number."""
+    print("🧪 Testing Transfer Line Validation")
+    print("=" * 50)
+
+    from app import validate_transfer_lines, transfer_stock
+
+    lines, errors = validate_transfer_lines([
+        {'sku_id': '1', 'from_warehouse_id': 1, 'to_warehouse_id': 2, 'quantity': '5'},
+        [2, 2, 1, 3]
+    ])
+    _, bad = validate_transfer_lines([
+        {'sku_id': 1, 'from_warehouse_id': 1, 'quantity': 5},
+        [1, 1, 2, 'x'],
+        [1, 1, 2],
+        [1, 1, 2, 0],
+        [1, 2, 2, 4]
+    ])
+    rejected, result = transfer_stock([[1, 2, 2, 4]])
+    empty, empty_result = transfer_stock([])
+
+    assert lines == [(1, 1, 2, 5), (2, 2, 1, 3)] and errors == [], "Dict and array lines normalized"
+    assert bad[0].startswith("Line 1:"), "Missing field reported"
+    assert bad[1].startswith("Line 2:"), "Non-integer value reported"
+    assert bad[2].startswith("Line 3:"), "Short array reported"
+    assert bad[3] == "Line 4: quantity must be greater than 0", "Zero quantity reported"
+    assert bad[4] == "Line 5: from_warehouse_id and to_warehouse_id must differ", "Same warehouse reported"
+    assert not rejected and result['error'] == 'Invalid transfer lines', \
+        "Invalid lines rejected before the database"
+    assert not empty and empty_result['error'] == 'No transfer lines provided', "Empty transfer rejected"
+
+def test_transfer_stock():
+    """Test draining sources oldest first, creating destination rows, ledger movements and
+    that a transfer overdrawing on-hand or unreserved stock writes nothing."""
+    print("🧪 Testing Stock Transfers")
+    print("=" * 50)
+
+    with local_app_database() as app:
+        if app is None:
+            return
+        schema = app.get_schema_name()
+        seed_reference_data(app)
+        for sku_id, warehouse_id, quantity, price in ((1, 1, 6, 10.0), (1, 1, 4, 20.0), (2, 2, 5, 30.0)):
+            app.add_inventory_item(sku_id, quantity, price, warehouse_id=warehouse_id)
+
+        def items():
+            return execute(app, f"""SELECT sku_id, warehouse_id, quantity, unit_price
+                                    FROM {schema}.inventory_items ORDER BY id""")
+
+        success, result = app.transfer_stock([
+            {'sku_id': 1, 'from_warehouse_id': 1, 'to_warehouse_id': 2, 'quantity': 8},
+            [2, 2, 1, 3]
+        ], reference='rebalance-1')
+        after_transfer = items()
+        movements = execute(app, f"""SELECT sku_id, warehouse_id, movement_type, quantity
+                                     FROM {schema}.inventory_stock_movement
+                                     WHERE reference = 'rebalance-1' ORDER BY sku_id, movement_type""")
+
+        ledger = (app.get_current_stock(1, 1), app.get_current_stock(1, 2))
+
+        overdrawn_ok, overdrawn = app.transfer_stock([[1, 1, 2, 1], [1, 2, 1, 1], [2, 1, 2, 50]])
+        after_overdrawn = items()
+
+        # Held stock cannot be transferred away, even though it is still on hand
+        app.reserve_stock(1, 2, 6)
+        reserved_ok, reserved = app.transfer_stock([[1, 2, 1, 3]])
+        after_reserved = items()
+
+        assert success and result['reference'] == 'rebalance-1', "Transfer succeeds"
+        assert result.get('rows_updated') == 3 and result.get('rows_created') == 2 and result.get('movements_recorded') == 4, \
+            "Rows touched and created counted"
+        assert after_transfer[0][2] == 0 and after_transfer[1][2] == 2, "Source drained oldest row first"
+        assert after_transfer[2][2] == 2, "Second source decremented"
+        assert sorted(row[:3] for row in after_transfer[3:]) == [(1, 2, 8), (2, 1, 3)], \
+            "Destination rows created"
+        assert any(row[:2] == (1, 2) and abs(float(row[3]) - 14.0) < 1e-9 for row in after_transfer), \
+            "New row priced at the source's weighted cost"
+        assert (movements == [
+                (1, 2, 'TRANSFER_IN', 8), (1, 1, 'TRANSFER_OUT', -8),
+                (2, 1, 'TRANSFER_IN', 3), (2, 2, 'TRANSFER_OUT', -3)]), "Out and in movements recorded"
+        assert ledger == (2, 8), "Ledger agrees with the items"
+        assert not overdrawn_ok and overdrawn.get('error') == 'Insufficient stock for transfer', \
+            "Overdrawn transfer refused"
+        assert overdrawn.get('overdrawn') == [
+            {'sku_id': 2, 'warehouse_id': 1, 'on_hand': 3, 'reserved': 0, 'requested': 50}], "Overdrawn pair reported"
+        assert after_overdrawn == after_transfer, "Overdrawn transfer wrote nothing"
+        assert not reserved_ok and reserved.get('overdrawn') == [
+            {'sku_id': 1, 'warehouse_id': 2, 'on_hand': 8, 'reserved': 6, 'requested': 3}], "Reserved stock not transferable"
+        assert after_reserved == after_transfer, "Transfer of reserved stock wrote nothing"
+
+def main():
+    """Run all transfer tests."""
+    return run_tests("🧪 Stock Transfer Testing", [
+        ("Line Validation", test_validate_transfer_lines),
+        ("Stock Transfers", test_transfer_stock)
+    ])
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)